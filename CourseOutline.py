@@ -0,0 +1,166 @@
+import os
+import sys
+import json
+import argparse
+from xml.etree import ElementTree as ET
+
+instructions = """
+To use:
+python3 CourseOutline.py path/to/course/folder
+
+Walks the course outline once, following pointer tags into their files
+and reading inline components where they are, and prints every component
+with the section, subsection, and unit it lives in.
+
+Other scripts use this to find where things are in the course:
+VideoInventory.py uses it for per-section video times, for example.
+
+Options:
+  -h  Print this help message and exit.
+
+Last update: October 19th, 2026
+"""
+
+# Tags that hold other parts of the course. We look inside these.
+# Components (html, problem, video...) are reported but not opened up.
+container_tags = [
+    "course",
+    "chapter",
+    "sequential",
+    "vertical",
+    "split_test",
+    "conditional",
+    "library_content",
+]
+skip_tags = ["wiki"]
+
+# The levels of the outline, top down, and what Studio calls them.
+outline_levels = {"chapter": "section", "sequential": "subsection", "vertical": "unit"}
+
+
+# If this is a pointer tag (<video url_name="abc"/>), gets the file it points to.
+# Inline tags are returned as they are. Returns the element and its file (or None).
+def resolveElement(course_folder, element):
+    url_name = element.attrib.get("url_name", None)
+    if len(element) == 0 and url_name is not None:
+        filepath = os.path.join(course_folder, element.tag, url_name + ".xml")
+        if os.path.exists(filepath):
+            root = ET.parse(filepath).getroot()
+            # The url_name lives on the pointer, not in the file.
+            root.set("url_name", url_name)
+            return root, filepath
+    return element, None
+
+
+# Walks part of the course in order, starting from this element.
+# For each element, yields a dict with:
+#   element: the resolved XML element
+#   filepath: the file it came from, or None if it was inline
+#   parentage: {"chapter": (url_name, display_name), "sequential": ..., "vertical": ...}
+#     for each level above it (and including it, for those levels).
+#   ancestors: the files of the containers above it, top down.
+def walkElement(course_folder, element, filepath, parentage, ancestors=()):
+    if element.tag in outline_levels:
+        parentage = dict(parentage)
+        parentage[element.tag] = (
+            element.attrib.get("url_name", ""),
+            element.attrib.get("display_name", element.tag),
+        )
+    yield {
+        "element": element,
+        "filepath": filepath,
+        "parentage": parentage,
+        "ancestors": ancestors,
+    }
+
+    if element.tag not in container_tags:
+        return
+    if filepath is not None:
+        ancestors = ancestors + (filepath,)
+    for child in element:
+        if child.tag in skip_tags:
+            continue
+        child, child_file = resolveElement(course_folder, child)
+        yield from walkElement(course_folder, child, child_file, parentage, ancestors)
+
+
+# Walks the whole course in order, one element at a time. See above.
+def walkOutline(course_folder):
+    course_root = ET.parse(os.path.join(course_folder, "course.xml")).getroot()
+    root, filepath = resolveElement(course_folder, course_root)
+    yield from walkElement(course_folder, root, filepath, {})
+
+
+# Maps (tag, url_name) for every element in the outline to its parentage.
+# Handy when you're looking at files one at a time and want to know where they go.
+def getParentageIndex(course_folder):
+    index = dict()
+    for item in walkOutline(course_folder):
+        element = item["element"]
+        url_name = element.attrib.get("url_name", None)
+        if url_name is not None:
+            index[(element.tag, url_name)] = item["parentage"]
+    return index
+
+
+# The files one element keeps its content in: its own file, the .html file
+# for HTML components, and transcripts (in static/) for videos.
+def getElementFiles(course_folder, element, filepath):
+    files = []
+    if filepath is not None:
+        files.append(filepath)
+    if element.tag == "html" and element.get("filename"):
+        if filepath is not None:
+            html_folder = os.path.dirname(filepath)
+        else:
+            html_folder = os.path.join(course_folder, "html")
+        files.append(os.path.join(html_folder, element.get("filename") + ".html"))
+    if element.tag == "video":
+        # Transcripts can be listed a few different ways.
+        sources = [t.get("src", "") for t in element.findall("transcript")]
+        try:
+            sources += list(json.loads(element.get("transcripts", "{}")).values())
+        except ValueError:
+            pass
+        if element.get("sub"):
+            sources.append("subs_" + element.get("sub") + ".srt.sjson")
+        for src in sources:
+            if src:
+                files.append(os.path.join(course_folder, "static", src))
+    return files
+
+
+# "Section name > Subsection name > Unit name", as far down as we know.
+def describeParentage(parentage):
+    return " > ".join(
+        parentage[level][1] for level in outline_levels if level in parentage
+    )
+
+
+def CourseOutline(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("course_folder", nargs="?", default=None)
+
+    args = parser.parse_args()
+    if args.help or args.course_folder is None:
+        sys.exit(instructions)
+
+    if not os.path.exists(os.path.join(args.course_folder, "course.xml")):
+        sys.exit("No course.xml file found in " + args.course_folder)
+
+    for item in walkOutline(args.course_folder):
+        element = item["element"]
+        if element.tag in container_tags:
+            continue
+        print(
+            element.tag
+            + "\t"
+            + element.attrib.get("url_name", "")
+            + "\t"
+            + describeParentage(item["parentage"])
+        )
+
+
+if __name__ == "__main__":
+    CourseOutline(sys.argv)
@@ -0,0 +1,335 @@
+import os
+import re
+import sys
+import json
+import html
+import sqlite3
+import argparse
+from array import array
+from CourseOutline import walkOutline, describeParentage, getElementFiles
+
+instructions = """
+To use:
+python3 CourseSearch.py index path/to/course/folder (more course folders) (options)
+python3 CourseSearch.py find "words to find" (options)
+
+Keeps a search index of everything students can read in a course:
+text and attributes in the XML and HTML files (including tabs),
+and transcripts (.srt and .sjson) in static/.
+
+  index  Adds courses to the index, or brings them up to date.
+         Only files that changed since last time are read again.
+  find   Finds the words, in that order, in every indexed course, and
+         says which section, subsection, and unit each hit is in.
+         Punctuation and capitalization don't matter, so
+         "HX102+1T2030" finds HX102 1T2030, hx102/1t2030, and so on.
+
+The index is kept in ~/.hxxml/search.sqlite unless you pick
+another file with -i.
+
+Options:
+  -i  Index file to use, e.g. -i=search.sqlite
+  -c  Only search in this course folder.
+  -h  Print this help message and exit.
+
+Last update: October 19th, 2026
+"""
+
+index_file = os.path.join(os.path.expanduser("~"), ".hxxml", "search.sqlite")
+
+schema = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id INTEGER PRIMARY KEY,
+    course_folder TEXT,
+    path TEXT,
+    location TEXT,
+    mtime REAL,
+    UNIQUE (course_folder, path)
+);
+CREATE TABLE IF NOT EXISTS terms (
+    term_id INTEGER PRIMARY KEY,
+    term TEXT UNIQUE
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER,
+    doc_id INTEGER,
+    positions BLOB,
+    PRIMARY KEY (term_id, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+"""
+
+# Bumped whenever what's stored changes. Older indexes are emptied and rebuilt.
+# 1: positions are always 8 bytes each, on every platform.
+index_version = 1
+
+# Which files we read, and how.
+markup_extensions = [".xml", ".html"]
+transcript_extensions = [".srt", ".sjson"]
+
+token_regex = re.compile(r"\w+")
+tag_regex = re.compile(r"<!--.*?-->|<[^>]*>", re.S)
+# Attribute values, quoted or not.
+value_regex = re.compile(r"""=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+srt_skip_regex = re.compile(r"^\s*(\d+|\d\d:\d\d:\d\d[,.]\d+\s*-->.*)\s*$")
+
+
+def tokenize(text):
+    return [t.lower() for t in token_regex.findall(text)]
+
+
+# The readable text of an XML or HTML file: the text between tags,
+# plus the values of every attribute (where URLs and IDs live).
+# Tag and attribute names are left out.
+def getMarkupText(raw):
+    def keepValues(match):
+        # Only one of the three groups matches, so joining them gets the value.
+        values = ["".join(m) for m in value_regex.findall(match.group(0))]
+        return " " + " ".join(values) + " "
+
+    return html.unescape(tag_regex.sub(keepValues, raw))
+
+
+def getTranscriptText(raw, extension):
+    if extension == ".sjson":
+        try:
+            return " ".join(json.loads(raw).get("text", []))
+        except (ValueError, AttributeError):
+            return ""
+    # SRT: skip the cue numbers and the timestamps.
+    return "\n".join(
+        line for line in raw.splitlines() if not srt_skip_regex.match(line)
+    )
+
+
+# Gets the text of a file, or None if it's not something we index.
+def getFileText(filepath, relpath):
+    extension = os.path.splitext(filepath)[1].lower()
+    in_static = relpath.startswith("static" + os.sep)
+    if in_static and extension not in transcript_extensions:
+        return None
+    if not in_static and extension not in markup_extensions:
+        return None
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            raw = f.read()
+    except UnicodeDecodeError:
+        return None
+    if extension in transcript_extensions:
+        return getTranscriptText(raw, extension)
+    return getMarkupText(raw)
+
+
+# Where in the course each file is, keyed by path relative to the course folder.
+def getFileLocations(course_folder):
+    locations = dict()
+    for item in walkOutline(course_folder):
+        where = describeParentage(item["parentage"])
+        for filepath in getElementFiles(
+            course_folder, item["element"], item["filepath"]
+        ):
+            locations[os.path.relpath(filepath, course_folder)] = where
+    return locations
+
+
+def openIndex(filename):
+    folder = os.path.dirname(os.path.abspath(filename))
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    connection = sqlite3.connect(filename)
+    if connection.execute("PRAGMA user_version").fetchone()[0] != index_version:
+        connection.executescript(
+            "DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS terms; "
+            "DROP TABLE IF EXISTS documents; "
+            "PRAGMA user_version = " + str(index_version) + ";"
+        )
+    connection.executescript(schema)
+    return connection
+
+
+def getTermIds(connection, terms, term_ids):
+    new_terms = [t for t in terms if t not in term_ids]
+    if len(new_terms) > 0:
+        connection.executemany(
+            "INSERT OR IGNORE INTO terms (term) VALUES (?)", [(t,) for t in new_terms]
+        )
+        for t in new_terms:
+            term_ids[t] = connection.execute(
+                "SELECT term_id FROM terms WHERE term = ?", (t,)
+            ).fetchone()[0]
+    return [term_ids[t] for t in terms]
+
+
+def removeDocument(connection, doc_id):
+    connection.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+    connection.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+
+# Brings the index up to date for one course.
+# Returns how many files were (re)indexed and how many were removed.
+def indexCourse(connection, course_folder):
+    course_folder = os.path.abspath(course_folder)
+    locations = getFileLocations(course_folder)
+    known = {
+        path: (doc_id, location, mtime)
+        for doc_id, path, location, mtime in connection.execute(
+            "SELECT doc_id, path, location, mtime FROM documents "
+            "WHERE course_folder = ?",
+            (course_folder,),
+        )
+    }
+    term_ids = dict()
+    num_indexed = 0
+
+    with connection:
+        for dirpath, dirnames, filenames in os.walk(course_folder):
+            for eachfile in filenames:
+                filepath = os.path.join(dirpath, eachfile)
+                relpath = os.path.relpath(filepath, course_folder)
+                mtime = os.path.getmtime(filepath)
+                if relpath in known:
+                    doc_id, old_location, old_mtime = known.pop(relpath)
+                    if old_mtime == mtime:
+                        # The file's the same, but it may have moved in the outline.
+                        location = locations.get(relpath, "")
+                        if location != old_location:
+                            connection.execute(
+                                "UPDATE documents SET location = ? WHERE doc_id = ?",
+                                (location, doc_id),
+                            )
+                        continue
+                    removeDocument(connection, doc_id)
+
+                text = getFileText(filepath, relpath)
+                if text is None:
+                    continue
+
+                # Every position of every word in this file.
+                positions = dict()
+                for i, token in enumerate(tokenize(text)):
+                    positions.setdefault(token, array("q")).append(i)
+
+                doc_id = connection.execute(
+                    "INSERT INTO documents (course_folder, path, location, mtime) "
+                    "VALUES (?, ?, ?, ?)",
+                    (course_folder, relpath, locations.get(relpath, ""), mtime),
+                ).lastrowid
+                terms = list(positions)
+                connection.executemany(
+                    "INSERT INTO postings VALUES (?, ?, ?)",
+                    [
+                        (term_id, doc_id, positions[t].tobytes())
+                        for term_id, t in zip(
+                            getTermIds(connection, terms, term_ids), terms
+                        )
+                    ],
+                )
+                num_indexed += 1
+
+        # Anything we didn't see this time is gone from the course.
+        for relpath in known:
+            removeDocument(connection, known[relpath][0])
+
+    return num_indexed, len(known)
+
+
+# Finds the words as a phrase. Returns a list of
+# (course_folder, path, location, number of hits), most hits first.
+def findPhrase(connection, phrase, course_folder=None):
+    words = tokenize(phrase)
+    if len(words) == 0:
+        return []
+
+    term_ids = []
+    for w in words:
+        row = connection.execute(
+            "SELECT term_id FROM terms WHERE term = ?", (w,)
+        ).fetchone()
+        if row is None:
+            return []
+        term_ids.append(row[0])
+
+    # Start with the rarest word, then check the others only in those files.
+    postings = []
+    for term_id in term_ids:
+        postings.append(
+            {
+                doc_id: blob
+                for doc_id, blob in connection.execute(
+                    "SELECT doc_id, positions FROM postings WHERE term_id = ?",
+                    (term_id,),
+                )
+            }
+        )
+    candidates = set(min(postings, key=len))
+    for p in postings:
+        candidates &= p.keys()
+
+    results = []
+    for doc_id in candidates:
+        starts = None
+        for offset, p in enumerate(postings):
+            positions = array("q")
+            positions.frombytes(p[doc_id])
+            shifted = set(x - offset for x in positions)
+            starts = shifted if starts is None else starts & shifted
+            if len(starts) == 0:
+                break
+        if not starts:
+            continue
+        folder, path, location = connection.execute(
+            "SELECT course_folder, path, location FROM documents WHERE doc_id = ?",
+            (doc_id,),
+        ).fetchone()
+        if course_folder is not None and folder != os.path.abspath(course_folder):
+            continue
+        results.append((folder, path, location, len(starts)))
+
+    results.sort(key=lambda r: (-r[3], r[0], r[1]))
+    return results
+
+
+def CourseSearch(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("command", nargs="?", default=None)
+    parser.add_argument("targets", nargs="*", default=[])
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-i", "--index", default=index_file)
+    parser.add_argument("-c", "--course", default=None)
+
+    args = parser.parse_args()
+    if args.help or args.command not in ["index", "find"] or len(args.targets) == 0:
+        sys.exit(instructions)
+
+    connection = openIndex(args.index)
+
+    if args.command == "index":
+        for course_folder in args.targets:
+            if not os.path.exists(os.path.join(course_folder, "course.xml")):
+                print("No course.xml file found in " + course_folder)
+                continue
+            num_indexed, num_removed = indexCourse(connection, course_folder)
+            print(
+                course_folder
+                + ": "
+                + str(num_indexed)
+                + " files indexed, "
+                + str(num_removed)
+                + " removed."
+            )
+    else:
+        results = findPhrase(connection, " ".join(args.targets), args.course)
+        for folder, path, location, count in results:
+            print(
+                str(count)
+                + "\t"
+                + os.path.join(folder, path)
+                + ("\t" + location if location else "")
+            )
+        print(str(len(results)) + " files found.")
+
+    connection.close()
+
+
+if __name__ == "__main__":
+    CourseSearch(sys.argv)
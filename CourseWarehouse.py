@@ -0,0 +1,446 @@
+import os
+import sys
+import shutil
+import sqlite3
+import tarfile
+import argparse
+import datetime
+import tempfile
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from xml.etree import ElementTree as ET
+from MakeNewRun import (
+    setUpDetails,
+    scrapeChapters,
+    countComponents,
+    scrapeProblems,
+    scrapeVideos,
+    getStaticFiles,
+    findTrouble,
+)
+from ProblemIndex import indexProblems
+
+instructions = """
+To use:
+python3 CourseWarehouse.py ingest path/to/exports (options)
+python3 CourseWarehouse.py query name_of_query (options)
+
+Keeps the facts that MakeNewRun.py puts in its summary file
+(component counts, problem types, ungated problems, video lengths,
+trouble spots) for many courses in one SQLite database, so that
+questions about all our courses are a quick query instead of a rescan.
+
+  ingest  Reads course exports (.tar.gz files or extracted course folders,
+          or folders full of them) and adds them to the warehouse.
+          Courses are read in parallel. Nothing in the exports is changed.
+          Re-ingesting a course replaces what we had for it.
+  query   Runs one of the canned queries below, or any SQL you give it,
+          and prints tab-separated results.
+
+Canned queries:
+{queries}
+
+The warehouse is kept in ~/.hxxml/warehouse.sqlite unless you pick
+another file with -w. You can also open it with any SQLite tool.
+
+Options:
+  -w  Warehouse file to use, e.g. -w=courses.sqlite
+  -p  Number of courses to read at once. Defaults to the number of CPUs.
+  -h  Print this help message and exit.
+
+Last update: October 19th, 2026
+"""
+
+warehouse_file = os.path.join(os.path.expanduser("~"), ".hxxml", "warehouse.sqlite")
+
+schema = """
+CREATE TABLE IF NOT EXISTS courses (
+    course_id TEXT PRIMARY KEY,
+    org TEXT,
+    course TEXT,
+    run TEXT,
+    display_name TEXT,
+    source TEXT,
+    ingested TEXT,
+    num_chapters INTEGER,
+    num_highlights INTEGER,
+    num_problems INTEGER,
+    ungated_problems INTEGER,
+    problems_with_solutions INTEGER,
+    num_videos INTEGER,
+    youtube_videos INTEGER,
+    downloadable_videos INTEGER,
+    downloadable_transcripts INTEGER,
+    total_video_seconds REAL
+);
+CREATE TABLE IF NOT EXISTS components (
+    course_id TEXT,
+    category TEXT,
+    count INTEGER
+);
+CREATE TABLE IF NOT EXISTS problem_types (
+    course_id TEXT,
+    problem_type TEXT,
+    count INTEGER
+);
+CREATE TABLE IF NOT EXISTS problems (
+    course_id TEXT,
+    url_name TEXT,
+    display_name TEXT,
+    response_types TEXT,
+    weight REAL,
+    has_solution INTEGER,
+    group_access TEXT
+);
+CREATE TABLE IF NOT EXISTS video_lengths (
+    course_id TEXT,
+    seconds REAL
+);
+CREATE TABLE IF NOT EXISTS trouble (
+    course_id TEXT,
+    kind TEXT,
+    location TEXT
+);
+CREATE INDEX IF NOT EXISTS components_course ON components (course_id, category);
+CREATE INDEX IF NOT EXISTS components_category ON components (category);
+CREATE INDEX IF NOT EXISTS problem_types_course ON problem_types (course_id);
+CREATE INDEX IF NOT EXISTS problem_types_type ON problem_types (problem_type);
+CREATE INDEX IF NOT EXISTS problems_course ON problems (course_id);
+CREATE INDEX IF NOT EXISTS problems_solution ON problems (has_solution);
+CREATE INDEX IF NOT EXISTS video_lengths_course ON video_lengths (course_id);
+CREATE INDEX IF NOT EXISTS trouble_course ON trouble (course_id);
+CREATE INDEX IF NOT EXISTS trouble_kind ON trouble (kind);
+"""
+
+# Tables with one row per course fact, cleared when a course is re-ingested.
+fact_tables = ["components", "problem_types", "problems", "video_lengths", "trouble"]
+
+# name: (description, SQL)
+canned_queries = {
+    "courses": (
+        "Every course in the warehouse, with its size.",
+        "SELECT course_id, display_name, num_chapters, num_problems, num_videos, "
+        "ROUND(total_video_seconds / 3600, 1) AS video_hours, ingested "
+        "FROM courses ORDER BY course_id",
+    ),
+    "no_solution": (
+        "Problems without written explanations, by course.",
+        "SELECT course_id, COUNT(*) AS no_solution, "
+        "(SELECT num_problems FROM courses c WHERE c.course_id = p.course_id) "
+        "AS num_problems "
+        "FROM problems p WHERE has_solution = 0 "
+        "GROUP BY course_id ORDER BY no_solution DESC",
+    ),
+    "checkbox_no_solution": (
+        "Checkbox problems without written explanations, by course.",
+        "SELECT course_id, COUNT(*) AS checkbox_no_solution FROM problems "
+        "WHERE has_solution = 0 AND ',' || response_types || ',' "
+        "LIKE '%,choiceresponse,%' "
+        "GROUP BY course_id ORDER BY checkbox_no_solution DESC",
+    ),
+    "problem_types": (
+        "How many of each problem type there are across all courses.",
+        "SELECT problem_type, SUM(count) AS total, COUNT(DISTINCT course_id) "
+        "AS courses FROM problem_types WHERE count > 0 "
+        "GROUP BY problem_type ORDER BY total DESC",
+    ),
+    "components": (
+        "How many of each component type there are across all courses.",
+        "SELECT category, SUM(count) AS total, COUNT(DISTINCT course_id) "
+        "AS courses FROM components GROUP BY category ORDER BY total DESC",
+    ),
+    "ungated": (
+        "How much of each course is outside the paywall.",
+        "SELECT course_id, ungated_problems, num_problems FROM courses "
+        "ORDER BY course_id",
+    ),
+    "video_length": (
+        "Video counts and lengths, by course.",
+        "SELECT c.course_id, c.num_videos, COUNT(v.seconds) AS with_length, "
+        "ROUND(MAX(v.seconds) / 60, 1) AS longest_minutes, "
+        "ROUND(SUM(v.seconds) / 3600, 1) AS total_hours "
+        "FROM courses c LEFT JOIN video_lengths v ON c.course_id = v.course_id "
+        "GROUP BY c.course_id ORDER BY c.course_id",
+    ),
+    "trouble": (
+        "Counts of things to fix by hand (iframes, Flash, YouTube...), by course.",
+        "SELECT course_id, kind, COUNT(*) AS count FROM trouble "
+        "GROUP BY course_id, kind ORDER BY course_id, kind",
+    ),
+}
+
+
+# Finds everything that looks like a course export in the given paths.
+def findExports(paths):
+    exports = []
+    for path in paths:
+        if path.endswith(".tar.gz") and os.path.isfile(path):
+            exports.append(path)
+        elif os.path.exists(os.path.join(path, "course.xml")):
+            exports.append(path)
+        elif os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                if "course.xml" in filenames:
+                    exports.append(dirpath)
+                    # Don't go looking inside the course.
+                    dirnames[:] = []
+                    continue
+                exports += [
+                    os.path.join(dirpath, f) for f in filenames if f.endswith(".tar.gz")
+                ]
+    return exports
+
+
+# The MakeNewRun scrapers expect a course/ folder inside details["run"]["pathname"].
+# Returns that pathname, extracting tarballs and linking oddly-named folders.
+def prepareExport(export, temp_folder):
+    if os.path.isfile(export):
+        tar = tarfile.open(export)
+        tar.extractall(temp_folder)
+        tar.close()
+        return temp_folder
+    export = os.path.abspath(export)
+    if os.path.basename(export) == "course":
+        return os.path.dirname(export)
+    os.symlink(export, os.path.join(temp_folder, "course"))
+    return temp_folder
+
+
+# One row per problem, for questions the totals can't answer.
+def getProblemRows(course_folder):
+    index = indexProblems(os.path.join(course_folder, "problem"))
+    rows = []
+    for filepath in index:
+        features = index[filepath]
+        rows.append(
+            {
+                "url_name": features["url_name"],
+                "display_name": features["display_name"],
+                "response_types": ",".join(features["response_types"]),
+                "weight": features["weight"],
+                "has_solution": 1 if features["has_solution"] else 0,
+                "group_access": features["group_access"],
+            }
+        )
+    return rows
+
+
+# Reads one course export and returns everything we want to keep about it.
+# Runs in a worker process, so it only returns plain data.
+def scrapeCourse(export):
+    temp_folder = tempfile.mkdtemp(prefix="hxxml_")
+    try:
+        pathname = prepareExport(export, temp_folder)
+        course_folder = os.path.join(pathname, "course")
+
+        root = ET.parse(os.path.join(course_folder, "course.xml")).getroot()
+        run = root.attrib.get("url_name", "")
+        display_name = ""
+        run_file = os.path.join(course_folder, "course", run + ".xml")
+        if os.path.exists(run_file):
+            display_name = ET.parse(run_file).getroot().attrib.get("display_name", "")
+
+        args = SimpleNamespace(
+            run=run,
+            tarfile=os.path.join(pathname, "course.tar.gz"),
+            start="2000-01-01T00:00:00+00:00",
+            end="2000-01-01T00:00:00+00:00",
+        )
+        details = setUpDetails(args)
+        details = scrapeChapters(details)
+        details = scrapeProblems(details)
+        details = scrapeVideos(details)
+        details = getStaticFiles(".js", details)
+        component_count, ora_files = countComponents(course_folder)
+
+        trouble = details["trouble"]
+        for folder in ["html", "tabs", "problem"]:
+            extension = ".xml" if folder == "problem" else ".html"
+            for dirpath, dirnames, filenames in os.walk(
+                os.path.join(course_folder, folder)
+            ):
+                for eachfile in filenames:
+                    if not eachfile.endswith(extension):
+                        continue
+                    with open(os.path.join(dirpath, eachfile), mode="r") as f:
+                        page_trouble = findTrouble(f.read(), folder + "/" + eachfile)
+                    for kind in page_trouble:
+                        trouble[kind] += page_trouble[kind]
+
+        return {
+            "course_id": "course-v1:"
+            + root.attrib.get("org", "")
+            + "+"
+            + root.attrib.get("course", "")
+            + "+"
+            + run,
+            "org": root.attrib.get("org", ""),
+            "course": root.attrib.get("course", ""),
+            "run": run,
+            "display_name": display_name,
+            "source": os.path.abspath(export),
+            "details": details,
+            "component_count": component_count,
+            "problem_rows": getProblemRows(course_folder),
+        }
+    finally:
+        shutil.rmtree(temp_folder, ignore_errors=True)
+
+
+def openWarehouse(filename):
+    folder = os.path.dirname(os.path.abspath(filename))
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    connection = sqlite3.connect(filename)
+    connection.executescript(schema)
+    return connection
+
+
+# Replaces everything we know about one course, all in one transaction.
+def storeCourse(connection, facts):
+    course_id = facts["course_id"]
+    details = facts["details"]
+    problems = details["problems"]
+    videos = details["videos"]
+
+    with connection:
+        connection.execute("DELETE FROM courses WHERE course_id = ?", (course_id,))
+        for table in fact_tables:
+            connection.execute(
+                "DELETE FROM " + table + " WHERE course_id = ?", (course_id,)
+            )
+
+        connection.execute(
+            "INSERT INTO courses VALUES "
+            "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                course_id,
+                facts["org"],
+                facts["course"],
+                facts["run"],
+                facts["display_name"],
+                facts["source"],
+                datetime.datetime.now().isoformat(timespec="seconds"),
+                details["chapters"]["num_chapters"],
+                details["chapters"]["num_highlights"],
+                problems["total"],
+                problems["ungated"],
+                problems["solutions"],
+                videos["num_videos"],
+                videos["youtube_videos"],
+                videos["num_downloadable_videos"],
+                videos["num_downloadable_transcripts"],
+                sum(videos["lengths"]),
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO components VALUES (?, ?, ?)",
+            [(course_id, c, n) for c, n in facts["component_count"].items()],
+        )
+        connection.executemany(
+            "INSERT INTO problem_types VALUES (?, ?, ?)",
+            [
+                (course_id, t, problems[t])
+                for t in problems
+                if t not in ["total", "ungated", "solutions"]
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO problems VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    course_id,
+                    p["url_name"],
+                    p["display_name"],
+                    p["response_types"],
+                    p["weight"],
+                    p["has_solution"],
+                    p["group_access"],
+                )
+                for p in facts["problem_rows"]
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO video_lengths VALUES (?, ?)",
+            [(course_id, s) for s in videos["lengths"]],
+        )
+        connection.executemany(
+            "INSERT INTO trouble VALUES (?, ?, ?)",
+            [
+                (course_id, kind, location)
+                for kind in details["trouble"]
+                for location in sorted(details["trouble"][kind])
+            ],
+        )
+
+
+def ingestExports(exports, filename, processes=None):
+    connection = openWarehouse(filename)
+    num_courses = 0
+    # Workers read the courses; only this process writes to the database.
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {pool.submit(scrapeCourse, e): e for e in exports}
+        for future in as_completed(futures):
+            try:
+                facts = future.result()
+            except Exception as err:
+                print("Could not read " + futures[future] + ": " + str(err))
+                continue
+            storeCourse(connection, facts)
+            num_courses += 1
+            print("Ingested " + facts["course_id"])
+    connection.close()
+    return num_courses
+
+
+def runQuery(query, filename):
+    connection = openWarehouse(filename)
+    if query in canned_queries:
+        query = canned_queries[query][1]
+    cursor = connection.execute(query)
+    print("\t".join(d[0] for d in cursor.description))
+    for row in cursor:
+        print("\t".join("" if x is None else str(x) for x in row))
+    connection.close()
+
+
+def CourseWarehouse(argv):
+    queries = "\n".join(
+        "  " + name.ljust(22) + canned_queries[name][0] for name in canned_queries
+    )
+
+    parser = argparse.ArgumentParser(
+        usage=instructions.format(queries=queries), add_help=False
+    )
+    parser.add_argument("command", nargs="?", default=None)
+    parser.add_argument("paths", nargs="*", default=[])
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-w", "--warehouse", default=warehouse_file)
+    parser.add_argument("-p", "--processes", type=int, default=None)
+
+    args = parser.parse_args()
+    if args.help or args.command not in ["ingest", "query"] or len(args.paths) == 0:
+        sys.exit(instructions.format(queries=queries))
+
+    if args.command == "ingest":
+        exports = findExports(args.paths)
+        if len(exports) == 0:
+            sys.exit("No course exports found.")
+        num_courses = ingestExports(exports, args.warehouse, args.processes)
+        print(
+            "Ingested "
+            + str(num_courses)
+            + " of "
+            + str(len(exports))
+            + " courses into "
+            + args.warehouse
+        )
+    else:
+        try:
+            runQuery(" ".join(args.paths), args.warehouse)
+        except sqlite3.Error as err:
+            sys.exit("Query failed: " + str(err))
+
+
+if __name__ == "__main__":
+    CourseWarehouse(sys.argv)
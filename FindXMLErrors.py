@@ -1,41 +1,182 @@
-# import XML libraries
-import xml.etree.ElementTree as ET
-import sys
 import os
+import sys
+import hashlib
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
 
 instructions = """
 To use:
 python3 FindXMLErrors.py path/to/folder -options
 
 Finds problems in XML files (like unmatched tags)
-and reports a possible locatino for them.
+and reports where they are, with the line and column
+and a bit of the file around them.
+
+Only checks .xml files, and skips the static/ folder,
+since that's full of images and such.
+
+Files that were fine last time and haven't changed since
+aren't checked again. We remember them by their contents,
+in ~/.hxxml/good_xml.txt. Only the last run is remembered,
+so the file doesn't keep growing.
 
 Options:
+  -p   How many files to check at once. Defaults to the number of CPUs.
+  -n   Ignore what we remember and check every file.
   -h   Print this message and exit
 
-Last update: February 13th 2020
+Last update: October 19th, 2026
 """
 
-parser = argparse.ArgumentParser(usage=instructions, add_help=False)
-parser.add_argument("-h", "--help", action="store_true")
-parser.add_argument("directory", default=".")
+cache_file = os.path.join(os.path.expanduser("~"), ".hxxml", "good_xml.txt")
+
+# Folders that don't hold any of the course's XML.
+skip_folders = ["static"]
+
+# How much of a long line to show on each side of an error.
+snippet_width = 40
+
+# Hashes of files that were fine last time. Each worker gets a copy.
+known_good = set()
+
+
+def setKnownGood(hashes):
+    global known_good
+    known_good = hashes
+
+
+def getHash(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+# Returns a list of (line, column, message) for everything
+# the parser complains about. Empty if the XML is fine.
+def getXMLErrors(data):
+    parser = etree.XMLParser(resolve_entities=False, no_network=True)
+    try:
+        etree.fromstring(data, parser)
+    except etree.XMLSyntaxError as e:
+        errors = [(x.line, x.column, x.message) for x in parser.error_log]
+        return errors or [(e.lineno, e.offset, e.msg)]
+    return []
+
+
+# The line with the error and a caret under the spot, trimmed if it's long.
+def getSnippet(data, line, column):
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    if line < 1 or line > len(lines):
+        return ""
+    text = lines[line - 1].expandtabs(1)
+    column = max(column, 1)
+    start = max(0, column - 1 - snippet_width)
+    text = text[start : column - 1 + snippet_width]
+    return text + "\n" + " " * (column - 1 - start) + "^"
+
+
+# Checks one file. Runs in a worker.
+# Returns the file's hash and its errors, with snippets.
+def checkFile(filepath):
+    with open(filepath, "rb") as f:
+        data = f.read()
+    digest = getHash(data)
+    if digest in known_good:
+        return digest, []
+    return digest, [
+        (line, column, message, getSnippet(data, line, column))
+        for line, column, message in getXMLErrors(data)
+    ]
+
+
+# Returns the parser's complaint about one file, or None if it's fine.
+def findXMLError(filepath):
+    with open(filepath, "rb") as f:
+        errors = getXMLErrors(f.read())
+    if len(errors) == 0:
+        return None
+    line, column, message = errors[0]
+    return "line " + str(line) + ", column " + str(column) + ": " + message
+
+
+def findXMLFiles(directory):
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = [d for d in dirnames if d not in skip_folders]
+        for eachfile in filenames:
+            if eachfile.lower().endswith(".xml"):
+                yield os.path.join(dirpath, eachfile)
+
+
+def loadCache(filename):
+    if not os.path.exists(filename):
+        return set()
+    with open(filename, "r") as f:
+        return set(line.strip() for line in f if line.strip())
+
+
+def saveCache(filename, hashes):
+    folder = os.path.dirname(os.path.abspath(filename))
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    with open(filename + ".tmp", "w") as f:
+        f.write("\n".join(sorted(hashes)) + "\n")
+    os.replace(filename + ".tmp", filename)
+
+
+def FindXMLErrors(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-p", "--processes", type=int, default=None)
+    parser.add_argument("-n", "--no-cache", action="store_true")
+    parser.add_argument("directory", nargs="?", default=".")
+
+    args = parser.parse_args()
+    if args.help:
+        sys.exit(instructions)
+
+    if not os.path.exists(args.directory):
+        sys.exit("Directory not found: " + args.directory)
+
+    good = loadCache(cache_file)
+    filepaths = list(findXMLFiles(args.directory))
+    num_bad = 0
+    new_good = set()
 
-args = parser.parse_args()
-if args.help:
-    sys.exit(instructions)
+    with ProcessPoolExecutor(
+        max_workers=args.processes,
+        initializer=setKnownGood,
+        initargs=(set() if args.no_cache else good,),
+    ) as pool:
+        results = pool.map(checkFile, filepaths, chunksize=64)
+        for filepath, (digest, errors) in zip(filepaths, results):
+            if len(errors) == 0:
+                new_good.add(digest)
+                continue
+            num_bad += 1
+            for line, column, message, _ in errors:
+                print(
+                    os.path.relpath(filepath, args.directory)
+                    + ":"
+                    + str(line)
+                    + ":"
+                    + str(column)
+                    + "  "
+                    + message
+                )
+            # Later errors usually follow from the first one, so show just that.
+            snippet = errors[0][3]
+            if snippet:
+                print("    " + snippet.replace("\n", "\n    "))
 
-if not os.path.exists(args.directory):
-    sys.exit("Directory not found: " + args.directory)
+    # Only what we saw this time, so old files don't pile up.
+    saveCache(cache_file, new_good)
+    print(
+        "Checked "
+        + str(len(filepaths))
+        + " files. "
+        + str(num_bad)
+        + (" has errors." if num_bad == 1 else " have errors.")
+    )
 
-numfiles = 0
 
-# Walk through the problems folder
-for dirpath, dirnames, filenames in os.walk(args.directory):
-    for eachfile in filenames:
-        # Get the XML for each file
-        try:
-            tree = ET.parse(os.path.join(dirpath, eachfile))
-            root = tree.getroot()
-        except ET.ParseError as e:
-            print(eachfile + "  " + str(e))
+if __name__ == "__main__":
+    FindXMLErrors(sys.argv)
@@ -2,14 +2,20 @@ import os
 import re
 import sys
 import json
-import random
 import shutil
+import hashlib
 import tarfile
 import argparse
 import datetime
+from array import array
 from statistics import median
 from collections import OrderedDict
 from xml.etree import ElementTree as ET
+from RenameComponents import makeRenameMap, renameComponents
+from RewriteAttributes import rewriteFile
+from ProblemIndex import indexProblems, problem_types
+from VideoInventory import buildInventory, getKnownDurations, rollupInventory
+from WriteJournal import startJournal, recordFile, writeFile, moveFile, removeFile
 
 instructions = """
 To use:
@@ -20,8 +26,19 @@ named coursefile.new.tar.gz , with hardcoded links, folders, and filenames
 updated for the new run. Automatically prompts for new date and run, but
 you can feed it a file with -f below.
 
+Every other date in the course (section and subsection releases, due dates,
+ORA deadlines, enrollment dates) is moved by the same amount as the course start.
+Placeholder dates (2001 and earlier, 2099 and later) are left alone.
+
 Auto-copies files from script_directory/file_replacements/ into
-the /static/ folder, overwriting any existing versions.
+the /static/ folder, overwriting any existing versions. Files that are
+already identical are left alone. Replacements are kept in a local store
+(~/.hxxml/file_store/) and hardlinked into the course where possible.
+
+Instead of backing up the whole tarball, every file that gets changed is
+recorded in a journal (course_journal/). To undo the changes, run
+  python3 WriteJournal.py rollback path/to/course
+An existing course/ folder is renamed to course_previous/ first.
 
 Options:
   -f  Specify a JSON settings file using -f=filename. Overrides other flags.
@@ -30,6 +47,7 @@ Options:
 Last update: Feb 22nd, 2022
 """
 
+
 ######################
 # Utility Functions
 ######################
@@ -43,14 +61,6 @@ def findDictInList(lst, key, value):
     return -1
 
 
-# 32-character randomized hexadecimal
-def getNewEdxFilename():
-    f = ""
-    for x in range(0, 32):
-        f = f + (hex(random.randint(0, 15))[2])
-    return f
-
-
 def edxDateToPython(date_string):
     # date_string is in edx's format: 2030-01-01T00:00:00+00:00
     # sometimes ends with a Z instead of +whatever
@@ -160,6 +170,7 @@ def setUpDetails(args):
             "old_start_edx": "",
             "old_end_edx": "",
             "date_delta": "",
+            "shifted": [],  # Every date we moved, and where.
         },
         "chapters": {"num_chapters": 0, "num_highlights": 0},
         "verticals": {"component_count": OrderedDict()},
@@ -179,14 +190,14 @@ def setUpDetails(args):
         "videos": {
             "num_videos": 0,
             "youtube_videos": 0,
-            "num_videos": 0,
             "num_downloadable_videos": 0,
             "num_downloadable_transcripts": 0,
-            "lengths": [],
+            "lengths": array("d"),  # Replaced, not appended to. Lengths repeat.
             "max_length": "",
             "median_length": "",
             "min_length": "",
             "total_length": "",
+            "by_section": OrderedDict(),  # Section url_name: video totals
         },
     }
     return details
@@ -283,13 +294,12 @@ def updateTabs(details):
     # Regardless, make the current FAQ page a link to our iframed page.
     run["faq_page"] = "added"
     if new_faq_exists:
-        shutil.move(new_faq_file, bak_faq_file)
+        moveFile(new_faq_file, bak_faq_file)
         run["faq_page"] = "updated"
     elif old_faq_exists:
-        shutil.move(old_faq_file, bak_faq_file)
+        moveFile(old_faq_file, bak_faq_file)
         run["faq_page"] = "updated"
-    with open(new_faq_file, "w") as f:
-        f.write(faq_text)
+    writeFile(new_faq_file, faq_text)
 
     # If we need to add the new and backup faqs to the policy file, do that here.
     has_new_faq = (
@@ -303,8 +313,7 @@ def updateTabs(details):
         data[runpath]["tabs"].append(new_faq_tab)
     if not has_backup_faq:
         data[runpath]["tabs"].append(bak_faq_tab)
-        with open(bak_faq_file, "w") as f:
-            f.write(faq_text)
+        writeFile(bak_faq_file, faq_text)
     # No need to add tab for old FAQ; that's where we found it in the first place.
     # Just change the visibility.
     if old_faq_exists:
@@ -313,8 +322,7 @@ def updateTabs(details):
         run["faq_page"] = "updated"
 
     # Write the policy file and close.
-    with open(policy_file, "w") as policy:
-        policy.write(json.dumps(data, indent=4))
+    writeFile(policy_file, json.dumps(data, indent=4))
 
     details = updateDetails(run, "run", details)
     return details
@@ -328,40 +336,34 @@ def handleBaseFiles(details):
     pathname = run["pathname"]
     date = details["dates"]
 
-    # Open the course root file
-    root_file = os.path.join(pathname, "course", "course.xml")
-    root_tree = ET.parse(root_file)
-    root_root = root_tree.getroot()
-
-    # Get course ID
-    course_id = root_root.attrib.get("course", "unknown")
+    # Open the course root file.
     # Change the /course.xml file to point to the new run.
-    run["old"] = root_root.attrib.get("url_name", "unknown")
-    run["course_nickname"] = root_root.attrib.get("course", "unknown")
-    root_root.set("url_name", run["new"])
+    # Only the attributes we set are rewritten; the rest of each file stays as-is.
+    def updateRoot(tag, attributes, depth):
+        if depth == 0:
+            run["old"] = attributes.get("url_name", "unknown")
+            run["course_nickname"] = attributes.get("course", "unknown")
+            return {"url_name": run["new"]}
 
-    # Close and write course root.
-    root_tree.write(root_file, encoding="UTF-8", xml_declaration=False)
+    root_file = os.path.join(pathname, "course", "course.xml")
+    rewriteFile(root_file, updateRoot)
 
     # Rename the course/course_run.xml file
     run_file = os.path.join(pathname, "course", "course", run["old"] + ".xml")
     new_runfile = os.path.join(pathname, "course", "course", run["new"] + ".xml")
-    os.rename(run_file, new_runfile)
+    moveFile(run_file, new_runfile)
 
     # Open the course/course_run.xml file.
-    tree = ET.parse(new_runfile)
-    root = tree.getroot()
-    # Get the old start date. We'll need it to update the ORAs later.
-    date["old_start_edx"] = root.attrib["start"]
-    # Set the start and end dates in xml attributes
-    root.set("start", date["new_start_edx"])
-    root.set("end", date["new_end_edx"])
+    def updateRun(tag, attributes, depth):
+        if depth == 0:
+            # Get the old start date. We'll need it to shift the other dates later.
+            date["old_start_edx"] = attributes["start"]
+            if attributes.get("self_paced", False) == "true":
+                run["pacing"] = "self-paced"
+            # Set the start and end dates in xml attributes
+            return {"start": date["new_start_edx"], "end": date["new_end_edx"]}
 
-    if root.attrib.get("self_paced", False) == "true":
-        run["pacing"] = "self-paced"
-
-    # Write that file, done with it.
-    tree.write(run_file, encoding="UTF-8", xml_declaration=False)
+    rewriteFile(new_runfile, updateRun)
 
     # Convert old_start_date to a Python datetime object for later manipulation
     date["old_start_py"] = edxDateToPython(date["old_start_edx"])
@@ -386,9 +388,9 @@ def handlePolicies(details):
         oldfolder = os.path.join(pathname, "course", "policies", run["old"])
         newfolder = os.path.join(pathname, "course", "policies", run["new"])
         if os.path.exists(newfolder):
-            shutil.rmtree(newfolder)
+            removeFile(newfolder)
         if os.path.exists(oldfolder):
-            os.rename(oldfolder, newfolder)
+            moveFile(oldfolder, newfolder)
         else:
             sys.exit("Cannot find policies/" + run["old"] + " folder.")
 
@@ -419,15 +421,149 @@ def handlePolicies(details):
         # print(run["lti_passports"])
         run["display_name"] = data[runpath]["display_name"]
 
-    with open(
-        os.path.join(pathname, "course", "policies", run["new"], "policy.json"), "w"
-    ) as policy_file:
-        policy_file.write(json.dumps(data, indent=4))
+    writeFile(
+        os.path.join(pathname, "course", "policies", run["new"], "policy.json"),
+        json.dumps(data, indent=4),
+    )
 
     details = updateDetails(run, "run", details)
     return details
 
 
+################################
+# Date shifting
+# Moves every date in the course by the same amount as the course start,
+# so that deadlines and release dates keep their place in the schedule.
+################################
+
+# XML attributes that hold dates, on any tag.
+date_attributes = ["start", "due", "end", "submission_start", "submission_due"]
+# Dates on the course/course_run.xml file and in policy.json.
+# The course start and end are set directly in handleBaseFiles and handlePolicies.
+course_date_attributes = [
+    "enrollment_start",
+    "enrollment_end",
+    "announcement",
+    "certificate_available_date",
+]
+# Folders with no dates to shift, or that we handle separately.
+date_skip_folders = ["static", "course", "policies", "about", "info", "assets"]
+
+# edX dates look like 2030-01-01T00:00:00+00:00, sometimes with a Z instead,
+# and sometimes wrapped in an extra set of quotes inside XML attributes.
+edx_date_regex = re.compile(
+    r"""^(["']?)(\d{4})-(\d{1,2})-(\d{1,2})T(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?"""
+    r"""(\.\d+)?(Z|[+-]\d{2}:?\d{2})?\1$"""
+)
+
+
+# Returns the shifted date in the same style as the original,
+# or False if this isn't a date we should move.
+def shiftDate(date_string, delta):
+    match = edx_date_regex.match(date_string.strip())
+    if not match:
+        return False
+    quote, year, month, day, hour, minute, second, fraction, zone = match.groups()
+    # Python only keeps microseconds, so pad or trim the fraction to six digits.
+    digits = fraction[1:] if fraction else ""
+    moment = datetime.datetime(
+        int(year),
+        int(month),
+        int(day),
+        int(hour),
+        int(minute),
+        int(second or 0),
+        int((digits + "000000")[:6]),
+    )
+    # Very early and very late dates are placeholders for "always" and "never".
+    if moment.year <= 2001 or moment.year >= 2099:
+        return False
+    moment = moment + delta
+    new_date = moment.strftime("%Y-%m-%dT%H:%M")
+    # Only write the seconds and fraction if the original had them.
+    if second is not None:
+        new_date += moment.strftime(":%S")
+    if fraction:
+        microseconds = str(moment.microsecond).zfill(6).ljust(len(digits), "0")
+        new_date += "." + microseconds[: len(digits)]
+    return quote + new_date + (zone or "") + quote
+
+
+# Shifts the given date attributes on every tag in a file.
+# Only the dates change; the rest of the file stays as-is.
+def shiftAttributes(filepath, attributes, delta, location, shifted):
+    def shiftTag(tag, atts, depth):
+        changes = {}
+        for att in attributes:
+            if att not in atts:
+                continue
+            new_date = shiftDate(atts[att], delta)
+            if new_date:
+                shifted.append(
+                    location
+                    + " "
+                    + tag
+                    + " "
+                    + att
+                    + ": "
+                    + atts[att]
+                    + " -> "
+                    + new_date
+                )
+                changes[att] = new_date
+        return changes
+
+    rewriteFile(filepath, shiftTag)
+
+
+def shiftDates(details):
+    run = details["run"]
+    dates = details["dates"]
+    delta = dates["date_delta"]
+    course_folder = os.path.join(run["pathname"], "course")
+    shifted = []
+
+    if delta == "" or delta == datetime.timedelta(0):
+        return details
+
+    # Every XML file in the course structure, including drafts.
+    # Each one is read once and written once, only if something moved.
+    for dirpath, dirnames, filenames in os.walk(course_folder):
+        if dirpath == course_folder:
+            dirnames[:] = [d for d in dirnames if d not in date_skip_folders]
+        for eachfile in filenames:
+            if not eachfile.endswith(".xml"):
+                continue
+            filepath = os.path.join(dirpath, eachfile)
+            location = os.path.relpath(filepath, course_folder)
+            shiftAttributes(filepath, date_attributes, delta, location, shifted)
+
+    # Enrollment and certificate dates on the course itself.
+    run_file = os.path.join(course_folder, "course", run["new"] + ".xml")
+    location = os.path.relpath(run_file, course_folder)
+    shiftAttributes(run_file, course_date_attributes, delta, location, shifted)
+
+    # Same dates in policy.json
+    policy_file = os.path.join(course_folder, "policies", run["new"], "policy.json")
+    with open(policy_file, "r") as policy:
+        data = json.load(policy)
+    policy_changed = False
+    for field in course_date_attributes:
+        value = data["course/" + run["new"]].get(field, None)
+        if type(value) != str:
+            continue
+        new_date = shiftDate(value, delta)
+        if new_date:
+            shifted.append("policy.json " + field + ": " + value + " -> " + new_date)
+            data["course/" + run["new"]][field] = new_date
+            policy_changed = True
+    if policy_changed:
+        writeFile(policy_file, json.dumps(data, indent=4))
+
+    dates["shifted"] = shifted
+    return details
+
+
 ################################
 # Chapter scraping
 ################################
@@ -457,59 +593,31 @@ def scrapeChapters(details):
 
 ################################
 # Open Response Assessments
-# Shift deadlines and upgrade editor type
+# Upgrade editor type. Deadlines are moved by shiftDates.
 ################################
-def updateORA(child, tree, dirpath, eachfile, details):
+def updateORA(filepath):
     # TODO: If there are no child elements (sigh), dig into the url_name.
 
     # Use rich text editor. It has fewer input sanitization issues.
-    child.attrib["text_response_editor"] = "tinymce"
+    def setEditor(tag, attributes, depth):
+        if tag == "openassessment":
+            return {"text_response_editor": "tinymce"}
 
-    # Shift deadlines for ORAs to match new start date.
-    course_start = details["dates"]["new_start_edx"]
-    course_end = details["dates"]["new_end_edx"]
-    submission_end = pythonDateToEdx(
-        details["dates"]["new_end_py"] - datetime.timedelta(7)
-    )
-
-    # Submissions start at course start and are due a week before course end.
-    child.attrib["submission_start"] = course_start
-    child.attrib["submission_due"] = submission_end
-
-    # Reviews start at course start and are due at course end.
-    # Look for <assessment name="peer-assessment" ...>
-    # Assume there's only one peer-assessment tag, maybe none.
-    peer_grading = child.findall(".//assessment[@name='peer-assessment']")
-    if len(peer_grading) > 0:
-        peer_grading[0].attrib["start"] = course_start
-        peer_grading[0].attrib["due"] = course_end
-
-    # Same for self-grading components
-    s_grading = child.findall(".//assessment[@name='self-assessment']")
-    if len(s_grading) > 0:
-        s_grading[0].attrib["start"] = course_start
-        s_grading[0].attrib["due"] = course_end
-
-    # Close and write file.
-    tree.write(
-        os.path.join(dirpath, eachfile),
-        encoding="UTF-8",
-        xml_declaration=False,
-    )
+    rewriteFile(filepath, setEditor)
 
 
 ################################
 # Vertical scraping
 ################################
-def scrapeVerticals(details):
-
-    # Count the number of all the component types in the course.
-    # Especially need: ORA, LTI, discussion
+# Count the number of all the component types in the course.
+# Especially need: ORA, LTI, discussion
+# Returns the counts and the vertical files that have ORAs in them.
+def countComponents(course_folder):
     component_count = {}
-    need_to_save = False
+    ora_files = []
     # Open everything in the vertical/ folder
     for dirpath, dirnames, filenames in os.walk(
-        os.path.join(details["run"]["pathname"], "course", "vertical")
+        os.path.join(course_folder, "vertical")
     ):
         for eachfile in filenames:
 
@@ -524,29 +632,26 @@ def scrapeVerticals(details):
                 else:
                     component_count[child.tag] = 1
 
-                if child.tag == "openassessment":
-                    updateORA(child, tree, dirpath, eachfile, details)
+            if root.find("openassessment") is not None:
+                ora_files.append(os.path.join(dirpath, eachfile))
 
-                # Create new LTI components
-                # so that the unique component ID passed to LTI providers changes
-                if child.tag == "lti":
-                    new_lti_filename = getNewEdxFilename()
-                    new_lti_file = os.path.join(
-                        dirpath, "..", "lti", new_lti_filename + ".xml"
-                    )
-                    old_lti_file = os.path.join(
-                        dirpath, "..", "lti", child.attrib["url_name"] + ".xml"
-                    )
-                    shutil.move(old_lti_file, new_lti_file)
-                    child.attrib["url_name"] = new_lti_filename
-                    need_to_save = True
-
-            if need_to_save:
-                tree.write(
-                    os.path.join(dirpath, eachfile),
-                    encoding="UTF-8",
-                    xml_declaration=False,
-                )
+    return component_count, ora_files
+
+
+def scrapeVerticals(details):
+
+    course_folder = os.path.join(details["run"]["pathname"], "course")
+    component_count, ora_files = countComponents(course_folder)
+
+    for ora_file in ora_files:
+        updateORA(ora_file)
+
+    # Create new LTI components
+    # so that the unique component ID passed to LTI providers changes.
+    # All of them get renamed and re-linked in one pass.
+    renameComponents(
+        course_folder, makeRenameMap(course_folder, ["lti", "lti_consumer"])
+    )
 
     # Alphabetizing
     component_count_sorted = OrderedDict(sorted(component_count.items()))
@@ -563,54 +668,34 @@ def scrapeVideos(details):
     # TODO: Remove all references to YouTube in our videos.
     # What % of videos are downloadable?
 
+    # Every video is read once, into the shared video inventory.
+    inventory = buildInventory(os.path.join(details["run"]["pathname"], "course"))
+    lengths = getKnownDurations(inventory)
+
     videos = {
-        "num_videos": 0,
-        "youtube_videos": 0,
-        "num_videos": 0,
-        "num_downloadable_videos": 0,
-        "num_downloadable_transcripts": 0,
-        "lengths": [],
+        "num_videos": len(inventory["url_name"]),
+        "youtube_videos": sum(inventory["youtube"]),
+        "num_downloadable_videos": inventory["download_video"].count(1),
+        "num_downloadable_transcripts": inventory["download_track"].count(1),
+        "lengths": lengths,
         "max_length": "",
         "median_length": "",
         "min_length": "",
         "total_length": "",
+        "by_section": OrderedDict(),
     }
-    # Open everything in the video/ folder
-    for dirpath, dirnames, filenames in os.walk(
-        os.path.join(details["run"]["pathname"], "course", "video")
-    ):
-        for eachfile in filenames:
 
-            # Get the XML for each file
-            tree = ET.parse(os.path.join(dirpath, eachfile))
-            root = tree.getroot()
-
-            if root.attrib.get("youtube_id_1_0", False):
-                if root.attrib["youtube_id_1_0"] != "":
-                    videos["youtube_videos"] += 1
-            if root.attrib.get("download_video", False):
-                if root.attrib["download_video"] == "true":
-                    videos["num_downloadable_videos"] += 1
-            if root.attrib.get("download_track", False):
-                if root.attrib["download_track"] == "true":
-                    videos["num_downloadable_transcripts"] += 1
-
-            # Getting video durations
-            asset_tag = root.find("video_asset")
-            if asset_tag is not None:
-                if asset_tag.attrib.get("duration", False):
-                    videos["lengths"].append(float(asset_tag.attrib["duration"]))
-
-            videos["num_videos"] += 1
-
-    if len(videos["lengths"]) > 0:
-        videos["max_length"] = secondsToHMS(max(videos["lengths"]))
-        videos["median_length"] = secondsToHMS(median(videos["lengths"]))
-        videos["min_length"] = secondsToHMS(min(videos["lengths"]))
-        videos["total_length"] = secondsToHMS(sum(videos["lengths"]))
+    if len(lengths) > 0:
+        videos["max_length"] = secondsToHMS(max(lengths))
+        videos["median_length"] = secondsToHMS(median(lengths))
+        videos["min_length"] = secondsToHMS(min(lengths))
+        videos["total_length"] = secondsToHMS(sum(lengths))
     else:
         videos["total_length"] = "Unknown. Course uses old-style video tags."
 
+    for row in rollupInventory(inventory, "chapter"):
+        videos["by_section"][row["url_name"]] = row
+
     details = updateDetails(videos, "videos", details)
     return details
 
@@ -623,67 +708,32 @@ def scrapeProblems(details):
     # Count the number of problems of each assignment type
     # What % of content is gated?
     problems = {"total": 0, "ungated": 0, "solutions": 0}
-    num_solutions = 0
-    problem_types = [
-        "choiceresponse",
-        "customresponse",
-        "optionresponse",
-        "numericalresponse",
-        "multiplechoiceresponse",
-        "stringresponse",
-        "formularesponse",
-    ]
-    problem_type_count = {
-        "choiceresponse": 0,
-        "customresponse": 0,
-        "optionresponse": 0,
-        "numericalresponse": 0,
-        "multiplechoiceresponse": 0,
-        "stringresponse": 0,
-        "formularesponse": 0,
-        "compound": 0,
-    }
+    problem_type_count = {t: 0 for t in problem_types}
+    problem_type_count["compound"] = 0
     trouble = {"no_solution": []}
 
-    # Open everything in the problem/ folder
-    for dirpath, dirnames, filenames in os.walk(
-        os.path.join(details["run"]["pathname"], "course", "problem")
-    ):
-        for eachfile in filenames:
+    # Each problem is read once, by the shared problem index.
+    index = indexProblems(os.path.join(details["run"]["pathname"], "course", "problem"))
+    for filepath in index:
+        features = index[filepath]
 
-            # Get the XML for each file
-            tree = ET.parse(os.path.join(dirpath, eachfile))
-            root = tree.getroot()
+        # Is this problem outside the paywall?
+        if features["ungated"]:
+            problems["ungated"] += 1
 
-            # Is this problem outside the paywall?
-            if root.attrib.get("group_access", False):
-                if root.attrib["group_access"] == "{&quot;51&quot;: [1, 2]}":
-                    problems["ungated"] += 1
-
-            # What type of problem is this?
-            p_tags = 0
-            for t in problem_types:
-                check_type = root.iter(t)
-                for c in check_type:
-                    problem_type_count[t] = problem_type_count[t] + 1
-                    p_tags += 1
-            if p_tags > 1:
-                problem_type_count["compound"] = problem_type_count["compound"] + 1
-
-            # Does this problem have a non-empty solution?
-            solutions = root.iter("solution")
-            solution_texts = [ET.tostring(x, method="text") for x in solutions]
-            non_empty_solutions = [len(x) for x in solution_texts]
-            if sum(non_empty_solutions) > 0:
-                problems["solutions"] += 1
-            else:
-                trouble["no_solution"].append("problem/" + eachfile)
-
-            problems["total"] += 1
-
-    num_problem_tags = 0
-    for t in problem_type_count:
-        num_problem_tags += problem_type_count[t]
+        # What type of problem is this?
+        for t in features["response_types"]:
+            problem_type_count[t] += 1
+        if len(features["response_types"]) > 1:
+            problem_type_count["compound"] += 1
+
+        # Does this problem have a non-empty solution?
+        if features["has_solution"]:
+            problems["solutions"] += 1
+        else:
+            trouble["no_solution"].append("problem/" + os.path.basename(filepath))
+
+        problems["total"] += 1
 
     details = updateDetails(problem_type_count, "problems", details)
     details = updateDetails(problems, "problems", details)
@@ -694,7 +744,8 @@ def scrapeProblems(details):
 ################################
 # HTML and Tab Scraping
 ################################
-def scrapePage(folder, filename, details):
+# Checks the text of one page for things we'll need to fix by hand.
+def findTrouble(txt, location):
     trouble = {
         "iframes": [],
         "flash_links": [],
@@ -702,29 +753,36 @@ def scrapePage(folder, filename, details):
         "top_tab_js": [],
         "youtube_links": [],
     }
+
+    if "<iframe" in txt:
+        trouble["iframes"].append(location)
+    if "youtube.com" in txt or "youtu.be" in txt:
+        trouble["youtube_links"].append(location)
+    if ".swf" in txt:
+        trouble["flash_links"].append(location)
+    if "/discusison/forum" in txt:
+        trouble["discussion_links"].append(location)
+    if (
+        "$('.navbar')" in txt
+        or "$('.course-tabs')" in txt
+        or "$('.navbar-nav')" in txt
+        or '$(".navbar")' in txt  # double OR single quotes
+        or '$(".course-tabs")' in txt
+        or '$(".navbar-nav")' in txt
+    ):
+        trouble["top_tab_js"].append(location)
+
+    return trouble
+
+
+def scrapePage(folder, filename, details):
     run = details["run"]
 
     # Get the whole-file text so we can search it:
     with open(os.path.join(folder, filename), mode="r") as f:
         txt = f.read()
 
-        if "<iframe" in txt:
-            trouble["iframes"].append(folder + "/" + filename)
-        if "youtube.com" in txt or "youtu.be" in txt:
-            trouble["youtube_links"].append(folder + "/" + filename)
-        if ".swf" in txt:
-            trouble["flash_links"].append(folder + "/" + filename)
-        if "/discusison/forum" in txt:
-            trouble["discussion_links"].append(folder + "/" + filename)
-        if (
-            "$('.navbar')" in txt
-            or "$('.course-tabs')" in txt
-            or "$('.navbar-nav')" in txt
-            or '$(".navbar")' in txt  # double OR single quotes
-            or '$(".course-tabs")' in txt
-            or '$(".navbar-nav")' in txt
-        ):
-            trouble["top_tab_js"].append(folder + "/" + filename)
+        trouble = findTrouble(txt, folder + "/" + filename)
 
         # Find all instances of course_run in links in XML and HTML files,
         # and replace them with the new one. Only write file if it changed.
@@ -775,14 +833,86 @@ def scrapeFolder(folder, details):
             det, txt = scrapePage(dirpath, eachfile, details)
 
             if txt != False:
-                with open(
-                    os.path.join(pathname, "course", folder, eachfile), mode="w"
-                ) as file_contents:
-                    file_contents.write(txt)
+                writeFile(os.path.join(pathname, "course", folder, eachfile), txt)
 
             return det
 
 
+################################
+# Content-addressed store for replacement files.
+# Each file is kept once, named by its hash, and hardlinked
+# into as many extracted courses as we like.
+################################
+store_folder = os.path.join(os.path.expanduser("~"), ".hxxml", "file_store")
+
+
+def getFileHash(filepath):
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# Puts a file into the store if it isn't there already.
+# Returns the path to the stored copy and the file's hash.
+def addToStore(filepath):
+    file_hash = getFileHash(filepath)
+    stored_file = os.path.join(store_folder, file_hash[:2], file_hash)
+    # If something wrote into a linked copy, the stored file is damaged. Replace it.
+    if os.path.exists(stored_file):
+        if os.path.getsize(stored_file) != os.path.getsize(filepath):
+            os.remove(stored_file)
+    if not os.path.exists(stored_file):
+        os.makedirs(os.path.dirname(stored_file), exist_ok=True)
+        # Copy under a temporary name so a half-written file never looks valid.
+        shutil.copy2(filepath, stored_file + ".tmp")
+        os.replace(stored_file + ".tmp", stored_file)
+    return stored_file, file_hash
+
+
+# Puts a stored file at the target location.
+# Returns False if the target was already identical, True if we changed it.
+def placeFromStore(stored_file, file_hash, target):
+    if os.path.exists(target):
+        if os.path.samefile(stored_file, target):
+            return False
+        # Only hash the target if the size matches. Cheap check first.
+        if os.path.getsize(target) == os.path.getsize(stored_file):
+            if getFileHash(target) == file_hash:
+                return False
+    recordFile(target)
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(stored_file, target)
+    except OSError:
+        # Different drive or a filesystem without hardlinks.
+        shutil.copy2(stored_file, target)
+    return True
+
+
+# Copies everything in the replacement folder into the static/ folder
+# of each course folder. Each replacement file is hashed only once.
+# Returns a dict of course folder: list of files that changed.
+def replaceFilesInCourses(course_folders, replacement_folder):
+    replaced = {c: [] for c in course_folders}
+    if not os.path.exists(replacement_folder):
+        return replaced
+
+    for dirpath, dirnames, filenames in os.walk(replacement_folder):
+        for f in filenames:
+            stored_file, file_hash = addToStore(os.path.join(dirpath, f))
+            for course_folder in course_folders:
+                static_folder = os.path.join(course_folder, "static")
+                os.makedirs(static_folder, exist_ok=True)
+                target = os.path.join(static_folder, f)
+                if placeFromStore(stored_file, file_hash, target):
+                    replaced[course_folder].append(f)
+
+    return replaced
+
+
 ################################
 # Take anything in the file_replacements folder
 # and overwrite what's in Files & Uploads with them.
@@ -791,16 +921,11 @@ def scrapeFolder(folder, details):
 ################################
 def replaceFiles(details):
     trouble = details["trouble"]
-    # Open the replacement folder and step through all the files.
+    course_folder = os.path.join(details["run"]["pathname"], "course")
     replacement_folder = os.path.join(sys.path[0], "file_replacements")
-    if os.path.exists(replacement_folder):
-        for dirpath, dirnames, filenames in os.walk(replacement_folder):
-            for f in filenames:
-                shutil.copy2(
-                    os.path.join(dirpath, f),
-                    os.path.join(details["run"]["pathname"], "course", "static", f),
-                )
-                trouble["replaced_files"].append(f)
+
+    replaced = replaceFilesInCourses([course_folder], replacement_folder)
+    trouble["replaced_files"].extend(replaced[course_folder])
 
     details = updateDetails(trouble, "trouble", details)
     return details
@@ -841,6 +966,14 @@ def createSummary(details):
         if dates["new_end_py"] < datetime.datetime.now():
             txt += "WARNING: course ends in the past\n"
         txt += "Pacing: " + run["pacing"] + "\n"
+        if len(dates["shifted"]) > 0:
+            txt += (
+                "Shifted "
+                + str(len(dates["shifted"]))
+                + " other dates by "
+                + str(dates["date_delta"])
+                + "\n"
+            )
         txt += "\n"
         txt += "Number of sections: " + str(details["chapters"]["num_chapters"]) + "\n"
         txt += (
@@ -868,6 +1001,20 @@ def createSummary(details):
             + videos["min_length"]
             + "\n"
         )
+        if len(videos["by_section"]) > 0:
+            txt += "  Minutes of video by section:\n"
+            for section in videos["by_section"]:
+                txt += (
+                    "    "
+                    + spaceOut(
+                        str(round(videos["by_section"][section]["seconds"] / 60, 1)),
+                        6,
+                        "right",
+                    )
+                    + " "
+                    + videos["by_section"][section]["display_name"]
+                    + "\n"
+                )
         txt += "\n"
         txt += "Component Count:\n"
 
@@ -932,6 +1079,11 @@ def createSummary(details):
                 for l in trouble[troub]:
                     txt += str(l) + "\n"
 
+        if len(dates["shifted"]) > 0:
+            txt += "\nDates shifted:\n"
+            for l in dates["shifted"]:
+                txt += l + "\n"
+
         txt += "\n"
         txt += "Related Courses page must be replaced by hand.\n"
         if run["faq_page"] == "":
@@ -1035,18 +1187,30 @@ def MakeNewRun(argv):
 
     args = getCommandLineArgs(argv)
 
-    # Make a copy of the tarball for backup purposes
-    shutil.copy2(args.tarfile, args.tarfile[:-7] + "_backup.tar.gz")
+    # If there's an existing course/ folder, rename it.
+    # Otherwise we'll be extracting the tarfile on top of it.
+    course_folder = os.path.join(args.pathname, "course")
+    if os.path.exists(os.path.join(args.pathname, "course_previous")):
+        print("Deleting existing course_previous/ folder.")
+        shutil.rmtree(os.path.join(args.pathname, "course_previous"))
+    if os.path.exists(course_folder):
+        print("Renaming existing course/ folder to course_previous/")
+        os.rename(course_folder, os.path.join(args.pathname, "course_previous"))
 
     # Extract the tarball.
     tar = tarfile.open(args.tarfile)
     tar.extractall(args.pathname)
     tar.close()
 
+    # Instead of backing up the whole tarball, keep a journal of
+    # just the files we change. WriteJournal.py can roll them back.
+    startJournal(course_folder)
+
     details = setUpDetails(args)
 
     details = handleBaseFiles(details)
     details = handlePolicies(details)
+    details = shiftDates(details)
 
     details = scrapeChapters(details)
     details = scrapeVerticals(details)
@@ -1066,16 +1230,13 @@ def MakeNewRun(argv):
     # Re-tar
     # TODO: Is there a good way to remove the ._ files first?
     print("Creating tar.gz file... ")
-    with tarfile.open(
-        os.path.join(
-            details["run"]["pathname"],
-            details["run"]["course_nickname"]
-            + "_"
-            + details["run"]["new"]
-            + ".new.tar.gz",
-        ),
-        "w:gz",
-    ) as tar:
+    new_tarball = os.path.join(
+        details["run"]["pathname"],
+        details["run"]["course_nickname"] + "_" + details["run"]["new"] + ".new.tar.gz",
+    )
+    # Build it under a temporary name so a failure never leaves half a tarball.
+    recordFile(new_tarball)
+    with tarfile.open(new_tarball + ".tmp", "w:gz") as tar:
         tar.add(
             # TODO: If the folder isn't named course/, make sure to fix here.
             os.path.join(details["run"]["pathname"], "course"),
@@ -1083,7 +1244,12 @@ def MakeNewRun(argv):
                 os.path.join(details["run"]["pathname"], "course")
             ),
         )
+    os.replace(new_tarball + ".tmp", new_tarball)
     print("Done.")
+    print(
+        "To undo the changes to the course folder, run: python3 WriteJournal.py rollback "
+        + course_folder
+    )
 
 
 if __name__ == "__main__":
@@ -19,11 +19,80 @@ to do XML things.
 """
 
 
+# Components that get their own location comment.
+leaf_nodes = ["html", "problem", "video", "poll"]
+
+
+# How many files we actually had to change.
+files_changed = 0
+
+
+# Builds the text of the location comment for a file with this root tag.
+def makeLocationComment(tag, parentage):
+    location_comment = "LOCATION: "
+    if tag in ["chapter", "sequential", "vertical"] or tag in leaf_nodes:
+        location_comment = location_comment + "\n    Section: " + parentage["section"]
+    if tag in ["sequential", "vertical"] or tag in leaf_nodes:
+        location_comment = (
+            location_comment + "\n    Subsection: " + parentage["subsection"]
+        )
+    if tag in ["vertical"] or tag in leaf_nodes:
+        location_comment = location_comment + "\n    Unit: " + parentage["page"]
+    if tag in leaf_nodes:
+        location_comment = (
+            location_comment + "\n    Component: " + parentage["component"]
+        )
+    return location_comment
+
+
+# Makes sure this is the location comment at the top of the tree.
+# Only looks at the comments before the first real tag, since that's
+# where we put them. Returns True if the tree changed.
+def addLocationComment(tree, location_comment):
+    root = tree.getroot()
+
+    leading = []
+    for child in root:
+        if not isinstance(child, ET._Comment):
+            break
+        if "LOCATION: " in (child.text or ""):
+            leading.append(child)
+
+    # Already right? Leave it alone.
+    if len(leading) == 1 and leading[0].text == location_comment:
+        return False
+
+    # Remove any existing "LOCATION" XML comments.
+    for comment in leading:
+        root.remove(comment)
+
+    c = ET.Comment(location_comment)
+    c.tail = "\n"
+    root.insert(0, c)
+    return True
+
+
+# Opens one file and sets its location comment.
+# Only saves the file if the comment changed. Returns True if it did.
+def writeLocationComment(filepath, location_comment, tree=None):
+    global files_changed
+    if tree is None:
+        tree = ET.parse(filepath)
+    if not addLocationComment(tree, location_comment):
+        return False
+    tree.write(
+        filepath,
+        encoding="utf-8",
+        xml_declaration=False,
+        pretty_print=True,
+    )
+    files_changed += 1
+    return True
+
+
 # Recursion function for outline-declared xml files
 def drillDown(folder, filename, root, parentage, args):
 
-    leaf_nodes = ["html", "problem", "video", "poll"]
-
     # Try to open file.
     try:
         tree = ET.parse(os.path.join(folder, (filename + ".xml")))
@@ -42,31 +111,11 @@ def drillDown(folder, filename, root, parentage, args):
 
     XMLInfo = getXMLInfo(folder, root, parentage, args)
 
-    # Remove any existing "LOCATION" XML comments.
-    for comment in root.xpath("//comment()"):
-        if "LOCATION: " in comment.text:
-            comment.getparent().remove(comment)
-
     # Add location comments to every container and some specific leaf nodes.
-    location_comment = "LOCATION: "
-    if root.tag in ["section", "sequential", "vertical"] or root.tag in leaf_nodes:
-        location_comment = location_comment + "\n    Section: " + parentage["section"]
-    if root.tag in ["sequential", "vertical"] or root.tag in leaf_nodes:
-        location_comment = (location_comment + "\n    Subsection: " + parentage["subsection"])
-    if root.tag in ["vertical"] or root.tag in leaf_nodes:
-        location_comment = location_comment + "\n    Unit: " + parentage["page"]
-    if root.tag in leaf_nodes:
-        location_comment = location_comment + parentage["component"]
-
-    c = ET.Comment(location_comment)
-    c.tail = "\n"
-    root.insert(0, c)
-
-    tree.write(
+    writeLocationComment(
         os.path.join(folder, (filename + ".xml")),
-        encoding="utf-8",
-        xml_declaration=False,
-        pretty_print=True,
+        makeLocationComment(root.tag, parentage),
+        tree,
     )
 
     return XMLInfo
@@ -85,8 +134,6 @@ def getXMLInfo(folder, root, parentage, args):
         "conditional",
     ]
 
-    leaf_nodes = ["html", "problem", "video", "poll"]
-
     contents = []
     has_discussion = False
 
@@ -236,6 +283,7 @@ def NameThatPage(args=["-h"]):
         )
 
         print("Added container locations to " + course_info["parent_name"])
+        print(str(files_changed) + " files changed.")
 
 
 if __name__ == "__main__":
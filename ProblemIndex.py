@@ -0,0 +1,155 @@
+import os
+import sys
+import argparse
+from xml.etree import ElementTree as ET
+
+instructions = """
+To use:
+python3 ProblemIndex.py path/to/problem/folder
+
+Reads every problem in a folder once and prints what it found,
+tab-separated, one problem per line:
+  response types, number of choices, weight, whether there's a
+  written solution, group_access, max_attempts, and showanswer.
+
+SetMaxAttempts.py, SetMaxAttemptsIfGraded.py, MakeNewRun.py, and
+CourseWarehouse.py all make their decisions from this same index.
+
+Options:
+  -h  Print this help message and exit.
+
+Last update: October 19th, 2026
+"""
+
+# Here are all the problem types we recognize:
+problem_types = [
+    "choiceresponse",
+    "customresponse",
+    "optionresponse",
+    "numericalresponse",
+    "multiplechoiceresponse",
+    "stringresponse",
+    "formularesponse",
+]
+
+# group_access values that put a problem outside the paywall.
+ungated_access = ['{"51": [1, 2]}', "{&quot;51&quot;: [1, 2]}"]
+
+
+# Everything we want to know about one problem, from a single walk of its tree.
+def getProblemFeatures(root):
+    features = {
+        "display_name": root.attrib.get("display_name", ""),
+        "response_types": [],
+        "num_choices": 0,
+        "has_solution": False,
+        # If weight isn't defined, it's 1. None means it's not a number.
+        "weight": 1.0,
+        "group_access": root.attrib.get("group_access", ""),
+        "ungated": root.attrib.get("group_access", "") in ungated_access,
+        "max_attempts": root.attrib.get("max_attempts", None),
+        "showanswer": root.attrib.get("showanswer", None),
+    }
+    try:
+        features["weight"] = float(root.attrib.get("weight", 1))
+    except ValueError:
+        features["weight"] = None
+
+    for element in root.iter():
+        if element.tag in problem_types:
+            features["response_types"].append(element.tag)
+        elif element.tag == "choice":
+            features["num_choices"] += 1
+        elif element.tag == "solution" and not features["has_solution"]:
+            # Only counts if there's some actual text in there.
+            if "".join(element.itertext()).strip() != "":
+                features["has_solution"] = True
+
+    return features
+
+
+# Indexes every problem file in a folder, keyed by file path.
+# Files that aren't problems, or aren't valid XML, are left out.
+def indexProblems(folder):
+    index = dict()
+    for dirpath, dirnames, filenames in os.walk(folder):
+        for eachfile in filenames:
+            if not eachfile.endswith(".xml"):
+                continue
+            filepath = os.path.join(dirpath, eachfile)
+            try:
+                root = ET.parse(filepath).getroot()
+            except ET.ParseError:
+                continue
+            if root.tag != "problem":
+                continue
+            features = getProblemFeatures(root)
+            features["url_name"] = eachfile[:-4]
+            index[filepath] = features
+    return index
+
+
+# Works out the number of attempts from the problem type, for "auto" mode.
+# Returns False if we don't handle this kind of problem.
+def autoAttempts(features):
+    thisProbType = features["response_types"]
+    numberOptions = features["num_choices"]
+    newValue = False
+
+    # Set number of attempts properly
+    if "multiplechoiceresponse" in thisProbType:
+        if numberOptions <= 3:
+            newValue = "1"
+        elif numberOptions <= 6:
+            newValue = "2"
+        else:
+            newValue = "3"
+
+    if "choiceresponse" in thisProbType:
+        newValue = str(numberOptions) if numberOptions <= 5 else "5"
+
+    if "customresponse" in thisProbType or "stringresponse" in thisProbType:
+        newValue = "5"
+
+    if "formularesponse" in thisProbType or "numericalresponse" in thisProbType:
+        newValue = "10"
+
+    return newValue
+
+
+def ProblemIndex(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("directory", nargs="?", default=None)
+
+    args = parser.parse_args()
+    if args.help or args.directory is None:
+        sys.exit(instructions)
+
+    if not os.path.exists(args.directory):
+        sys.exit("Directory not found: " + args.directory)
+
+    index = indexProblems(args.directory)
+    columns = [
+        "response_types",
+        "num_choices",
+        "weight",
+        "has_solution",
+        "group_access",
+        "max_attempts",
+        "showanswer",
+    ]
+    print("\t".join(["url_name"] + columns))
+    for filepath in sorted(index):
+        features = index[filepath]
+        row = [features["url_name"]]
+        for c in columns:
+            if c == "response_types":
+                row.append(",".join(features[c]))
+            else:
+                row.append("" if features[c] is None else str(features[c]))
+        print("\t".join(row))
+
+
+if __name__ == "__main__":
+    ProblemIndex(sys.argv)
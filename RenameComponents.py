@@ -0,0 +1,262 @@
+import os
+import re
+import csv
+import sys
+import uuid
+import argparse
+from WriteJournal import writeFile, moveFile
+
+instructions = """
+To use:
+python3 RenameComponents.py path/to/course/folder (options)
+
+Gives new url_names (component IDs) to components in an extracted course,
+and updates everything that points to them in a single pass:
+  - pointer tags and inline tags in the course structure,
+  - jump_to_id links and block@ locators in HTML, XML, JSON, and JS
+    (except in static/, which is left alone),
+  - the component's own files (lti/old.xml becomes lti/new.xml),
+  - "category/url_name" keys in policies/*/policy.json.
+Nothing is parsed, so formatting and comments are left as they were.
+
+Either pick categories to renumber with -c, or give a CSV file of
+old,new url_names with -m. The mapping that was used is saved to
+renamed_components.csv next to the course folder.
+
+Options:
+  -c  Comma-separated component types to renumber, e.g. -c=lti,openassessment
+  -m  CSV file with old and new url_names, one pair per line.
+  -h  Print this help message and exit.
+
+Last update: October 19th, 2026
+"""
+
+# Files that might have references to a url_name in them.
+text_extensions = [".xml", ".html", ".json", ".js"]
+
+# Everything that can point at a component:
+#   url_name="..." on pointer tags, filename="..." on html components,
+#   /jump_to_id/... links, and block@... in full block locators.
+reference_regex = re.compile(
+    r"""(?P<att>\b(?:url_name|filename)=)(?P<quote>["'])(?P<att_id>[^"']+)(?P=quote)"""
+    r"""|(?P<link>jump_to_id/|block@)(?P<link_id>[\w\-.]+)"""
+)
+
+# Keys in policies/*/policy.json, like "problem/abc": {...}
+policy_key_regex = re.compile(r"""(?P<key>"[\w\-]+/)(?P<key_id>[^"/]+)(?P<end>"\s*:)""")
+
+# Top-level folders that hold things other than components.
+# Files in these are never renamed, even if their names match.
+non_component_folders = ["about", "assets", "info", "policies", "static", "tabs"]
+
+
+# New 32-character hex ID, same style as Studio uses.
+def getNewUrlName():
+    return uuid.uuid4().hex
+
+
+# Finds every url_name of the given component types and makes up a new one for each.
+# Looks both for component files (lti/abc.xml) and for inline tags (<lti url_name="abc">).
+def makeRenameMap(course_folder, categories):
+    rename_map = dict()
+    tag_regex = re.compile(
+        r"<(?:" + "|".join(re.escape(c) for c in categories) + r")\b[^>]*?"
+        r"""\burl_name=(["'])([^"']+)\1"""
+    )
+
+    for dirpath, dirnames, filenames in os.walk(course_folder):
+        folder = os.path.basename(dirpath)
+        for eachfile in filenames:
+            name, ext = os.path.splitext(eachfile)
+            if ext != ".xml":
+                continue
+            if folder in categories:
+                rename_map.setdefault(name, getNewUrlName())
+            if folder == "vertical":
+                try:
+                    with open(
+                        os.path.join(dirpath, eachfile), "r", encoding="utf-8"
+                    ) as f:
+                        text = f.read()
+                except UnicodeDecodeError:
+                    # Reported when renameComponents skips it.
+                    continue
+                for match in tag_regex.finditer(text):
+                    rename_map.setdefault(match.group(2), getNewUrlName())
+
+    return rename_map
+
+
+# Swaps every reference in a string of text. Returns the new text and
+# the number of references changed.
+def rewriteReferences(text, rename_map):
+    count = 0
+
+    def swap(match):
+        nonlocal count
+        if match.group("att"):
+            old_id = match.group("att_id")
+            if old_id in rename_map:
+                count += 1
+                return (
+                    match.group("att")
+                    + match.group("quote")
+                    + rename_map[old_id]
+                    + match.group("quote")
+                )
+        else:
+            old_id = match.group("link_id")
+            if old_id in rename_map:
+                count += 1
+                return match.group("link") + rename_map[old_id]
+        return match.group(0)
+
+    return reference_regex.sub(swap, text), count
+
+
+# Same as above, for the "category/url_name" keys in a policy.json file.
+def rewritePolicyKeys(text, rename_map):
+    count = 0
+
+    def swap(match):
+        nonlocal count
+        if match.group("key_id") not in rename_map:
+            return match.group(0)
+        count += 1
+        return (
+            match.group("key") + rename_map[match.group("key_id")] + match.group("end")
+        )
+
+    return policy_key_regex.sub(swap, text), count
+
+
+# Whether this file belongs to a component, like problem/abc.xml
+# or drafts/problem/abc.xml.
+def isComponentFile(course_folder, filepath):
+    parts = os.path.relpath(filepath, course_folder).split(os.sep)
+    if parts[0] == "drafts":
+        parts = parts[1:]
+    return len(parts) == 2 and parts[0] not in non_component_folders
+
+
+# Walks the course once, rewriting references in every text file outside
+# static/ and renaming component files. Only files in component folders
+# (and their drafts/ copies) are renamed. Files that aren't UTF-8 are
+# skipped and listed in the results.
+def renameComponents(course_folder, rename_map):
+    results = {
+        "references": 0,
+        "files_changed": 0,
+        "files_renamed": 0,
+        "files_skipped": [],
+    }
+    policies_folder = os.path.join(course_folder, "policies")
+
+    for dirpath, dirnames, filenames in os.walk(course_folder):
+        # Uploaded files (images, scripts, and such) aren't part of the course
+        # structure, so we leave them alone.
+        if dirpath == course_folder:
+            dirnames[:] = [d for d in dirnames if d != "static"]
+        for eachfile in filenames:
+            name, ext = os.path.splitext(eachfile)
+            filepath = os.path.join(dirpath, eachfile)
+            if ext not in text_extensions:
+                continue
+
+            try:
+                # newline="" keeps line endings exactly as they were.
+                with open(filepath, "r", encoding="utf-8", newline="") as f:
+                    text = f.read()
+            except UnicodeDecodeError:
+                print("Skipped " + filepath + ": not UTF-8, so it wasn't changed.")
+                results["files_skipped"].append(filepath)
+                continue
+            new_text, count = rewriteReferences(text, rename_map)
+            if (
+                eachfile == "policy.json"
+                and os.path.dirname(dirpath) == policies_folder
+            ):
+                new_text, key_count = rewritePolicyKeys(new_text, rename_map)
+                count += key_count
+            if count > 0:
+                writeFile(filepath, new_text)
+                results["references"] += count
+                results["files_changed"] += 1
+
+            if name in rename_map and isComponentFile(course_folder, filepath):
+                moveFile(filepath, os.path.join(dirpath, rename_map[name] + ext))
+                results["files_renamed"] += 1
+
+    return results
+
+
+def readRenameMap(mapfile):
+    rename_map = dict()
+    with open(mapfile, "r", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or row[0].strip() == "" or row[0].strip() == "old":
+                continue
+            rename_map[row[0].strip()] = row[1].strip()
+    return rename_map
+
+
+def writeRenameMap(mapfile, rename_map):
+    with open(mapfile, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["old", "new"])
+        for old_id in rename_map:
+            writer.writerow([old_id, rename_map[old_id]])
+
+
+def RenameComponents(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("course_folder", nargs="?", default=None)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-c", "--categories", default=None)
+    parser.add_argument("-m", "--mapfile", default=None)
+
+    args = parser.parse_args()
+    if args.help or args.course_folder is None:
+        sys.exit(instructions)
+    if args.categories is None and args.mapfile is None:
+        sys.exit("Pick component types with -c or give a mapping file with -m.")
+
+    course_folder = os.path.abspath(args.course_folder)
+    if not os.path.exists(os.path.join(course_folder, "course.xml")):
+        sys.exit("No course.xml file found in " + course_folder)
+
+    if args.mapfile is not None:
+        if not os.path.exists(args.mapfile):
+            sys.exit("Mapping file not found: " + args.mapfile)
+        rename_map = readRenameMap(args.mapfile)
+    else:
+        categories = [c.strip() for c in args.categories.split(",") if c.strip()]
+        rename_map = makeRenameMap(course_folder, categories)
+
+    if len(rename_map) == 0:
+        sys.exit("No components found to rename.")
+
+    results = renameComponents(course_folder, rename_map)
+
+    mapfile = os.path.join(os.path.dirname(course_folder), "renamed_components.csv")
+    writeRenameMap(mapfile, rename_map)
+
+    print("Renamed " + str(len(rename_map)) + " components.")
+    print(
+        str(results["references"])
+        + " references updated in "
+        + str(results["files_changed"])
+        + " files, "
+        + str(results["files_renamed"])
+        + " files renamed."
+    )
+    if results["files_skipped"]:
+        print(
+            str(len(results["files_skipped"]))
+            + " files skipped because they aren't UTF-8. Check them by hand."
+        )
+    print("Mapping saved to " + mapfile)
+
+
+if __name__ == "__main__":
+    RenameComponents(sys.argv)
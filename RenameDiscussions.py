@@ -7,6 +7,9 @@ import os
 import glob
 import argparse
 import xml.etree.ElementTree as ET
+from CourseOutline import resolveElement
+from RewriteAttributes import rewriteAttributes
+from WriteJournal import writeFile
 
 instructions = """
 To use:
@@ -16,11 +19,18 @@ Run this on a course folder, or a course.xml file inside an edX course folder (f
 The discussion components will automatically have their category and
 subcategory set using the section, subsection, and unit names for the course.
 
-There are currently no options. This script may fail on courses where
-the discussion components are in their own folder instead of
-inline in the verticals.
+This script may fail on courses where the discussion components
+are in their own folder instead of inline in the verticals.
 
-Last update: Feb 22nd 2022
+Options:
+  -f  Flat mode. Reads the sections and subsections once, then only opens
+      the unit files that have discussions in them. Much faster on big
+      courses. Only the discussion attributes change; the rest of each
+      file stays exactly as it was. Skips units that are written inline
+      in their subsection instead of in the vertical/ folder.
+  -h  Print this message and exit.
+
+Last update: October 19th, 2026
 """
 
 
@@ -197,12 +207,80 @@ def getXMLInfo(folder, root, parentage, args):
     }
 
 
+# Gets the section and subsection names for every unit in the course,
+# without opening the units themselves.
+def getUnitParentage(course_folder):
+    unit_parentage = dict()
+
+    def getName(element):
+        return element.attrib.get("display_name", element.tag)
+
+    course_root = ET.parse(os.path.join(course_folder, "course.xml")).getroot()
+    course_root, filepath = resolveElement(course_folder, course_root)
+    for chapter in course_root.iter("chapter"):
+        chapter, filepath = resolveElement(course_folder, chapter)
+        for sequential in chapter.iter("sequential"):
+            sequential, filepath = resolveElement(course_folder, sequential)
+            for vertical in sequential.iter("vertical"):
+                if "url_name" in vertical.attrib:
+                    unit_parentage[vertical.attrib["url_name"]] = {
+                        "section": getName(chapter),
+                        "subsection": getName(sequential),
+                    }
+
+    return unit_parentage
+
+
+# Flat mode: one pass over the outline, then only the vertical files
+# that mention discussions. Returns how many discussions and files changed.
+def renameDiscussionsFlat(course_folder):
+    unit_parentage = getUnitParentage(course_folder)
+    num_discussions = 0
+    num_files = 0
+
+    for dirpath, dirnames, filenames in os.walk(
+        os.path.join(course_folder, "vertical")
+    ):
+        for eachfile in filenames:
+            url_name, ext = os.path.splitext(eachfile)
+            if ext != ".xml" or url_name not in unit_parentage:
+                continue
+            filepath = os.path.join(dirpath, eachfile)
+            # newline="" keeps line endings exactly as they were.
+            with open(filepath, "r", encoding="utf-8", newline="") as f:
+                text = f.read()
+            if "<discussion" not in text:
+                continue
+
+            parentage = dict(unit_parentage[url_name])
+
+            def setDiscussion(tag, attributes, depth):
+                if depth == 0:
+                    parentage["page"] = attributes.get("display_name", tag)
+                elif tag == "discussion":
+                    return {
+                        "discussion_category": parentage["section"]
+                        + ": "
+                        + parentage["subsection"],
+                        "discussion_target": parentage["page"],
+                    }
+
+            new_text, root_tag, changed = rewriteAttributes(text, setDiscussion)
+            if changed > 0:
+                writeFile(filepath, new_text)
+                num_discussions += changed
+                num_files += 1
+
+    return num_discussions, num_files
+
+
 # Main function
 def RenameDiscussions(args=["-h"]):
 
     # Handle arguments and flags
     parser = argparse.ArgumentParser(usage=instructions, add_help=False)
     parser.add_argument("--help", "-h", action="store_true")
+    parser.add_argument("--flat", "-f", action="store_true")
     parser.add_argument("file_names", nargs="*")
 
     # "extra" will help us deal with out-of-order arguments.
@@ -237,6 +315,17 @@ def RenameDiscussions(args=["-h"]):
             if "course.xml" in name:
                 rootFileDir = os.path.dirname(name)
 
+        if args.flat:
+            num_discussions, num_files = renameDiscussionsFlat(rootFileDir)
+            print(
+                "Updated "
+                + str(num_discussions)
+                + " discussions in "
+                + str(num_files)
+                + " files."
+            )
+            continue
+
         rootFilePath = os.path.join(rootFileDir, "course.xml")
         course_tree = ET.parse(rootFilePath)
 
@@ -0,0 +1,69 @@
+import os
+import sys
+import argparse
+from glob import glob
+from MakeNewRun import replaceFilesInCourses
+
+instructions = """
+To use:
+python3 ReplaceFiles.py path/to/course/folder (more folders) (options)
+
+Copies everything in script_directory/file_replacements/ into the /static/
+folder of every course folder given, just like MakeNewRun.py does.
+Works on extracted course folders, not tarballs.
+
+Files that are already identical are skipped. Each replacement is hashed once,
+kept in a local store (~/.hxxml/file_store/), and hardlinked into each course
+so that a whole batch of courses shares one copy on disk.
+If hardlinks aren't possible (e.g. the course is on another drive),
+the file is copied instead.
+
+Options:
+  -r  Use a different replacement folder, -r=path/to/folder
+  -h  Print this help message and exit.
+
+Last update: October 18th, 2026
+"""
+
+
+def ReplaceFiles(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("course_folders", nargs="*")
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument(
+        "-r", "--replacements", default=os.path.join(sys.path[0], "file_replacements")
+    )
+
+    args = parser.parse_args()
+    if args.help:
+        sys.exit(instructions)
+
+    # Replace arguments with wildcards with their expansion.
+    # If a string does not contain a wildcard, glob will return it as is.
+    course_folders = list()
+    for arg in args.course_folders:
+        course_folders += glob(arg)
+
+    if course_folders == []:
+        sys.exit("No file or directory found by that name.")
+    if not os.path.isdir(args.replacements):
+        sys.exit("Replacement folder not found: " + args.replacements)
+
+    # Only work on things that look like course exports.
+    for folder in course_folders:
+        if not os.path.exists(os.path.join(folder, "course.xml")):
+            print("Skipping " + folder + ": no course.xml file found.")
+    course_folders = [
+        f for f in course_folders if os.path.exists(os.path.join(f, "course.xml"))
+    ]
+
+    replaced = replaceFilesInCourses(course_folders, args.replacements)
+
+    for folder in course_folders:
+        print(str(len(replaced[folder])) + " updates to Files & Uploads in " + folder)
+        for f in replaced[folder]:
+            print("  " + f)
+
+
+if __name__ == "__main__":
+    ReplaceFiles(sys.argv)
@@ -0,0 +1,266 @@
+import os
+import re
+import sys
+import argparse
+from glob import glob
+from concurrent.futures import ThreadPoolExecutor
+from WriteJournal import openForWriting
+from SRTTimeShifter import (
+    readSRT,
+    writeSRT,
+    shiftTranscript,
+    scaleTranscript,
+    clampTranscript,
+    cutTranscript,
+    appendTranscript,
+    fixOverlaps,
+)
+
+instructions = """
+To use:
+python3 RetimeTranscripts.py path/to/files_or_folders (changes) (options)
+
+Changes the timing of many SRT transcripts at once, like every language
+track for a video after it's been re-edited. The changes happen in the
+order you list them, and you can use each one as many times as you like:
+
+  --shift 2.5      Move everything 2.5 seconds later (negative for earlier).
+  --fps 25:23.976  Retime for a video that went from 25 to 23.976 fps.
+  --trim 12.5:     Keep only what's after 12.5 seconds, moved to the start.
+                   --trim 0:300 keeps the first five minutes.
+  --cut 60:75      Take out 60 to 75 seconds, pulling everything after back.
+  --prepend intro-{lang}.srt
+                   Put another transcript in front of this one.
+  --append outro-{lang}.srt
+                   Put another transcript after this one.
+                   {lang} is each file's language, like the "en" in
+                   lecture-en.srt, so one command handles every language.
+                   By default the new piece starts where the last caption
+                   ends. Add @seconds to say where, like outro-{lang}.srt@95
+                   (or, for --prepend, how long the intro is).
+
+Nothing ends up before 0 seconds. Captions with no time left are dropped.
+
+Folders are searched for .srt files, including subfolders.
+Files are changed in place, unless you use -o. Each file is written in
+full before it replaces the old one, so nothing is ever half-written.
+
+Options:
+  -o  Write the new files to this folder instead, keeping the subfolders
+      they were found in.
+  -f  Fix overlaps: cut each caption off when the next one starts.
+  -t  How many files to work on at once. Defaults to 8.
+  -h  Print this message and exit.
+
+Last update: October 19th, 2026
+"""
+
+# The language at the end of a transcript's name, like lecture-en.srt
+# or lecture-zh_HANS.srt
+language_regex = re.compile(r"-([A-Za-z]{2,3}(?:_[A-Za-z]+)?)\.srt$")
+
+
+def getLanguage(filepath):
+    match = language_regex.search(os.path.basename(filepath))
+    return match.group(1) if match else None
+
+
+def toMsec(seconds):
+    return int(round(float(seconds) * 1000))
+
+
+# "12.5:30" becomes (12500, 30000). Either side can be blank (None).
+def getRange(text):
+    if ":" not in text:
+        raise argparse.ArgumentTypeError("Use start:end, like 12.5:30")
+    start, end = text.split(":", 1)
+    return (toMsec(start) if start else None, toMsec(end) if end else None)
+
+
+# Turns each option into a (name, value) step, all in one list, in order.
+def makeStep(name, convert):
+    def step(text):
+        try:
+            return (name, convert(text))
+        except ValueError:
+            raise argparse.ArgumentTypeError("Can't read " + text)
+
+    return step
+
+
+def getFrameRates(text):
+    old, new = text.split(":")
+    if float(old) <= 0 or float(new) <= 0:
+        raise ValueError
+    # The same frames, played at the new rate.
+    return float(old) / float(new)
+
+
+def getPiece(text):
+    filename, at, seconds = text.partition("@")
+    return (filename, toMsec(seconds) if at else None)
+
+
+# Reads the transcript that goes with this one, filling in the language.
+def readPiece(filename, filepath):
+    if "{lang}" in filename:
+        language = getLanguage(filepath)
+        if language is None:
+            raise ValueError("Can't tell what language " + filepath + " is.")
+        filename = filename.replace("{lang}", language)
+    with open(filename, "r", encoding="utf-8-sig") as f:
+        return readSRT(f)
+
+
+def getEnd(transcript):
+    return max(transcript["ends"], default=0)
+
+
+# Applies each step to the transcript, in order.
+def retimeTranscript(transcript, steps, filepath):
+    for name, value in steps:
+        if name == "shift":
+            shiftTranscript(transcript, value)
+        elif name == "fps":
+            scaleTranscript(transcript, value)
+        elif name == "trim":
+            start, end = value
+            start = start or 0
+            clampTranscript(transcript, start, end)
+            shiftTranscript(transcript, -start)
+        elif name == "cut":
+            start, end = value
+            if start is None or end is None or end <= start:
+                raise ValueError("--cut needs a start and a later end.")
+            cutTranscript(transcript, start, end)
+        elif name == "append":
+            filename, offset = value
+            piece = readPiece(filename, filepath)
+            appendTranscript(
+                transcript, piece, getEnd(transcript) if offset is None else offset
+            )
+        elif name == "prepend":
+            filename, offset = value
+            piece = readPiece(filename, filepath)
+            appendTranscript(
+                piece, transcript, getEnd(piece) if offset is None else offset
+            )
+            transcript.update(piece)
+
+        # Nothing before the start of the video.
+        clampTranscript(transcript, 0)
+    return transcript
+
+
+# Reads, changes, and writes one file. Runs on a worker thread.
+# Returns an error message, or None if it worked.
+def retimeFile(filepath, steps, output_path, fix_overlaps):
+    try:
+        with open(filepath, "r", encoding="utf-8-sig") as f:
+            transcript = readSRT(f)
+        retimeTranscript(transcript, steps, filepath)
+        if fix_overlaps:
+            fixOverlaps(transcript)
+        with openForWriting(output_path) as f:
+            writeSRT(f, transcript)
+    except (OSError, ValueError, UnicodeDecodeError) as e:
+        return str(e)
+    return None
+
+
+# Returns (path, path relative to the folder it was found in) for each
+# transcript. Files named on their own are relative to their own folder.
+def findTranscripts(file_names):
+    transcripts = []
+    for name in file_names:
+        if os.path.isdir(name):
+            for dirpath, dirnames, filenames in os.walk(name):
+                for f in sorted(filenames):
+                    if f.lower().endswith(".srt"):
+                        filepath = os.path.join(dirpath, f)
+                        transcripts.append((filepath, os.path.relpath(filepath, name)))
+        elif name.lower().endswith(".srt"):
+            transcripts.append((name, os.path.basename(name)))
+        else:
+            print("Skipping " + name + ": not an SRT file.")
+    return transcripts
+
+
+def RetimeTranscripts(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-o", "--output", default=None)
+    parser.add_argument("-f", "--fix-overlaps", action="store_true")
+    parser.add_argument("-t", "--threads", type=int, default=8)
+    parser.add_argument("file_names", nargs="*", default=[])
+    steps = {
+        "shift": toMsec,
+        "fps": getFrameRates,
+        "trim": getRange,
+        "cut": getRange,
+        "prepend": getPiece,
+        "append": getPiece,
+    }
+    for name in steps:
+        parser.add_argument(
+            "--" + name,
+            dest="steps",
+            action="append",
+            default=[],
+            type=makeStep(name, steps[name]),
+        )
+
+    args = parser.parse_args(argv)
+    if args.help or len(args.file_names) == 0:
+        sys.exit(instructions)
+    if len(args.steps) == 0:
+        sys.exit("Nothing to do. Try --shift, --fps, --trim, --cut, or --append.")
+
+    # Replace arguments with wildcards with their expansion.
+    # If a string does not contain a wildcard, glob will return it as is.
+    file_names = list()
+    for f in args.file_names:
+        file_names += glob(f)
+    found = findTranscripts(file_names)
+    if len(found) == 0:
+        sys.exit("No SRT files found.")
+    transcripts = [filepath for filepath, relpath in found]
+
+    if args.output is not None:
+        outputs = [os.path.join(args.output, relpath) for filepath, relpath in found]
+        # Two inputs with the same name would end up as one output.
+        seen = dict()
+        for filepath, output in zip(transcripts, outputs):
+            if output in seen:
+                sys.exit(
+                    "Both "
+                    + seen[output]
+                    + " and "
+                    + filepath
+                    + " would be written to "
+                    + output
+                    + ". Retime them separately."
+                )
+            seen[output] = filepath
+        for output in outputs:
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+    else:
+        outputs = transcripts
+
+    num_retimed = 0
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        errors = pool.map(
+            lambda paths: retimeFile(paths[0], args.steps, paths[1], args.fix_overlaps),
+            zip(transcripts, outputs),
+        )
+        for filepath, error in zip(transcripts, errors):
+            if error is None:
+                num_retimed += 1
+            else:
+                print("Couldn't retime " + filepath + ": " + error)
+
+    print("Retimed " + str(num_retimed) + (" file." if num_retimed == 1 else " files."))
+
+
+if __name__ == "__main__":
+    RetimeTranscripts(sys.argv[1:])
@@ -0,0 +1,203 @@
+import os
+import re
+import sys
+import argparse
+from WriteJournal import writeFile
+
+instructions = """
+To use:
+python3 RewriteAttributes.py tag attribute value path/to/folder (options)
+
+Sets an attribute on every matching tag in every XML file in a folder,
+for example:
+  python3 RewriteAttributes.py problem showanswer finished course/problem
+
+Use "delete" as the value to remove the attribute instead.
+Use "*" as the tag to match every tag.
+
+Only the attribute itself is changed. Everything else in the file
+(spacing, quotes, comments, attribute order) is left exactly as it was,
+so version-controlled exports get small, readable diffs.
+Files where nothing changes aren't rewritten at all.
+
+Options:
+  -h  Print this help message and exit.
+
+Last update: October 19th, 2026
+"""
+
+# Everything that starts with a < in an XML file.
+# Only start tags get captured groups; everything else is copied as-is.
+markup_regex = re.compile(
+    r"<!--.*?-->"
+    r"|<!\[CDATA\[.*?\]\]>"
+    r"|<\?.*?\?>"
+    r"|<![^>]*>"
+    r"|</[^>]*>"
+    r"""|<(?P<tag>[A-Za-z_][\w.\-:]*)(?P<atts>(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|'[^']*'))*)"""
+    r"(?P<end>\s*/?>)",
+    re.S,
+)
+attribute_regex = re.compile(
+    r"""(?P<space>\s+)(?P<name>[^\s=/>]+)(?P<equals>\s*=\s*)"""
+    r"""(?P<quote>["'])(?P<value>.*?)(?P=quote)""",
+    re.S,
+)
+entity_regex = re.compile(r"&(#x[0-9a-fA-F]+|#[0-9]+|quot|amp|lt|gt|apos);")
+named_entities = {"quot": '"', "amp": "&", "lt": "<", "gt": ">", "apos": "'"}
+
+
+def unescapeValue(value):
+    def swap(match):
+        entity = match.group(1)
+        if entity.startswith("#x"):
+            return chr(int(entity[2:], 16))
+        if entity.startswith("#"):
+            return chr(int(entity[1:]))
+        return named_entities[entity]
+
+    return entity_regex.sub(swap, value)
+
+
+# Escapes in the same way ElementTree does, so values round-trip.
+def escapeValue(value, quote='"'):
+    value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    value = value.replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#09;")
+    if quote == '"':
+        return value.replace('"', "&quot;")
+    return value.replace("'", "&apos;")
+
+
+# Makes a new start tag with the changes applied.
+# changes is a dict of attribute name: new value, or None to delete.
+def rebuildTag(match, changes):
+    atts = match.group("atts")
+    new_atts = ""
+    for att in attribute_regex.finditer(atts):
+        name = att.group("name")
+        if name not in changes:
+            new_atts += att.group(0)
+        elif changes[name] is not None:
+            new_atts += (
+                att.group("space")
+                + name
+                + att.group("equals")
+                + att.group("quote")
+                + escapeValue(changes[name], att.group("quote"))
+                + att.group("quote")
+            )
+    # Brand new attributes go at the end.
+    existing = [a.group("name") for a in attribute_regex.finditer(atts)]
+    for name in changes:
+        if name not in existing and changes[name] is not None:
+            new_atts += " " + name + '="' + escapeValue(changes[name]) + '"'
+
+    return "<" + match.group("tag") + new_atts + match.group("end")
+
+
+# Runs the callback on every start tag in the text and applies what it returns.
+# callback(tag, attributes, depth) gets the tag name, a dict of its (unescaped)
+# attributes, and how deep it is (0 for the root). It returns a dict of
+# attribute name: new value (None to delete), or nothing to leave the tag alone.
+# Returns the new text, the root tag, and how many tags changed.
+def rewriteAttributes(text, callback):
+    pieces = []
+    last = 0
+    depth = 0
+    root_tag = None
+    changed = 0
+
+    for match in markup_regex.finditer(text):
+        markup = match.group(0)
+        if match.group("tag") is None:
+            if markup.startswith("</"):
+                depth -= 1
+            continue
+
+        tag = match.group("tag")
+        if root_tag is None:
+            root_tag = tag
+        attributes = {
+            a.group("name"): unescapeValue(a.group("value"))
+            for a in attribute_regex.finditer(match.group("atts"))
+        }
+        changes = callback(tag, attributes, depth)
+        if changes:
+            # Skip changes that wouldn't do anything.
+            changes = {
+                k: v
+                for k, v in changes.items()
+                if attributes.get(k, None) != v
+                and not (v is None and k not in attributes)
+            }
+        if changes:
+            pieces.append(text[last : match.start()])
+            pieces.append(rebuildTag(match, changes))
+            last = match.end()
+            changed += 1
+
+        if not match.group("end").strip().startswith("/"):
+            depth += 1
+
+    pieces.append(text[last:])
+    return "".join(pieces), root_tag, changed
+
+
+# Same as above, for a file. Only writes the file if something changed,
+# and then all at once (see WriteJournal.py).
+# Returns the root tag and how many tags changed. Files that aren't UTF-8
+# are skipped, with (None, 0), and XML files among them are reported.
+def rewriteFile(filepath, callback):
+    try:
+        # newline="" keeps line endings exactly as they were.
+        with open(filepath, "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+    except UnicodeDecodeError:
+        # Images and such are expected. XML that isn't UTF-8 is worth a mention.
+        if filepath.lower().endswith(".xml"):
+            print("Skipped " + filepath + ": not UTF-8, so it wasn't changed.")
+        return None, 0
+
+    new_text, root_tag, changed = rewriteAttributes(text, callback)
+    if changed > 0:
+        writeFile(filepath, new_text)
+    return root_tag, changed
+
+
+def RewriteAttributes(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("tag", nargs="?", default=None)
+    parser.add_argument("attribute", nargs="?", default=None)
+    parser.add_argument("value", nargs="?", default=None)
+    parser.add_argument("directory", nargs="?", default=".")
+
+    args = parser.parse_args()
+    if args.help or args.value is None:
+        sys.exit(instructions)
+
+    if not os.path.exists(args.directory):
+        sys.exit("Directory not found: " + args.directory)
+
+    new_value = None if args.value.lower() == "delete" else args.value
+
+    def setValue(tag, attributes, depth):
+        if args.tag == "*" or tag == args.tag:
+            return {args.attribute: new_value}
+
+    numfiles = 0
+    numtags = 0
+    for dirpath, dirnames, filenames in os.walk(args.directory):
+        for eachfile in filenames:
+            if not eachfile.endswith(".xml"):
+                continue
+            root_tag, changed = rewriteFile(os.path.join(dirpath, eachfile), setValue)
+            if changed > 0:
+                numfiles += 1
+                numtags += changed
+
+    print("Changed " + str(numtags) + " tags in " + str(numfiles) + " files.")
+
+
+if __name__ == "__main__":
+    RewriteAttributes(sys.argv)
@@ -2,7 +2,10 @@ import sys
 import os
 import argparse
 import re
+import shutil
 from glob import glob
+from array import array
+from WriteJournal import openForWriting
 
 instructions = """
 To use:
@@ -19,223 +22,288 @@ Valid options:
   -o Overwrite. Overwrites the old file rather than making a new one.
   -h Help. Print this message.
 
-Last update: March 15th 2018
+Last update: October 19th, 2026
 """
 
+# hh:mm:ss,msec (or with a period), and a line with two of them.
+time_pattern = r"(\d+):(\d\d):(\d\d)(?:[,.](\d+))?"
+time_regex = re.compile(time_pattern)
+timing_regex = re.compile(r"^\s*" + time_pattern + r"\s*-->\s*" + time_pattern)
+
+
 # Converts from miliseconds to hh:mm:ss,msec format
 def msecToHMS(time):
     # Make sure it's an integer.
-    time = int(float(time))
+    if type(time) is not int:
+        time = int(float(time))
 
     # Downconvert through hours. SRTs don't handle days.
-    msec = time % 1000
-    time -= msec
-    seconds = (time // 1000) % 60
-    time -= seconds * 1000
-    minutes = (time // 60 // 1000) % 60
-    time -= minutes * 60 * 1000
-    hours = (time // 1000 // 3600) % 24
-
-    # Make sure we get enough zeroes.
-    if int(msec) == 0:
-        msec = "000"
-    elif int(msec) < 10:
-        msec = "00" + str(msec)
-    elif int(msec) < 100:
-        msec = "0" + str(msec)
-    if int(seconds) == 0:
-        seconds = "00"
-    elif int(seconds) < 10:
-        seconds = "0" + str(seconds)
-    if int(minutes) == 0:
-        minutes = "00"
-    elif int(minutes) < 10:
-        minutes = "0" + str(minutes)
-    if int(hours) == 0:
-        hours = "00"
-    elif int(hours) < 10:
-        hours = "0" + str(hours)
-
-    # Send back a string
-    return str(hours) + ":" + str(minutes) + ":" + str(seconds) + "," + str(msec)
+    hours, time = divmod(time, 3600000)
+    minutes, time = divmod(time, 60000)
+    seconds, msec = divmod(time, 1000)
+    return f"{hours % 24:02d}:{minutes:02d}:{seconds:02d},{msec:03d}"
 
 
 # Converts from hh:mm:ss,msec format to miliseconds
 def HMSTomsec(timestring):
-    # Get hours, minutes, and seconds as individual strings
-    hours, minutes, seconds = timestring.split(":")
-
-    # Convert the comma in seconds to a decimal
-    seconds = seconds.replace(",", ".")
-
-    # Convert times to numbers
-    hours = int(hours)
-    minutes = int(minutes)
-    seconds = float(seconds)
-
-    # Convert everything to miliseconds and add them all up
-    msec = int(seconds * 1000) + minutes * 60000 + hours * 3600000
-
-    # Send back an integer
-    return msec
-
-
-# Opens our input and output files.
-def openFiles(name, seconds, args):
-    completed = False
-    print(name)
-
-    # Open the existing SRT file.
-    with open(name, "r") as inputFile:
-        # Open a new file to work with.
-        newname = name + ".new"
-        with open(newname, "w") as outputFile:
-            # With the files open, shift the times.
-            completed = shiftTimes(inputFile, outputFile, name, seconds, args)
-
-        # If we fail, we shouldn't leave a random file lying around.
-        if not completed:
-            os.remove(newname)
-        return completed, newname
-
-    # If we got here, we couldn't open the file I guess.
-    return False, "error.srt"
-
-
-# Gets a list of dicts with all the entries from our original SRT file
-def getSRTEntries(inFile):
-
-    SRTEntries = []
-    lastLine = ""
-    twoBack = ""
-
-    # Loop down the file, storing lines, until you find 'numbers --> numbers'
-    for index, line in enumerate(inFile):
-        entryData = {}
-
-        if re.search(r"\d\d --> \d\d", line):
-            # The line before that is the index.
-            try:
-                entryData["index"] = int(lastLine)
-            except ValueError:
-                # A missing blank line can cause this problem.
-                # Go one back to fix it.
-                line = lastLine
-                lastLine = twoBack
-
-            # That line is the timecode. Store it in miliseconds.
-            entryData["start"] = HMSTomsec(line.split(" --> ")[0])
-            entryData["end"] = HMSTomsec(line.split(" --> ")[1])
-            # Watch out for the end of the file.
-            try:
-                # The next line is text1, and the one after is text2 or maybe blank.
-                entryData["text1"] = str(inFile.readline())
-                # If text1 is blank, move on.
-                if entryData["text1"].strip() == "":
-                    entryData["text2"] = ""
-                    SRTEntries.append(entryData)
-                    continue
-                entryData["text2"] = str(inFile.readline())
-            except StopIteration:
-                pass
-
-            # Once we've gotten our info, add it to the list.
-            SRTEntries.append(entryData)
-
-        twoBack = lastLine
-        lastLine = line
-
-    return SRTEntries
-
-
-# Writes a standard SRT entry into our output files.
-def writeEntry(outFile, entry, index):
-    outFile.write(str(index) + "\n")
-    outFile.write(
-        str(msecToHMS(entry["start"])) + " --> " + str(msecToHMS(entry["end"])) + "\n"
+    return partsToMsec(*time_regex.match(timestring.strip()).groups())
+
+
+def partsToMsec(hours, minutes, seconds, fraction):
+    # Whole numbers only, so 1,001 doesn't come out as 1000.9999 msec.
+    msec = int(fraction.ljust(3, "0")[:3]) if fraction else 0
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + msec
+
+
+#########################
+# Columnar transcripts
+# Start and end times (in msec) are kept in arrays, with the text of each
+# cue in a parallel list. Multi-line cues keep their lines, joined by "\n".
+# The operations below work on whole columns at once rather than cue by cue.
+#########################
+def makeTranscript():
+    return {"starts": array("q"), "ends": array("q"), "texts": []}
+
+
+def addCue(transcript, start, end, text):
+    transcript["starts"].append(start)
+    transcript["ends"].append(end)
+    transcript["texts"].append(text)
+
+
+# Reads SRT cues one at a time from any iterable of lines, like an open file,
+# yielding (start, end, text). Only holds one cue in memory.
+# Copes with missing blank lines between cues.
+def iterSRT(lines):
+    start = None
+    text_lines = []
+
+    def finishCue():
+        # Blank lines between cues aren't part of the text.
+        while text_lines and text_lines[-1].strip() == "":
+            text_lines.pop()
+        return start, end, "\n".join(text_lines)
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        # Most lines are text, so skip the regex when we can.
+        match = timing_regex.match(line) if "-->" in line else None
+        if match is None:
+            if start is not None:
+                text_lines.append(line)
+            continue
+        if start is not None:
+            # The line before the times is the next cue's number.
+            if text_lines and text_lines[-1].strip().isdigit():
+                text_lines.pop()
+            yield finishCue()
+        parts = match.groups()
+        start = partsToMsec(*parts[:4])
+        end = partsToMsec(*parts[4:])
+        text_lines = []
+    if start is not None:
+        yield finishCue()
+
+
+# Reads a whole SRT file into a transcript.
+def readSRT(lines):
+    transcript = makeTranscript()
+    for start, end, text in iterSRT(lines):
+        addCue(transcript, start, end, text)
+    return transcript
+
+
+def formatCue(index, start, end, text):
+    cue = str(index) + "\n" + msecToHMS(start) + " --> " + msecToHMS(end) + "\n"
+    if text:
+        cue += text + "\n"
+    return cue + "\n"
+
+
+# Writes (start, end, text) cues in SRT format, numbering them from first_index.
+def writeCues(outFile, cues, first_index=1):
+    for index, (start, end, text) in enumerate(cues, first_index):
+        outFile.write(formatCue(index, start, end, text))
+
+
+# Writes the whole transcript in SRT format.
+def writeSRT(outFile, transcript, first_index=1):
+    writeCues(
+        outFile,
+        zip(transcript["starts"], transcript["ends"], transcript["texts"]),
+        first_index,
     )
-    outFile.write(str(entry["text1"]))
-    if "".join(entry["text2"].split()) != "":
-        outFile.write(str(entry["text2"]))
-    outFile.write("\n")
-
-
-# The core loop that calls the important stuff.
-def shiftTimes(inFile, outFile, name, seconds, args):
 
-    # Get a list of all the entries.
-    SRTEntries = getSRTEntries(inFile)
 
-    removeEntry = False
-    blankEntry = None
+# Keeps only the cues where keep is True.
+def selectCues(transcript, keep):
+    keep = list(keep)
+    transcript["starts"] = array(
+        "q", (t for t, k in zip(transcript["starts"], keep) if k)
+    )
+    transcript["ends"] = array("q", (t for t, k in zip(transcript["ends"], keep) if k))
+    transcript["texts"] = [t for t, k in zip(transcript["texts"], keep) if k]
+
+
+def shiftTranscript(transcript, msec):
+    msec = int(round(msec))
+    transcript["starts"] = array("q", map(msec.__add__, transcript["starts"]))
+    transcript["ends"] = array("q", map(msec.__add__, transcript["ends"]))
+
+
+# Stretches or shrinks the times around origin, e.g. for a new frame rate.
+def scaleTranscript(transcript, factor, origin=0):
+    def scale(t):
+        return int(round(origin + (t - origin) * factor))
+
+    transcript["starts"] = array("q", map(scale, transcript["starts"]))
+    transcript["ends"] = array("q", map(scale, transcript["ends"]))
+
+
+# Pulls times into the range from low to high (None for no limit).
+# Cues that end up with no time on screen are dropped.
+def clampTranscript(transcript, low=0, high=None):
+    def clamp(t):
+        t = max(t, low)
+        return t if high is None else min(t, high)
+
+    transcript["starts"] = array("q", map(clamp, transcript["starts"]))
+    transcript["ends"] = array("q", map(clamp, transcript["ends"]))
+    selectCues(transcript, map(int.__lt__, transcript["starts"], transcript["ends"]))
+
+
+# Takes out the time from start to end, pulling everything after it back.
+# Cues that were only in that stretch are dropped.
+def cutTranscript(transcript, start, end):
+    removed = end - start
+
+    def cut(t):
+        if t <= start:
+            return t
+        return start if t < end else t - removed
+
+    transcript["starts"] = array("q", map(cut, transcript["starts"]))
+    transcript["ends"] = array("q", map(cut, transcript["ends"]))
+    selectCues(transcript, map(int.__lt__, transcript["starts"], transcript["ends"]))
+
+
+# Adds another transcript's cues to the end of this one, starting at offset.
+def appendTranscript(transcript, other, offset):
+    offset = int(round(offset))
+    transcript["starts"].extend(map(offset.__add__, other["starts"]))
+    transcript["ends"].extend(map(offset.__add__, other["ends"]))
+    transcript["texts"].extend(other["texts"])
+
+
+# Puts the cues in order, and cuts each one off where the next one starts.
+def fixOverlaps(transcript):
+    starts = transcript["starts"]
+    if any(map(int.__gt__, starts[:-1], starts[1:])):
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        transcript["starts"] = array("q", (starts[i] for i in order))
+        transcript["ends"] = array("q", (transcript["ends"][i] for i in order))
+        transcript["texts"] = [transcript["texts"][i] for i in order]
+        starts = transcript["starts"]
+    ends = transcript["ends"]
+    transcript["ends"] = array("q", map(min, ends[:-1], starts[1:])) + ends[-1:]
+
+
+# What the padding rules do to the first cue when we shift by msec.
+# Going forward, a blank first cue grows (or one gets added). Going backward,
+# there has to be enough room before the first real cue.
+# Returns the new first cues, already shifted, or None if we can't shift.
+def shiftFirstCue(start, end, text, msec):
+    blank = text.strip() == ""
+    if msec > 0:
+        # If there's already a blank 'padding' entry, extend it.
+        if blank:
+            return [(0, end + msec, text)]
+        # If not, add a blank entry at 0.
+        return [(0, start + msec, ""), (start + msec, end + msec, text)]
+
+    # If the first entry starts at or after our time, we're all good.
+    if start > -msec:
+        return [(start + msec, end + msec, text)]
+    # If the first entry ends right there, it goes away.
+    if end == -msec:
+        return []
+    # We might still be good if our first entry is blank. We can shrink it back.
+    if end > -msec and blank:
+        return [(start, end + msec, text)]
+    # But if not, we can't change this file.
+    return None
+
+
+# Shifts a whole transcript, keeping a blank cue at the start as padding.
+# Returns False if there isn't room to shift backward.
+def shiftWithPadding(transcript, msec):
+    msec = int(round(msec))
+    if len(transcript["texts"]) == 0:
+        return True
+    first_cues = shiftFirstCue(
+        transcript["starts"][0], transcript["ends"][0], transcript["texts"][0], msec
+    )
+    if first_cues is None:
+        return False
 
-    # Go through the list and adjust times.
-    for i, entry in enumerate(SRTEntries):
+    shiftTranscript(transcript, msec)
+    selectCues(transcript, [False] + [True] * (len(transcript["texts"]) - 1))
+    for start, end, text in reversed(first_cues):
+        transcript["starts"].insert(0, start)
+        transcript["ends"].insert(0, end)
+        transcript["texts"].insert(0, text)
+    return True
 
-        # If we're going positive:
-        if seconds > 0 and i == 0:
 
-            # If there's already a blank 'padding' entry, extend it.
-            if entry["text1"].strip() == "":
-                entry["start"] = 0
-                entry["end"] += seconds * 1000
-            # If not, add a blank entry at 0.
-            else:
-                blankEntry = {
-                    "start": 0,
-                    "end": SRTEntries[i]["start"] + seconds * 1000,
-                    "index": 0,
-                    "text1": "",
-                    "text2": "",
-                }
-
-                # Adjust the existing first entry.
-                entry["start"] += seconds * 1000
-                entry["end"] += seconds * 1000
-
-        # If we're going negative:
-        elif seconds < 0 and i == 0:
-            # Check to see if we can shrink the first entry enough.
-            # If we have enough time, shrink the first entry back.
-            # If not, stop and throw an error message.
-            # print('start: ' + str(entry['start']/1000.0))
-            # print('end: ' + str(entry['end']/1000.0))
-            # print(entry['start'] > abs(seconds*1000))
-            # print(entry['end'] > abs(seconds*1000))
-
-            # If the first entry starts at or after our time, we're all good.
-            if entry["start"] > abs(seconds * 1000):
-                entry["start"] += seconds * 1000
-                entry["end"] += seconds * 1000
-            elif entry["end"] == abs(seconds * 1000):
-                removeEntry = True
-            # We might still be good if our first entry is blank. We can shrink it back.
-            elif entry["end"] > abs(seconds * 1000) and entry["text1"].strip() == "":
-                entry["end"] += seconds * 1000
-            # But if not, we can't change this file.
-            else:
-                print(
-                    "Cannot shift "
-                    + name
-                    + ". First subtitle is before "
-                    + str(-seconds)
-                    + " seconds."
-                )
-                return False
+# The same thing, streaming: shifts cues as they go past, looking ahead
+# only at the first one. Returns a generator of cues, or None if there
+# isn't room to shift backward.
+def shiftCues(cues, msec):
+    msec = int(round(msec))
+    cues = iter(cues)
+    first = next(cues, None)
+    if first is None:
+        return iter(())
+    first_cues = shiftFirstCue(*first, msec)
+    if first_cues is None:
+        return None
 
-        if i > 0:
-            entry["start"] += seconds * 1000
-            entry["end"] += seconds * 1000
+    def shifted():
+        yield from first_cues
+        for start, end, text in cues:
+            yield start + msec, end + msec, text
 
-    if blankEntry:
-        SRTEntries.insert(0, blankEntry)
-    if removeEntry:
-        del SRTEntries[0]
+    return shifted()
 
-    # Write the file.
-    for i, entry in enumerate(SRTEntries):
-        writeEntry(outFile, entry, i)
 
+# Shifts one file. The new file is written alongside the old one and
+# swapped in at the end, so a crash never leaves a half-written transcript.
+# Unless we're overwriting, the original is kept as name.old.
+def shiftFile(name, seconds, args):
+    print(name)
+    msec = seconds * 1000
+
+    # Only the first cue decides whether we can shift at all.
+    with open(name, "r", encoding="utf-8-sig") as inputFile:
+        if shiftCues(iterSRT(inputFile), msec) is None:
+            print(
+                "Cannot shift "
+                + name
+                + ". First subtitle is before "
+                + str(-seconds)
+                + " seconds."
+            )
+            return False
+
+    if not args.o:
+        shutil.copy2(name, name + ".old")
+
+    # Reads and writes one cue at a time, so even hours-long transcripts
+    # don't take up any more memory than short ones.
+    # This script has always numbered the cues from 0.
+    with open(name, "r", encoding="utf-8-sig") as inputFile:
+        with openForWriting(name) as outputFile:
+            writeCues(outputFile, shiftCues(iterSRT(inputFile), msec), first_index=0)
     return True
 
 
@@ -291,18 +359,12 @@ def SRTTimeShifter(args):
             # Make sure this is an srt file (just check extension)
             if name.lower().endswith(".srt"):
                 # Open that file and shift the times in that file
-                completed, newname = openFiles(name, seconds, args)
-                if completed:
-                    # If we're not copying files, clean up the original.
-                    if args.o:
-                        os.remove(name)
-                    else:
-                        os.rename(name, name + ".old")
-                    os.rename(newname, name)
+                if shiftFile(name, seconds, args):
                     fileCount += 1
             else:
-                print("Trying to open " + name + " and it doesn't seem to be an SRT file.")
-                
+                print(
+                    "Trying to open " + name + " and it doesn't seem to be an SRT file."
+                )
 
     # Finish by saying how many files we shifted.
     if fileCount > 0:
@@ -323,4 +385,4 @@ def SRTTimeShifter(args):
 
 if __name__ == "__main__":
     # This won't be run when the file is imported
-    SRTTimeShifter(sys.argv)
+    SRTTimeShifter(sys.argv[1:])
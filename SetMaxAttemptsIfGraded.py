@@ -1,8 +1,9 @@
-# import XML libraries
-import xml.etree.ElementTree as ET
 import sys
 import os
 import argparse
+from functools import partial
+from RewriteAttributes import rewriteFile
+from ProblemIndex import indexProblems, autoAttempts
 
 instructions = """
 To use:
@@ -29,17 +30,6 @@ This code will help you make a first pass, not a final pass.
 Last update: March 15th 2018
 """
 
-# Here are all the problem types we work on:
-allProbtypes = [
-    "multiplechoiceresponse",
-    "choiceresponse",
-    "customresponse",
-    "formularesponse",
-    "numericalresponse",
-    "stringresponse",
-]
-
-
 parser = argparse.ArgumentParser(usage=instructions, add_help=False)
 parser.add_argument("-h", "--help", action="store_true")
 parser.add_argument("number", default="auto")
@@ -56,82 +46,54 @@ if not os.path.exists(args.directory):
 
 numfiles = 0
 
+# Read every problem once up front. Decisions below come from here.
+problemIndex = indexProblems(args.directory)
+
+
+# Set the max_attempts value on the root problem tag.
+def setMaxAttempts(filepath, tag, attributes, depth):
+    if depth > 0 or tag != "problem":
+        return
+
+    features = problemIndex.get(filepath)
+    if features is None:
+        return
+
+    # Only set max_attempts if the problem is graded.
+    if features["weight"] is None:
+        print("Something weird is stored in problem weight for " + filepath)
+        return
+    if features["weight"] <= 0:
+        return
+
+    # Auto-set the max_attempts value
+    if numberAttempts == "auto":
+        newValue = autoAttempts(features)
+        if newValue is False:
+            return
+        return {"max_attempts": newValue}
+
+    # Remove the max_attempts value to allow unlimited attempts or course default
+    elif numberAttempts == "default" or numberAttempts == "delete":
+        return {"max_attempts": None}
+
+    # For non-auto mode.
+    else:
+        return {"max_attempts": numberAttempts}
+
 
 # Walk through the problems folder
 for dirpath, dirnames, filenames in os.walk(args.directory):
     for eachfile in filenames:
-        thisProbType = []
 
-        # Get the XML for each file
-        tree = ET.parse(os.path.join(dirpath, eachfile))
-        root = tree.getroot()
+        # Only max_attempts changes. The rest of the file stays as-is.
+        filepath = os.path.join(dirpath, eachfile)
+        rootTag, changed = rewriteFile(filepath, partial(setMaxAttempts, filepath))
 
         # If this isn't a problem file, skip it.
-        if root.tag != "problem":
-            continue
-
-        # Only set max_attempts if the problem is graded.
-        try:
-            maxScore = float(root.attrib["weight"])
-        except KeyError:
-            # If weight isn't defined, it's 1.
-            maxScore = 1
-        except ValueError:
-            print("Something weird is stored in problem weight for " + eachfile)
+        if rootTag != "problem":
             continue
 
-        if maxScore > 0:
-
-            # Auto-set the max_attempts value
-            if numberAttempts == "auto":
-
-                # Check the problem type
-                for probtype in allProbtypes:
-                    for item in root.iter(probtype):
-                        thisProbType.append(item.tag)
-
-                # Check for number of choice elements
-                numberOptions = len(list(root.iter("choice")))
-
-                # Set number of attempts properly
-                if "multiplechoiceresponse" in thisProbType:
-                    if numberOptions <= 3:
-                        root.set("max_attempts", "1")
-                    elif numberOptions <= 6:
-                        root.set("max_attempts", "2")
-                    else:
-                        root.set("max_attempts", "3")
-
-                if "choiceresponse" in thisProbType:
-                    root.set(
-                        "max_attempts",
-                        str(numberOptions) if numberOptions <= 5 else "5",
-                    )
-
-                if "customresponse" in thisProbType or "stringresponse" in thisProbType:
-                    root.set("max_attempts", "5")
-
-                if (
-                    "formularesponse" in thisProbType
-                    or "numericalresponse" in thisProbType
-                ):
-                    root.set("max_attempts", "10")
-
-            # Remove the max_attempts value to allow unlimited attempts or course default
-            elif numberAttempts == "default":
-                try:
-                    del root.attrib["max_attempts"]
-                except:
-                    pass
-
-            # For non-auto mode.
-            else:
-                root.set("max_attempts", numberAttempts)
-
-        # Save the file
-        tree.write(
-            os.path.join(dirpath, eachfile), encoding="UTF-8", xml_declaration=False
-        )
         numfiles += 1
 
 
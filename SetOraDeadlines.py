@@ -7,13 +7,17 @@ import argparse
 import datetime as dt
 from typing import Final
 import xml.etree.ElementTree as ET
+from RewriteAttributes import rewriteFile
+from WriteJournal import startJournal, discardJournal, recordFile
 
 instructions = """
 To use:
 python3 SetOraDeadlines.py (-d deadline) (-s start) path/to/course/tarball
 
 Opens an edX course export, sets ORA dates, and re-zips it for import.
-If there are no ORAs, it makes a backup and exits.
+If there are no ORAs, it cleans up and exits.
+Every file it changes is recorded in a journal (course_journal/).
+To undo the changes, run python3 WriteJournal.py rollback path/to/course
 
 By default, this sets ORA deadlines to match the start and end of the course.
 It can also be set to a specific due date and time using the -d flag,
@@ -75,9 +79,6 @@ except ValueError:
 start_date = args.start if args.start else MAGIC_DATES["START"]
 due_date = args.deadline if args.deadline else MAGIC_DATES["END"]
 
-# Make a copy of the tarball for backup purposes
-shutil.copy2(args.tarball, args.tarball[:-7] + "_backup.tar.gz")
-
 # If there's an existing course/ folder, rename it.
 # Otherwise we'll be extracting the tarfile into it.
 if os.path.exists(os.path.join(folder_name, "course_previous")):
@@ -95,6 +96,10 @@ tar = tarfile.open(args.tarball, "r:gz")
 tar.extractall(folder_name)
 tar.close()
 
+# Instead of backing up the whole tarball, keep a journal of
+# just the files we change. WriteJournal.py can roll them back.
+startJournal(os.path.join(folder_name, "course"))
+
 # # Get course ID from the root file.
 root_file = os.path.join(folder_name, "course", "course.xml")
 root_tree = ET.parse(root_file)
@@ -103,45 +108,43 @@ run_id = root_root.attrib.get("url_name", "unknown")
 course_id = root_root.attrib.get("course", "unknown")
 course_nickname = course_id + "_" + run_id
 
+
+# Set the submission_start and submission_due attributes based on the command line arguments.
+# Set all <assessment> tags' start and due attributes to match the overall deadline,
+# but only inside an <openassessment>. ora_depth is how deep the current one is.
+def setOraDates(tag, attributes, depth):
+    global found_ora, ora_depth
+    if ora_depth is not None and depth <= ora_depth:
+        ora_depth = None
+    if tag == "openassessment":
+        found_ora = True
+        ora_depth = depth
+        return {"submission_start": start_date, "submission_due": due_date}
+    if tag == "assessment" and ora_depth is not None:
+        return {"start": start_date, "due": due_date}
+
+
 # Walk through the course folder.
 for dirpath, dirnames, filenames in os.walk(os.path.join(folder_name, "course")):
     for eachfile in filenames:
 
-        # Get the XML for each XML file in "problem", "vertical", and "openassessment" folders.
+        # Look at every XML file. The ORAs might be in "problem", "vertical",
+        # or "openassessment" folders, and might be the root tag or not.
+        # Only the date attributes change. The rest of the file stays as-is.
         if not eachfile.endswith(".xml"):
             continue
-        tree = ET.parse(os.path.join(dirpath, eachfile))
-        root = tree.getroot()
-
-        # Find any "openassessment" tags. Might be root, might not.
-        if root.tag == "openassessment":
-            openassessment = root
-        else:
-            openassessment = root.find(".//openassessment")
+        found_ora = False
+        ora_depth = None
+        root_tag, changed = rewriteFile(os.path.join(dirpath, eachfile), setOraDates)
 
-        if openassessment is None:
-            continue
-
-        # Set the submission_start and submission_due attributes based on the command line arguments.
-        openassessment.set("submission_start", start_date)
-        openassessment.set("submission_due", due_date)
-
-        # Find all <assessment> tags and set their submission_due attributes to match the overall deadline.
-        for assessment in root.findall(".//assessment"):
-            assessment.set("start", start_date)
-            assessment.set("due", due_date)
-
-        # Save the file
-        tree.write(
-            os.path.join(dirpath, eachfile), encoding="UTF-8", xml_declaration=False
-        )
-        numfiles += 1
+        if found_ora:
+            numfiles += 1
 
 
 if numfiles == 0:
     print("No ORAs found in this course.")
     print("Cleaning up.")
-    os.remove(args.tarball[:-7] + "_backup.tar.gz")
+    discardJournal(os.path.join(folder_name, "course"))
     shutil.rmtree(os.path.join(folder_name, "course"))
 else:
     print("ORA deadlines set for " + str(numfiles) + " files.")
@@ -155,20 +158,20 @@ else:
     )
 
     print("Creating tar.gz file... ")
-    with tarfile.open(
-        os.path.join(
-            folder_name,
-            course_nickname + "_new.tar.gz",
-        ),
-        "w:gz",
-    ) as tar:
+    new_tarball = os.path.join(folder_name, course_nickname + "_new.tar.gz")
+    # Build it under a temporary name so a failure never leaves half a tarball.
+    recordFile(new_tarball)
+    with tarfile.open(new_tarball + ".tmp", "w:gz") as tar:
         tar.add(
             # TODO: If the folder isn't named course/, make sure to fix here.
             os.path.join(folder_name, "course"),
             arcname=os.path.basename(os.path.join(folder_name, "course")),
         )
+    os.replace(new_tarball + ".tmp", new_tarball)
+    print("Tarball created: " + new_tarball)
     print(
-        "Tarball created: " + os.path.join(folder_name, course_nickname + "_new.tar.gz")
+        "To undo the changes to the course folder, run: python3 WriteJournal.py rollback "
+        + os.path.join(folder_name, "course")
     )
 
 print("Done.")
@@ -1,8 +1,7 @@
-# import XML libraries
-import xml.etree.ElementTree as ET
 import sys
 import os
 import argparse
+from RewriteAttributes import rewriteFile
 
 instructions = """
 To use:
@@ -56,52 +55,45 @@ if not os.path.exists(args.directory):
 
 numfiles = 0
 
+if answerSetting in allAnswerValues:
+    newValue = answerSetting
+elif answerSetting == "default" or answerSetting == "delete":
+    newValue = None
+else:
+    sys.exit("Invalid showanswer setting.")
+
+
+# Set the showanswer value on the root problem tag.
+def setShowAnswer(tag, attributes, depth):
+    if depth > 0 or tag != "problem":
+        return
+
+    # Only set showanswer if the problem is graded.
+    try:
+        # If weight isn't defined, it's 1.
+        maxScore = float(attributes.get("weight", 1))
+    except ValueError:
+        print("Something weird is stored in problem weight for " + eachfile)
+        return
+
+    if maxScore > 0:
+        return {"showanswer": newValue}
+    else:
+        # If it's ungraded, let the course default take over.
+        return {"showanswer": None}
+
+
 # Walk through the problems folder
 for dirpath, dirnames, filenames in os.walk(args.directory):
     for eachfile in filenames:
 
-        # Get the XML for each file
-        tree = ET.parse(os.path.join(dirpath, eachfile))
-        root = tree.getroot()
+        # Only the showanswer attribute changes. The rest of the file stays as-is.
+        rootTag, changed = rewriteFile(os.path.join(dirpath, eachfile), setShowAnswer)
 
         # If this isn't a problem file, skip it.
-        if root.tag != "problem":
-            continue
-
-        # Only set showanswer if the problem is graded.
-        try:
-            maxScore = float(root.attrib["weight"])
-        except KeyError:
-            # If weight isn't defined, it's 1.
-            maxScore = 1
-        except ValueError:
-            print("Something weird is stored in problem weight for " + eachfile)
+        if rootTag != "problem":
             continue
 
-        if maxScore > 0:
-
-            # Set the showanswer value
-            if answerSetting in allAnswerValues:
-                root.set("showanswer", answerSetting)
-            elif answerSetting == "default" or answerSetting == "delete":
-                try:
-                    del root.attrib["showanswer"]
-                except:
-                    pass
-            else:
-                sys.exit("Invalid showanswer setting.")
-
-        else:
-            # If it's ungraded, let the course default take over.
-            try:
-                del root.attrib["showanswer"]
-            except:
-                pass
-
-        # Save the file
-        tree.write(
-            os.path.join(dirpath, eachfile), encoding="UTF-8", xml_declaration=False
-        )
         numfiles += 1
 
 
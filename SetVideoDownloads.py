@@ -1,8 +1,7 @@
-# import XML libraries
-import xml.etree.ElementTree as ET
 import sys
 import os
 import argparse
+from RewriteAttributes import rewriteFile
 
 instructions = """
 To use:
@@ -36,44 +35,38 @@ if not os.path.exists(args.directory):
 
 numfiles = 0
 
+# The download_track and download_video values for each choice
+if choice == "true":
+    newValues = {"download_track": "true", "download_video": "true"}
+elif choice == "false":
+    newValues = {"download_track": "false", "download_video": "false"}
+elif choice == "video":
+    newValues = {"download_track": "false", "download_video": "true"}
+elif choice == "transcript":
+    newValues = {"download_track": "true", "download_video": "false"}
+elif choice == "reset":
+    newValues = {"download_track": None, "download_video": None}
+else:
+    sys.exit(instructions)
+
+
+# Set the values on the root video tag.
+def setDownloads(tag, attributes, depth):
+    if depth == 0 and tag == "video":
+        return newValues
+
+
 # Walk through the problems folder
 for dirpath, dirnames, filenames in os.walk(args.directory):
     for eachfile in filenames:
 
-        # Get the XML for each file
-        tree = ET.parse(os.path.join(dirpath, eachfile))
-        root = tree.getroot()
+        # Only the download attributes change. The rest of the file stays as-is.
+        rootTag, changed = rewriteFile(os.path.join(dirpath, eachfile), setDownloads)
 
         # If this isn't a video file, skip it.
-        if root.tag != "video":
+        if rootTag != "video":
             continue
 
-        # Set the download_track and download_video values
-        if choice == "true":
-            root.set("download_track", "true")
-            root.set("download_video", "true")
-        elif choice == "false":
-            root.set("download_track", "false")
-            root.set("download_video", "false")
-        elif choice == "video":
-            root.set("download_track", "false")
-            root.set("download_video", "true")
-        elif choice == "transcript":
-            root.set("download_track", "true")
-            root.set("download_video", "false")
-        elif choice == "reset":
-            try:
-                del root.attrib["download_track"]
-                del root.attrib["download_video"]
-            except:
-                pass
-        else:
-            sys.exit(instructions)
-
-        # Save the file
-        tree.write(
-            os.path.join(dirpath, eachfile), encoding="UTF-8", xml_declaration=False
-        )
         # Increment file counter
         numfiles += 1
 
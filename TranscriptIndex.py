@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import argparse
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from WriteJournal import openForWriting
+from SRTTimeShifter import (
+    readSRT,
+    writeSRT,
+    makeTranscript,
+    addCue,
+    msecToHMS,
+)
+
+instructions = """
+To use:
+python3 TranscriptIndex.py check path/to/transcripts_or_course (options)
+python3 TranscriptIndex.py at seconds path/to/transcript
+python3 TranscriptIndex.py convert path/to/transcripts (options)
+
+Works with transcripts in SRT format and in edX's own .sjson format.
+
+  check    Reports gaps (stretches with no caption showing) and overlaps
+           (two captions showing at once) in every transcript, along with
+           how much of the time from 0 to the last caption is covered.
+           For a course folder, checks the transcripts in static/.
+  at       Shows which caption is on screen at that time.
+  convert  Turns .srt files into .srt.sjson files, and .sjson files into
+           .srt files, next to the originals. Files that are already
+           there are left alone, unless you use -o.
+
+Options:
+  -g  Only report gaps longer than this many seconds. Defaults to 2.
+  -o  When converting, replace files that are already there.
+  -h  Print this message and exit.
+
+Last update: October 19th, 2026
+"""
+
+transcript_extensions = (".srt", ".sjson")
+
+
+#########################
+# Interval index
+# Captions sorted by start time, plus the latest end time seen so far
+# at each position. Finding what's on screen at a given time is a binary
+# search, and overlaps can only reach back as far as that running end.
+#########################
+def buildIndex(transcript):
+    starts = transcript["starts"]
+    if any(map(int.__gt__, starts[:-1], starts[1:])):
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        sorted_transcript = makeTranscript()
+        for i in order:
+            addCue(
+                sorted_transcript,
+                transcript["starts"][i],
+                transcript["ends"][i],
+                transcript["texts"][i],
+            )
+        transcript = sorted_transcript
+    return {
+        "starts": transcript["starts"],
+        "ends": transcript["ends"],
+        "texts": transcript["texts"],
+        "reach": array("q", accumulate(transcript["ends"], max)),
+    }
+
+
+# All the captions showing at this time (in msec), earliest first.
+def findCues(index, time):
+    found = []
+    i = bisect_right(index["starts"], time) - 1
+    while i >= 0 and index["reach"][i] > time:
+        if index["ends"][i] > time:
+            found.append(i)
+        i -= 1
+    return found[::-1]
+
+
+# The caption showing at this time, or None. If a few overlap,
+# the one that started last wins, since it's usually the one people read.
+def findCue(index, time):
+    found = findCues(index, time)
+    return found[-1] if found else None
+
+
+# Gaps longer than min_gap, overlaps, and how much of the time is covered.
+# Gaps and overlaps are lists of (start, end) in msec.
+def getCoverage(index, min_gap=0):
+    gaps = []
+    overlaps = []
+    covered = 0
+    # The latest end time so far. Anything that starts before it overlaps.
+    reach = 0
+    for start, end in zip(index["starts"], index["ends"]):
+        if start > reach:
+            if start - reach > min_gap:
+                gaps.append((reach, start))
+        elif start < reach:
+            overlaps.append((start, min(end, reach)))
+        covered += max(0, end - max(start, reach))
+        reach = max(reach, end)
+    return {
+        "gaps": gaps,
+        "overlaps": overlaps,
+        "covered": covered,
+        "length": reach,
+    }
+
+
+#########################
+# edX .sjson transcripts
+# {"start": [msec, ...], "end": [msec, ...], "text": ["...", ...]}
+#########################
+def readSJSON(f):
+    data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("Not an edX transcript")
+    starts = data.get("start", [])
+    ends = data.get("end", [])
+    texts = data.get("text", [])
+    # Trust the shortest list if they don't match.
+    count = min(len(starts), len(ends), len(texts))
+    transcript = makeTranscript()
+    transcript["starts"] = array("q", (int(t) for t in starts[:count]))
+    transcript["ends"] = array("q", (int(t) for t in ends[:count]))
+    transcript["texts"] = [str(t) for t in texts[:count]]
+    return transcript
+
+
+def writeSJSON(f, transcript):
+    json.dump(
+        {
+            "start": transcript["starts"].tolist(),
+            "end": transcript["ends"].tolist(),
+            # edX keeps one line per caption.
+            "text": [t.replace("\n", " ") for t in transcript["texts"]],
+        },
+        f,
+        ensure_ascii=False,
+        indent=2,
+    )
+
+
+def readTranscript(filepath):
+    with open(filepath, "r", encoding="utf-8-sig") as f:
+        if filepath.lower().endswith(".sjson"):
+            return readSJSON(f)
+        return readSRT(f)
+
+
+# Where the other format goes: next to the original.
+def getConvertedPath(filepath):
+    if filepath.lower().endswith(".sjson"):
+        new_path = filepath[: -len(".sjson")]
+        if not new_path.lower().endswith(".srt"):
+            new_path += ".srt"
+        return new_path
+    return filepath + ".sjson"
+
+
+# Writes the transcript in the other format, to new_path.
+def convertTranscript(filepath, new_path):
+    transcript = readTranscript(filepath)
+    with openForWriting(new_path) as f:
+        if new_path.lower().endswith(".sjson"):
+            writeSJSON(f, transcript)
+        else:
+            writeSRT(f, transcript)
+
+
+def findTranscripts(names):
+    found = []
+    for name in names:
+        # For a course, the transcripts are in static/.
+        if os.path.exists(os.path.join(name, "course.xml")):
+            name = os.path.join(name, "static")
+        if os.path.isdir(name):
+            for dirpath, dirnames, filenames in os.walk(name):
+                for f in sorted(filenames):
+                    if f.lower().endswith(transcript_extensions):
+                        found.append(os.path.join(dirpath, f))
+        elif name.lower().endswith(transcript_extensions):
+            found.append(name)
+    return found
+
+
+def TranscriptIndex(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-g", "--gap", type=float, default=2.0)
+    parser.add_argument("-o", "--overwrite", action="store_true")
+    parser.add_argument("command", nargs="?", default=None)
+    parser.add_argument("targets", nargs="*", default=[])
+
+    args = parser.parse_intermixed_args(argv)
+    if (
+        args.help
+        or args.command not in ["check", "at", "convert"]
+        or len(args.targets) == 0
+    ):
+        sys.exit(instructions)
+
+    if args.command == "at":
+        if len(args.targets) != 2:
+            sys.exit(instructions)
+        index = buildIndex(readTranscript(args.targets[1]))
+        time = int(round(float(args.targets[0]) * 1000))
+        found = findCues(index, time)
+        if len(found) == 0:
+            print("No caption at " + msecToHMS(time))
+        for i in found:
+            print(
+                msecToHMS(index["starts"][i])
+                + " --> "
+                + msecToHMS(index["ends"][i])
+                + "\n"
+                + index["texts"][i]
+            )
+        return
+
+    transcripts = findTranscripts(args.targets)
+    if len(transcripts) == 0:
+        sys.exit("No transcripts found.")
+
+    if args.command == "convert":
+        created = set()
+        for filepath in transcripts:
+            # Don't convert what we just wrote back over its original.
+            if filepath in created:
+                continue
+            new_path = getConvertedPath(filepath)
+            if os.path.exists(new_path) and not args.overwrite:
+                print("Skipping " + filepath + ": " + new_path + " already exists.")
+                continue
+            try:
+                convertTranscript(filepath, new_path)
+            except (ValueError, UnicodeDecodeError) as e:
+                print("Couldn't convert " + filepath + ": " + str(e))
+                continue
+            created.add(new_path)
+            print(filepath + " -> " + new_path)
+        return
+
+    min_gap = int(round(args.gap * 1000))
+    for filepath in transcripts:
+        try:
+            coverage = getCoverage(buildIndex(readTranscript(filepath)), min_gap)
+        except (ValueError, UnicodeDecodeError) as e:
+            print(filepath + "\tCouldn't read: " + str(e))
+            continue
+        percent = 0.0
+        if coverage["length"] > 0:
+            percent = round(100.0 * coverage["covered"] / coverage["length"], 1)
+        print(
+            filepath
+            + "\t"
+            + str(percent)
+            + "% covered, "
+            + str(len(coverage["gaps"]))
+            + " gaps, "
+            + str(len(coverage["overlaps"]))
+            + " overlaps"
+        )
+        for start, end in coverage["gaps"]:
+            print("    gap     " + msecToHMS(start) + " --> " + msecToHMS(end))
+        for start, end in coverage["overlaps"]:
+            print("    overlap " + msecToHMS(start) + " --> " + msecToHMS(end))
+
+
+if __name__ == "__main__":
+    TranscriptIndex(sys.argv[1:])
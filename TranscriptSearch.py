@@ -0,0 +1,409 @@
+import os
+import sys
+import re
+import json
+import html
+import sqlite3
+import argparse
+from array import array
+from bisect import bisect_right
+from CourseOutline import walkOutline, describeParentage
+from CourseSearch import tokenize, getTermIds
+from TranscriptIndex import readTranscript
+from SRTTimeShifter import msecToHMS
+
+instructions = """
+To use:
+python3 TranscriptSearch.py index path/to/course/folder (more course folders) (options)
+python3 TranscriptSearch.py find "words to find" (options)
+
+Keeps a search index of every video transcript in a course, so you can
+answer "where in the videos do we mention X?"
+
+  index  Adds courses to the index, or brings them up to date.
+         Reads every transcript (.srt and .sjson) in static/, and the
+         video components, to know which video and unit each one is for.
+         Only transcripts that changed since last time are read again.
+  find   Finds the words, in that order, in every indexed transcript.
+         For each hit you get the time in the video where that caption
+         starts, the section, subsection, and unit, and the caption.
+         YouTube videos also get a link that starts at that time.
+         Punctuation and capitalization don't matter.
+
+The index is kept in ~/.hxxml/transcript_search.sqlite unless you pick
+another file with -i.
+
+Options:
+  -i  Index file to use, e.g. -i=transcripts.sqlite
+  -c  Only search in this course folder.
+  -l  Only search transcripts in this language, e.g. -l=en
+  -h  Print this help message and exit.
+
+Last update: October 19th, 2026
+"""
+
+index_file = os.path.join(os.path.expanduser("~"), ".hxxml", "transcript_search.sqlite")
+
+# One row per transcript per video. Transcripts that no video uses
+# are still indexed, with no video or location.
+# cue_tokens is where each cue starts in the file's list of words, and
+# cue_starts is when it starts in the video, in msec.
+schema = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    doc_id INTEGER PRIMARY KEY,
+    course_folder TEXT,
+    path TEXT,
+    video TEXT,
+    language TEXT,
+    location TEXT,
+    youtube_id TEXT,
+    mtime REAL,
+    cue_tokens BLOB,
+    cue_starts BLOB,
+    UNIQUE (course_folder, path, video)
+);
+CREATE TABLE IF NOT EXISTS terms (
+    term_id INTEGER PRIMARY KEY,
+    term TEXT UNIQUE
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER,
+    doc_id INTEGER,
+    positions BLOB,
+    PRIMARY KEY (term_id, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+"""
+
+# Bumped whenever what's stored changes. Older indexes are emptied and rebuilt.
+# 1: entities and apostrophes in captions are handled, and positions
+#    are 8 bytes each.
+index_version = 1
+
+transcript_extensions = (".srt", ".sjson")
+
+# Apostrophes inside words, so "I'm" is one word, like people type it.
+apostrophe_regex = re.compile(r"(?<=\w)['\u2019](?=\w)")
+
+
+# The words in a caption or a search. edX writes apostrophes
+# and such as &#39; in its transcripts.
+def getWords(text):
+    return tokenize(apostrophe_regex.sub("", html.unescape(text)))
+
+
+def getYouTubeID(element):
+    if element.get("youtube_id_1_0"):
+        return element.get("youtube_id_1_0")
+    # youtube="0.75:abc,1.00:def,1.25:ghi"
+    for speed in element.get("youtube", "").split(","):
+        if speed.strip().startswith("1.00:"):
+            return speed.strip()[len("1.00:") :]
+    return ""
+
+
+# Which transcripts each video uses, as {language: filename in static/}.
+def getVideoTranscripts(element):
+    transcripts = dict()
+    if element.get("sub"):
+        transcripts["en"] = "subs_" + element.get("sub") + ".srt.sjson"
+    try:
+        transcripts.update(json.loads(element.get("transcripts", "{}")))
+    except ValueError:
+        pass
+    for t in element.findall("transcript"):
+        if t.get("src"):
+            transcripts[t.get("language", "")] = t.get("src")
+    return transcripts
+
+
+# Everything we want in the index for one course, keyed by
+# (path relative to the course folder, video url_name).
+def getWantedTranscripts(course_folder):
+    wanted = dict()
+    for item in walkOutline(course_folder):
+        element = item["element"]
+        if element.tag != "video":
+            continue
+        location = describeParentage(item["parentage"])
+        name = element.get("display_name", "")
+        if name:
+            location += " > " + name if location else name
+        transcripts = getVideoTranscripts(element)
+        for language in transcripts:
+            relpath = os.path.join("static", transcripts[language])
+            if os.path.isfile(os.path.join(course_folder, relpath)):
+                wanted[(relpath, element.get("url_name", ""))] = {
+                    "language": language,
+                    "location": location,
+                    "youtube_id": getYouTubeID(element),
+                }
+
+    # Transcripts that aren't attached to anything in the outline.
+    used = set(relpath for relpath, video in wanted)
+    static_folder = os.path.join(course_folder, "static")
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        for eachfile in filenames:
+            if not eachfile.lower().endswith(transcript_extensions):
+                continue
+            relpath = os.path.relpath(os.path.join(dirpath, eachfile), course_folder)
+            if relpath not in used:
+                wanted[(relpath, "")] = {
+                    "language": "",
+                    "location": "",
+                    "youtube_id": "",
+                }
+    return wanted
+
+
+def openIndex(filename):
+    folder = os.path.dirname(os.path.abspath(filename))
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    connection = sqlite3.connect(filename)
+    if connection.execute("PRAGMA user_version").fetchone()[0] != index_version:
+        connection.executescript(
+            "DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS terms; "
+            "DROP TABLE IF EXISTS transcripts; "
+            "PRAGMA user_version = " + str(index_version) + ";"
+        )
+    connection.executescript(schema)
+    return connection
+
+
+def removeTranscript(connection, doc_id):
+    connection.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+    connection.execute("DELETE FROM transcripts WHERE doc_id = ?", (doc_id,))
+
+
+# Brings the index up to date for one course.
+# Returns how many transcripts were (re)indexed and how many were removed.
+def indexCourse(connection, course_folder):
+    course_folder = os.path.abspath(course_folder)
+    wanted = getWantedTranscripts(course_folder)
+    known = {
+        (path, video): (doc_id, (language, location, youtube_id, mtime))
+        for doc_id, path, video, language, location, youtube_id, mtime in (
+            connection.execute(
+                "SELECT doc_id, path, video, language, location, youtube_id, mtime "
+                "FROM transcripts WHERE course_folder = ?",
+                (course_folder,),
+            )
+        )
+    }
+    term_ids = dict()
+    num_indexed = 0
+
+    with connection:
+        for relpath, video in sorted(wanted):
+            info = wanted[(relpath, video)]
+            mtime = os.path.getmtime(os.path.join(course_folder, relpath))
+            if (relpath, video) in known:
+                doc_id, old = known.pop((relpath, video))
+                if old == (
+                    info["language"],
+                    info["location"],
+                    info["youtube_id"],
+                    mtime,
+                ):
+                    continue
+                removeTranscript(connection, doc_id)
+
+            try:
+                transcript = readTranscript(os.path.join(course_folder, relpath))
+            except (ValueError, UnicodeDecodeError):
+                continue
+
+            # Every position of every word, and where each cue starts.
+            positions = dict()
+            cue_tokens = array("q")
+            count = 0
+            for text in transcript["texts"]:
+                cue_tokens.append(count)
+                for token in getWords(text):
+                    positions.setdefault(token, array("q")).append(count)
+                    count += 1
+
+            doc_id = connection.execute(
+                "INSERT INTO transcripts (course_folder, path, video, language, "
+                "location, youtube_id, mtime, cue_tokens, cue_starts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    course_folder,
+                    relpath,
+                    video,
+                    info["language"],
+                    info["location"],
+                    info["youtube_id"],
+                    mtime,
+                    cue_tokens.tobytes(),
+                    transcript["starts"].tobytes(),
+                ),
+            ).lastrowid
+            terms = list(positions)
+            connection.executemany(
+                "INSERT INTO postings VALUES (?, ?, ?)",
+                [
+                    (term_id, doc_id, positions[t].tobytes())
+                    for term_id, t in zip(
+                        getTermIds(connection, terms, term_ids), terms
+                    )
+                ],
+            )
+            num_indexed += 1
+
+        # Anything we didn't see this time is gone from the course.
+        for key in known:
+            removeTranscript(connection, known[key][0])
+
+    return num_indexed, len(known)
+
+
+# Finds the words as a phrase. Returns a list of dicts with the transcript's
+# details and "cues": the cues the phrase starts in, as (cue number, msec).
+def findPhrase(connection, phrase, course_folder=None, language=None):
+    words = getWords(phrase)
+    if len(words) == 0:
+        return []
+
+    term_ids = []
+    for w in words:
+        row = connection.execute(
+            "SELECT term_id FROM terms WHERE term = ?", (w,)
+        ).fetchone()
+        if row is None:
+            return []
+        term_ids.append(row[0])
+
+    postings = []
+    for term_id in term_ids:
+        postings.append(
+            {
+                doc_id: blob
+                for doc_id, blob in connection.execute(
+                    "SELECT doc_id, positions FROM postings WHERE term_id = ?",
+                    (term_id,),
+                )
+            }
+        )
+    # Start with the rarest word, then check the others only in those files.
+    candidates = set(min(postings, key=len))
+    for p in postings:
+        candidates &= p.keys()
+
+    results = []
+    for doc_id in candidates:
+        row = connection.execute(
+            "SELECT course_folder, path, video, language, location, youtube_id, "
+            "cue_tokens, cue_starts FROM transcripts WHERE doc_id = ?",
+            (doc_id,),
+        ).fetchone()
+        folder, path, video, doc_language, location, youtube_id = row[:6]
+        if course_folder is not None and folder != os.path.abspath(course_folder):
+            continue
+        if language is not None and doc_language != language:
+            continue
+
+        starts = None
+        for offset, p in enumerate(postings):
+            positions = array("q")
+            positions.frombytes(p[doc_id])
+            shifted = set(x - offset for x in positions)
+            starts = shifted if starts is None else starts & shifted
+            if len(starts) == 0:
+                break
+        if not starts:
+            continue
+
+        cue_tokens = array("q")
+        cue_tokens.frombytes(row[6])
+        cue_starts = array("q")
+        cue_starts.frombytes(row[7])
+        cues = sorted(set(bisect_right(cue_tokens, s) - 1 for s in starts))
+        results.append(
+            {
+                "course_folder": folder,
+                "path": path,
+                "video": video,
+                "language": doc_language,
+                "location": location,
+                "youtube_id": youtube_id,
+                "cues": [(i, cue_starts[i]) for i in cues],
+            }
+        )
+
+    results.sort(key=lambda r: (r["course_folder"], r["location"], r["path"]))
+    return results
+
+
+def makeLink(youtube_id, msec):
+    return "https://youtu.be/" + youtube_id + "?t=" + str(msec // 1000)
+
+
+def TranscriptSearch(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("command", nargs="?", default=None)
+    parser.add_argument("targets", nargs="*", default=[])
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-i", "--index", default=index_file)
+    parser.add_argument("-c", "--course", default=None)
+    parser.add_argument("-l", "--language", default=None)
+
+    args = parser.parse_args(argv)
+    if args.help or args.command not in ["index", "find"] or len(args.targets) == 0:
+        sys.exit(instructions)
+
+    connection = openIndex(args.index)
+
+    if args.command == "index":
+        for course_folder in args.targets:
+            if not os.path.exists(os.path.join(course_folder, "course.xml")):
+                print("No course.xml file found in " + course_folder)
+                continue
+            num_indexed, num_removed = indexCourse(connection, course_folder)
+            print(
+                course_folder
+                + ": "
+                + str(num_indexed)
+                + " transcripts indexed, "
+                + str(num_removed)
+                + " removed."
+            )
+    else:
+        results = findPhrase(
+            connection, " ".join(args.targets), args.course, args.language
+        )
+        num_hits = 0
+        for result in results:
+            filepath = os.path.join(result["course_folder"], result["path"])
+            print(
+                (result["location"] or "(not in the outline)")
+                + ("\t[" + result["language"] + "]" if result["language"] else "")
+                + "\t"
+                + filepath
+            )
+            # Show the captions themselves, if the file's still there.
+            try:
+                texts = readTranscript(filepath)["texts"]
+            except (OSError, ValueError, UnicodeDecodeError):
+                texts = []
+            for i, msec in result["cues"]:
+                line = "    " + msecToHMS(msec)[:8]
+                if result["youtube_id"]:
+                    line += "  " + makeLink(result["youtube_id"], msec)
+                if i < len(texts):
+                    line += "  " + html.unescape(texts[i]).replace("\n", " ")
+                print(line)
+                num_hits += 1
+        print(
+            str(num_hits)
+            + " hits in "
+            + str(len(results))
+            + (" transcript." if len(results) == 1 else " transcripts.")
+        )
+
+    connection.close()
+
+
+if __name__ == "__main__":
+    TranscriptSearch(sys.argv[1:])
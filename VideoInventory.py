@@ -0,0 +1,348 @@
+import os
+import sys
+import json
+import math
+import argparse
+from array import array
+from xml.etree import ElementTree as ET
+from CourseOutline import walkOutline
+
+instructions = """
+To use:
+python3 VideoInventory.py path/to/course/folder (more course folders) (options)
+
+Reads every video in one or more courses once, and reports video minutes
+for each section (usually each week) of each course, plus the median
+video length across all of them.
+
+Finds videos in the course outline (both inline and in the video/ folder),
+along with videos in video/ that aren't in the outline.
+
+Options:
+  -s  Report by subsection instead of by section.
+  -h  Print this help message and exit.
+
+Last update: October 19th, 2026
+"""
+
+
+#########################
+# Streaming quantile sketch
+# Keeps counts in buckets that grow by a fixed ratio, so any quantile
+# comes back within 1% of the true value, in a fixed amount of memory,
+# no matter how many videos we've seen. Sketches from different courses
+# can be merged without going back to the videos.
+#########################
+def makeSketch(accuracy=0.01):
+    return {
+        "gamma": (1 + accuracy) / (1 - accuracy),
+        "buckets": dict(),
+        "zeros": 0,
+        "count": 0,
+    }
+
+
+def addToSketch(sketch, value):
+    sketch["count"] += 1
+    if value <= 0:
+        sketch["zeros"] += 1
+        return
+    bucket = math.ceil(math.log(value, sketch["gamma"]))
+    sketch["buckets"][bucket] = sketch["buckets"].get(bucket, 0) + 1
+
+
+def mergeSketches(sketch, other):
+    sketch["count"] += other["count"]
+    sketch["zeros"] += other["zeros"]
+    for bucket in other["buckets"]:
+        sketch["buckets"][bucket] = (
+            sketch["buckets"].get(bucket, 0) + other["buckets"][bucket]
+        )
+
+
+# q is from 0 to 1. Returns None if the sketch is empty.
+def getQuantile(sketch, q):
+    if sketch["count"] == 0:
+        return None
+    rank = q * (sketch["count"] - 1)
+    seen = sketch["zeros"]
+    if rank < seen:
+        return 0.0
+    gamma = sketch["gamma"]
+    for bucket in sorted(sketch["buckets"]):
+        seen += sketch["buckets"][bucket]
+        if rank < seen:
+            # Middle of the bucket, so we're never off by more than the accuracy.
+            return 2 * gamma**bucket / (gamma + 1)
+    return 2 * gamma ** max(sketch["buckets"]) / (gamma + 1)
+
+
+#########################
+# The inventory itself
+# One entry per video, stored column by column in arrays.
+# Download flags are 1 (true), 0 (false), or -1 (not set).
+# Durations are NaN when the video doesn't say.
+# Profiles and transcript languages are lists per video, so they're stored
+# flat, with a start offset for each video (and one extra at the end).
+#########################
+def makeInventory():
+    return {
+        "url_name": [],
+        "filepath": [],
+        "duration": array("d"),
+        "download_video": array("b"),
+        "download_track": array("b"),
+        "youtube": array("b"),
+        "alternative_source": array("b"),
+        "chapter": array("l"),
+        "sequential": array("l"),
+        "profile_ids": array("H"),
+        "profile_start": array("l", [0]),
+        "language_ids": array("H"),
+        "language_start": array("l", [0]),
+        # Lookup lists for the columns above.
+        "chapters": [],  # (url_name, display_name)
+        "sequentials": [],
+        "profile_names": [],
+        "language_names": [],
+    }
+
+
+def isYouTube(url):
+    return "youtube.com" in url or "youtu.be" in url
+
+
+def getFlag(value):
+    if value is None:
+        return -1
+    return 1 if value.lower() == "true" else 0
+
+
+# Finds the position of a name in a lookup list, adding it if it's new.
+def getLookup(lookup, name):
+    if name not in lookup:
+        lookup.append(name)
+    return lookup.index(name)
+
+
+def addVideo(inventory, root, filepath, parentage):
+    inventory["url_name"].append(root.attrib.get("url_name", ""))
+    inventory["filepath"].append(filepath)
+
+    duration = float("nan")
+    asset_tag = root.find("video_asset")
+    if asset_tag is not None and asset_tag.attrib.get("duration", False):
+        try:
+            duration = float(asset_tag.attrib["duration"])
+        except ValueError:
+            pass
+    inventory["duration"].append(duration)
+
+    inventory["download_video"].append(getFlag(root.attrib.get("download_video")))
+    inventory["download_track"].append(getFlag(root.attrib.get("download_track")))
+
+    # YouTube can be in several attributes (youtube, youtube_id_1_0...)
+    # or in an encoded_video tag.
+    youtube = any(
+        "youtube" in att and root.attrib[att].strip() != "" for att in root.attrib
+    )
+
+    # Is there at least one non-YouTube source?
+    # These are stored in <source> or <encoded_video> tags, or in html5_sources.
+    alternative = False
+    for child in root.findall("source"):
+        src = child.get("src", "")
+        if src != "" and not isYouTube(src):
+            alternative = True
+    try:
+        for src in json.loads(root.attrib.get("html5_sources", "[]")):
+            if src != "" and not isYouTube(src):
+                alternative = True
+    except ValueError:
+        pass
+
+    for child in root.iter("encoded_video"):
+        profile = child.get("profile", "")
+        if profile == "youtube":
+            youtube = True
+        elif child.get("url", "") != "" and not isYouTube(child.get("url", "")):
+            alternative = True
+        if profile != "":
+            inventory["profile_ids"].append(
+                getLookup(inventory["profile_names"], profile)
+            )
+    inventory["profile_start"].append(len(inventory["profile_ids"]))
+    inventory["youtube"].append(1 if youtube else 0)
+    inventory["alternative_source"].append(1 if alternative else 0)
+
+    # Transcripts can be listed as child tags or in a JSON attribute.
+    languages = [t.get("language", "") for t in root.findall("transcript")]
+    try:
+        languages += list(json.loads(root.attrib.get("transcripts", "{}")).keys())
+    except ValueError:
+        pass
+    if root.attrib.get("sub", "") != "":
+        languages.append("en")
+    for language in sorted(set(l for l in languages if l != "")):
+        inventory["language_ids"].append(
+            getLookup(inventory["language_names"], language)
+        )
+    inventory["language_start"].append(len(inventory["language_ids"]))
+
+    for level in ["chapter", "sequential"]:
+        if level in parentage:
+            inventory[level].append(getLookup(inventory[level + "s"], parentage[level]))
+        else:
+            inventory[level].append(-1)
+
+
+# Reads every video in the course, in outline order.
+# Videos in video/ that aren't in the outline come last, with no section.
+def buildInventory(course_folder, include_drafts=False):
+    inventory = makeInventory()
+    seen = set()
+
+    for item in walkOutline(course_folder):
+        if item["element"].tag != "video":
+            continue
+        addVideo(inventory, item["element"], item["filepath"], item["parentage"])
+        if item["filepath"] is not None:
+            seen.add(os.path.abspath(item["filepath"]))
+
+    folders = [os.path.join(course_folder, "video")]
+    if include_drafts:
+        folders.append(os.path.join(course_folder, "drafts", "video"))
+    for folder in folders:
+        for dirpath, dirnames, filenames in os.walk(folder):
+            for eachfile in sorted(filenames):
+                filepath = os.path.join(dirpath, eachfile)
+                if os.path.abspath(filepath) in seen or not eachfile.endswith(".xml"):
+                    continue
+                try:
+                    root = ET.parse(filepath).getroot()
+                except ET.ParseError:
+                    continue
+                if root.tag != "video":
+                    continue
+                if "url_name" not in root.attrib:
+                    root.set("url_name", eachfile[:-4])
+                addVideo(inventory, root, filepath, {})
+
+    return inventory
+
+
+def getProfiles(inventory, i):
+    ids = inventory["profile_ids"][
+        inventory["profile_start"][i] : inventory["profile_start"][i + 1]
+    ]
+    return [inventory["profile_names"][x] for x in ids]
+
+
+def getLanguages(inventory, i):
+    ids = inventory["language_ids"][
+        inventory["language_start"][i] : inventory["language_start"][i + 1]
+    ]
+    return [inventory["language_names"][x] for x in ids]
+
+
+# Durations we actually know.
+def getKnownDurations(inventory):
+    return array("d", (d for d in inventory["duration"] if not math.isnan(d)))
+
+
+# Totals for each section (or subsection), in course order.
+# Videos outside the outline are grouped under None at the end.
+def rollupInventory(inventory, level="chapter"):
+    lookup = inventory[level + "s"]
+    rollup = [
+        {
+            "url_name": url_name,
+            "display_name": display_name,
+            "videos": 0,
+            "seconds": 0.0,
+            "unknown_length": 0,
+            "downloadable": 0,
+        }
+        for url_name, display_name in lookup
+    ]
+    rollup.append(
+        {
+            "url_name": None,
+            "display_name": "(not in the outline)",
+            "videos": 0,
+            "seconds": 0.0,
+            "unknown_length": 0,
+            "downloadable": 0,
+        }
+    )
+
+    column = inventory[level]
+    durations = inventory["duration"]
+    downloads = inventory["download_video"]
+    for i in range(len(column)):
+        row = rollup[column[i]]  # -1 is the last one, outside the outline.
+        row["videos"] += 1
+        if math.isnan(durations[i]):
+            row["unknown_length"] += 1
+        else:
+            row["seconds"] += durations[i]
+        if downloads[i] == 1:
+            row["downloadable"] += 1
+
+    if rollup[-1]["videos"] == 0:
+        rollup.pop()
+    return rollup
+
+
+def VideoInventory(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-s", "--subsections", action="store_true")
+    parser.add_argument("course_folders", nargs="*", default=[])
+
+    args = parser.parse_args()
+    if args.help or len(args.course_folders) == 0:
+        sys.exit(instructions)
+
+    level = "sequential" if args.subsections else "chapter"
+    all_videos = makeSketch()
+    num_videos = 0
+    total_seconds = 0.0
+
+    for course_folder in args.course_folders:
+        if not os.path.exists(os.path.join(course_folder, "course.xml")):
+            print("No course.xml file found in " + course_folder)
+            continue
+
+        inventory = buildInventory(course_folder)
+        print(course_folder)
+        print("minutes\tvideos\tno_length\tdownloadable\tname")
+        for row in rollupInventory(inventory, level):
+            print(
+                str(round(row["seconds"] / 60, 1))
+                + "\t"
+                + str(row["videos"])
+                + "\t"
+                + str(row["unknown_length"])
+                + "\t"
+                + str(row["downloadable"])
+                + "\t"
+                + row["display_name"]
+            )
+        print("")
+
+        known = getKnownDurations(inventory)
+        for d in known:
+            addToSketch(all_videos, d)
+        num_videos += len(inventory["url_name"])
+        total_seconds += sum(known)
+
+    median = getQuantile(all_videos, 0.5)
+    print("Videos: " + str(num_videos))
+    print("Total minutes: " + str(round(total_seconds / 60, 1)))
+    if median is not None:
+        print("Median minutes: " + str(round(median / 60, 1)))
+
+
+if __name__ == "__main__":
+    VideoInventory(sys.argv)
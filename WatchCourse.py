@@ -0,0 +1,322 @@
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+from xml.etree import ElementTree as ET
+from CourseOutline import walkOutline, walkElement
+from FindXMLErrors import findXMLError
+from NameThatPage import leaf_nodes, makeLocationComment, writeLocationComment
+from static_file_sorter.SortStaticFiles import (
+    always_keep,
+    getFilesFromHTML,
+    getFilesFromXML,
+    getFilesFromJSON,
+    getFilesFromCSS,
+    getFilesFromJavascript,
+)
+
+instructions = """
+To use:
+python3 WatchCourse.py path/to/course/folder (options)
+
+Keeps an eye on an extracted course while you edit it. Every time you
+save, it checks only the files that changed:
+  - XML errors, like FindXMLErrors.py
+  - location comments, like NameThatPage.py, for the changed files and
+    anything under them whose section, subsection, or unit changed
+  - links to static files, like SortStaticFiles.py: what's linked but
+    missing from static/, and which static files aren't used any more.
+    Nothing is moved.
+
+It reads the whole course once when it starts, then keeps it in memory.
+Press Ctrl-C to stop.
+
+Options:
+  -i  Seconds between checks for changes. Defaults to 1.
+  -n  Don't add location comments.
+  -h  Print this help message and exit.
+
+Last update: October 19th, 2026
+"""
+
+# Which files can link to static files, and how we read them.
+link_readers = {
+    "html": {".html": getFilesFromHTML},
+    "tabs": {".html": getFilesFromHTML},
+    "problem": {".xml": getFilesFromXML},
+    "vertical": {".xml": getFilesFromXML},
+    "video": {".xml": getFilesFromXML},
+    "static": {
+        ".html": getFilesFromHTML,
+        ".xml": getFilesFromXML,
+        ".json": getFilesFromJSON,
+        ".css": getFilesFromCSS,
+        ".js": getFilesFromJavascript,
+    },
+}
+
+# Tags that NameThatPage puts location comments on.
+commented_tags = ["chapter", "sequential", "vertical"] + leaf_nodes
+
+
+def say(text):
+    print(time.strftime("%H:%M:%S") + "  " + text)
+
+
+# Size and modification time of every file in the course.
+def takeSnapshot(course_folder):
+    snapshot = dict()
+    for dirpath, dirnames, filenames in os.walk(course_folder):
+        for eachfile in filenames:
+            # Skip half-written temporary files.
+            if eachfile.startswith(".tmp_"):
+                continue
+            filepath = os.path.join(dirpath, eachfile)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            snapshot[filepath] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def makeOutlineEntry(item):
+    element = item["element"]
+    return {
+        "tag": element.tag,
+        "url_name": element.attrib.get("url_name", ""),
+        "display_name": element.attrib.get("display_name", element.tag),
+        "parentage": item["parentage"],
+        "ancestors": item["ancestors"],
+    }
+
+
+# One entry per file in the outline, keyed by file path.
+def buildOutline(course_folder):
+    outline = dict()
+    for item in walkOutline(course_folder):
+        if item["filepath"] is not None:
+            outline[item["filepath"]] = makeOutlineEntry(item)
+    return outline
+
+
+# Reads one file from the outline again, along with everything under it.
+# Returns the files whose place in the course (or name) changed.
+def rewalkOutline(course_folder, outline, filepath):
+    entry = outline[filepath]
+    root = ET.parse(filepath).getroot()
+    root.set("url_name", entry["url_name"])
+    # The parentage coming in from above, without this file's own level.
+    parentage = {k: v for k, v in entry["parentage"].items() if k != entry["tag"]}
+
+    old = {
+        f: outline.pop(f)
+        for f in list(outline)
+        if f == filepath or filepath in outline[f]["ancestors"]
+    }
+    new = []
+    for item in walkElement(
+        course_folder, root, filepath, parentage, entry["ancestors"]
+    ):
+        if item["filepath"] is not None:
+            outline[item["filepath"]] = makeOutlineEntry(item)
+            new.append(item["filepath"])
+
+    moved = set()
+    for f in new:
+        if f not in old:
+            moved.add(f)
+        elif (outline[f]["parentage"], outline[f]["display_name"]) != (
+            old[f]["parentage"],
+            old[f]["display_name"],
+        ):
+            moved.add(f)
+    return moved
+
+
+# NameThatPage keeps track of names in its own way.
+def getNameThatPageParentage(entry):
+    parentage = entry["parentage"]
+    return {
+        "section": parentage.get("chapter", ("", ""))[1],
+        "subsection": parentage.get("sequential", ("", ""))[1],
+        "page": parentage.get("vertical", ("", ""))[1],
+        "component": entry["display_name"],
+    }
+
+
+# Which static files one file links to, or None if it can't link to any.
+def getLinks(course_folder, filepath):
+    parts = os.path.relpath(filepath, course_folder).split(os.sep)
+    if parts[0] == "drafts":
+        parts = parts[1:]
+    readers = link_readers.get(parts[0], {})
+    reader = readers.get(os.path.splitext(filepath)[1].lower(), None)
+    if reader is None:
+        return None
+    # The readers print as they go. We report our own way.
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return set(reader(filepath, course_folder)["files"])
+    except Exception:
+        return set()
+
+
+def getStaticFiles(snapshot, course_folder):
+    static_folder = os.path.join(course_folder, "static")
+    return set(
+        os.path.basename(f)
+        for f in snapshot
+        if os.path.dirname(f) == static_folder
+        or os.path.dirname(os.path.dirname(f)) == static_folder
+    )
+
+
+def isUsed(static_file, linked):
+    return (
+        static_file in linked
+        or static_file.replace(" ", "_") in linked
+        or static_file in always_keep
+    )
+
+
+def WatchCourse(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-i", "--interval", type=float, default=1.0)
+    parser.add_argument("-n", "--no-comments", action="store_true")
+    parser.add_argument("course_folder", nargs="?", default=None)
+
+    args = parser.parse_args()
+    if args.help or args.course_folder is None:
+        sys.exit(instructions)
+
+    course_folder = os.path.abspath(args.course_folder)
+    course_file = os.path.join(course_folder, "course.xml")
+    if not os.path.exists(course_file):
+        sys.exit("No course.xml file found in " + course_folder)
+
+    # Read everything once.
+    say("Reading " + course_folder)
+    snapshot = takeSnapshot(course_folder)
+    outline = buildOutline(course_folder)
+    links = dict()
+    for filepath in snapshot:
+        file_links = getLinks(course_folder, filepath)
+        if file_links is not None:
+            links[filepath] = file_links
+    for filepath in snapshot:
+        if filepath.endswith(".xml"):
+            error = findXMLError(filepath)
+            if error is not None:
+                say(os.path.relpath(filepath, course_folder) + "  " + error)
+    static_files = getStaticFiles(snapshot, course_folder)
+    linked = set().union(*links.values())
+    unused = set(f for f in static_files if not isUsed(f, linked))
+    say(
+        str(len(snapshot))
+        + " files, "
+        + str(len(outline))
+        + " in the outline, "
+        + str(len(unused))
+        + " unused static files. Watching for changes."
+    )
+
+    try:
+        while True:
+            time.sleep(args.interval)
+            new_snapshot = takeSnapshot(course_folder)
+            changed = [f for f in new_snapshot if snapshot.get(f) != new_snapshot[f]]
+            removed = [f for f in snapshot if f not in new_snapshot]
+            snapshot = new_snapshot
+            if len(changed) == 0 and len(removed) == 0:
+                continue
+
+            for filepath in removed:
+                say("Removed " + os.path.relpath(filepath, course_folder))
+                links.pop(filepath, None)
+
+            # XML errors. Broken files don't go any further.
+            broken = set()
+            for filepath in changed:
+                if filepath.endswith(".xml"):
+                    error = findXMLError(filepath)
+                    if error is not None:
+                        say(os.path.relpath(filepath, course_folder) + "  " + error)
+                        broken.add(filepath)
+
+            # Course structure and location comments.
+            moved = set()
+            if course_file in changed:
+                old_outline = outline
+                try:
+                    outline = buildOutline(course_folder)
+                except ET.ParseError:
+                    outline = old_outline
+                moved = set(
+                    f
+                    for f in outline
+                    if f not in old_outline or outline[f] != old_outline[f]
+                )
+            else:
+                for filepath in changed:
+                    if filepath in outline and filepath not in broken:
+                        try:
+                            moved |= rewalkOutline(course_folder, outline, filepath)
+                        except ET.ParseError:
+                            pass
+            num_commented = 0
+            if not args.no_comments:
+                for filepath in sorted(moved):
+                    entry = outline[filepath]
+                    if entry["tag"] not in commented_tags or filepath in broken:
+                        continue
+                    if writeLocationComment(
+                        filepath,
+                        makeLocationComment(
+                            entry["tag"], getNameThatPageParentage(entry)
+                        ),
+                    ):
+                        num_commented += 1
+                        # Don't count our own changes next time around.
+                        stat = os.stat(filepath)
+                        snapshot[filepath] = (stat.st_mtime_ns, stat.st_size)
+            if num_commented > 0:
+                say("Updated location comments in " + str(num_commented) + " files.")
+
+            # Links to static files.
+            static_files = getStaticFiles(snapshot, course_folder)
+            for filepath in changed:
+                file_links = getLinks(course_folder, filepath)
+                if file_links is None:
+                    continue
+                new_links = file_links - links.get(filepath, set())
+                for f in sorted(new_links):
+                    if (
+                        f not in static_files
+                        and f.replace(" ", "_") not in static_files
+                    ):
+                        say(
+                            os.path.relpath(filepath, course_folder)
+                            + " links to "
+                            + f
+                            + ", which isn't in static/"
+                        )
+                links[filepath] = file_links
+
+            linked = set().union(*links.values())
+            new_unused = set(f for f in static_files if not isUsed(f, linked))
+            for f in sorted(new_unused - unused):
+                say("No longer used: static/" + f)
+            for f in sorted((unused - new_unused) & static_files):
+                say("Now used: static/" + f)
+            unused = new_unused
+
+    except KeyboardInterrupt:
+        say("Stopped watching.")
+
+
+if __name__ == "__main__":
+    WatchCourse(sys.argv)
@@ -1,10 +1,17 @@
+import io
 import os
 import re
 import sys
+import csv
+import hashlib
+import sqlite3
 import lxml.etree
 import argparse
 from glob import glob
-from bs4 import BeautifulSoup as BS
+from xml.etree import ElementTree as ET
+from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+from CourseOutline import walkOutline, walkElement, getElementFiles, outline_levels
 
 instructions = """
 To use:
@@ -14,143 +21,547 @@ Gets the word count from SRT files, YouTube transcripts,
 and Markdown files. Not guaranteed to perfectly match any
 other word counter, but should be within 10%. Outputs a text file.
 
+A word is anything between spaces or tags that's at least
+two characters long and isn't just a number.
+
+For course folders, also adds up the words in each unit, subsection,
+and section, and writes that to a second file. Unpublished changes
+(in the drafts folder) are counted separately.
+
+Only files that changed since last time get counted again. We remember
+the counts by file contents in ~/.hxxml/word_counts.sqlite, along with
+the totals from the last run on each course.
+
 Valid options:
   -h Help. Print this message.
   -o Output filename. Default is word_count.csv
+  -r Filename for the counts by section. Default is word_count_outline.csv
+  -p How many files to count at once. Defaults to the number of CPUs.
+  -d Show how the totals changed since the last run.
 
-Last update: Apr 20th 2023
+Last update: October 19th, 2026
 """
 
+cache_file = os.path.join(os.path.expanduser("~"), ".hxxml", "word_counts.sqlite")
+
+cache_schema = """
+CREATE TABLE IF NOT EXISTS counts (
+    hash TEXT PRIMARY KEY,
+    words INTEGER
+);
+CREATE TABLE IF NOT EXISTS last_files (
+    course TEXT,
+    path TEXT,
+    words INTEGER,
+    PRIMARY KEY (course, path)
+);
+CREATE TABLE IF NOT EXISTS last_totals (
+    course TEXT,
+    key TEXT,
+    label TEXT,
+    words INTEGER,
+    draft_words INTEGER,
+    PRIMARY KEY (course, key)
+);
+"""
+
+# Part of every cache key. Bump this whenever the counting changes
+# (word_regex, the parsers, what gets skipped), so old counts aren't reused.
+count_version = 1
+
+# The folders we count, and the kinds of files we count in them.
+counted_folders = ["html", "problem", "vertical", "static", "tabs"]
+counted_extensions = [".xml", ".html", ".md", ".srt"]
+
+# Two or more non-space characters, as long as they're not all digits.
+word_regex = re.compile(r"(?!\d+(?:\s|$))\S\S+")
+
+# SRT cue numbers, timing lines, and lines that are just a time.
+skip_line_regex = re.compile(r"^\s*(\d+|\d\d:\d\d(:\d\d)?|.*\d\d --> \d\d:.*)\s*$")
+
+
+def countText(text):
+    """
+    Counts the words in a piece of text without making a list of them.
+    @param text: The text to count.
+    @return: The number of words.
+    """
+    if not text:
+        return 0
+    return sum(1 for _ in word_regex.finditer(text))
+
+
+class HTMLWordCounter(HTMLParser):
+    """
+    Counts words in HTML as the parser hands us the text,
+    skipping scripts and styles.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.word_count = 0
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ["script", "style"]:
+            self.skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag in ["script", "style"] and self.skipping > 0:
+            self.skipping -= 1
+
+    def handle_data(self, data):
+        if self.skipping == 0:
+            self.word_count += countText(data)
+
 
 def countWords(f, ext):
     """
     Counts the words in a file.
     @param f: The file object for the file to count words in.
     @param ext: The extension of the file.
-    @return: A tuple containing the filename and the word count
+    @return: The word count
     """
 
     word_count = 0
     if ext == ".xml":
-        # Parse with lxml
-        tree = lxml.etree.parse(f)
-        root = tree.getroot()
-        # Get the text of all tags.
-        if root is not None:
-            text = root.xpath("//text()")
-        else:
-            return word_count
-        # Join the text together.
-        text = " ".join(text)
-        # Split the text into words.
-        words = text.split(" ")
-        # Remove empty strings.
-        words = [w for w in words if w != ""]
-        # Remove words that are just numbers.
-        words = [w for w in words if not w.isnumeric()]
-        # Remove one-letter words
-        words = [w for w in words if len(w) > 1]
-        # Count the words
-        word_count = len(words)
-        # Subtract off the number of child tags from the root.
-        word_count = word_count - len(root.getchildren()) - 1
+        # Count text as the parser finds it. When a tag ends, its text and
+        # the text after each of its children are done, so we count those
+        # and throw the children away.
+        for event, element in lxml.etree.iterparse(f, events=("end",)):
+            word_count += countText(element.text)
+            for child in element:
+                word_count += countText(child.tail)
+            del element[:]
 
     elif ext == ".html":
-        # Parse the file with BeautifulSoup.
-        soup = BS(f, "html.parser")
-        # Get the text of all tags.
-        text = soup.get_text()
-        # Split the text into words.
-        words = text.split(" ")
-        # Remove empty strings.
-        words = [w for w in words if w != ""]
-        # Remove words that are just numbers.
-        words = [w for w in words if not w.isnumeric()]
-        # Remove one-letter words
-        words = [w for w in words if len(w) > 1]
-        # Count the words
-        word_count = len(words)
+        counter = HTMLWordCounter()
+        for line in f:
+            counter.feed(line)
+        counter.close()
+        word_count = counter.word_count
 
     elif ext == ".md" or ext == ".srt":
         for line in f:
-            # Skip blank lines.
-            if len(line) == 0 or line == "\n" or line == "\r":
-                continue
-            # Check for SRT time lines and skip them.
-            if re.search("\d\d --> \d\d:", line):
-                continue
-            # Skip lines that are just a single number.
-            if re.search("^\d+$", line):
-                continue
-            # Check for lines that are just times and skip them.
-            if re.search("^\d\d:\d\d$", line):
-                continue
-            if re.search("^\d\d:\d\d:\d\d$", line):
+            # Skip SRT numbers and times.
+            if skip_line_regex.match(line):
                 continue
+            word_count += countText(line)
 
-            raw_words = line.split(" ")
-            reduced_words = []
-            for w in raw_words:
-                # Don't include 1-character "words"
-                if len(w) > 1:
-                    reduced_words.append(w)
+    return word_count
 
-            # Store filename and count
-            word_count += len(reduced_words)
 
-    # Sometimes the word count is negative. I don't know why.
-    if word_count < 0:
-        word_count = 0
-    return word_count
+def getHash(data, ext):
+    # The same text can count differently as XML or HTML, so the extension counts.
+    key = str(count_version) + "\0" + ext + "\0"
+    return hashlib.sha1(key.encode("utf-8") + data).hexdigest()
+
+
+def hashFile(filepath):
+    with open(filepath, "rb") as f:
+        return getHash(f.read(), os.path.splitext(filepath)[1])
 
 
-def walkFiles(file_names):
+def countFile(filepath):
     """
-    Walks through the directory structure
-    @param file_names: A list of files and directories to walk through.
-    @param results_flat: A string to store the results in.
-    @return: A list of dictionaries containing the filename and word count.
+    Opens a file and counts the words in it. Runs in a worker process.
+    @param filepath: The file to count.
+    @return: The word count, or None if we couldn't read the file.
     """
+    ext = os.path.splitext(filepath)[1]
+    with open(filepath, "rb") as f:
+        data = f.read()
+    try:
+        if ext == ".xml":
+            # lxml wants bytes so it can read the encoding itself.
+            return countWords(io.BytesIO(data), ext)
+        text = io.StringIO(data.decode("utf-8"), newline=None)
+        return countWords(text, ext)
+    except (lxml.etree.XMLSyntaxError, UnicodeDecodeError) as e:
+        print("Couldn't read " + filepath + ": " + str(e))
+        return None
 
-    results = []
-    results_flat = "filename,words\n"
-    # Open all the files or folders.
+
+def findFiles(file_names):
+    """
+    Finds the files we'll count, in order.
+    @param file_names: A list of files and course folders.
+    @return: A list of (course folder, folder name, file path) tuples.
+    """
+
+    found = []
     for name in file_names:
         # Check to make sure it exists
         if not os.path.exists(name):
             print("File not found: " + name)
             continue
 
-        for root, dirs, thing in os.walk(name):
-            for d in dirs:
-                # We're only keeping certain directories.
-                # TODO: Handle the drafts directory properly.
-                if d not in ["html", "problem", "vertical", "static", "tabs"]:
-                    continue
-                # Add the directory name to the flat results.
-                results_flat += "\n" + d + "\n"
-                # Walk through the directory.
-                for root, dirs, files in os.walk(os.path.join(name, d)):
-                    # If this is the HTML directory, skip the XML files.
-                    if d == "html":
-                        files = [f for f in files if f[-4:] != ".xml"]
-                    for f in files:
-                        # Only open files with specific extensions.
-                        ext = os.path.splitext(f)[1]
-                        if ext not in [".xml", ".html", ".md", ".srt"]:
-                            continue
-                        with open(os.path.join(name, d, f), "r") as g:
-                            # print(os.path.basename(g.name))
-                            count = countWords(g, ext)
-                            results.append(
-                                {
-                                    "name": os.path.basename(g.name),
-                                    "word_count": count
-                                }
-                            )
-                            results_flat += os.path.basename(g.name) + "," + str(count) + "\n"
-
-    return results, results_flat
+        if os.path.isfile(name):
+            if os.path.splitext(name)[1] in counted_extensions:
+                found.append(("", "", name))
+            continue
+
+        course_folder = os.path.abspath(name)
+        # We're only keeping certain directories.
+        # The drafts folder has the same ones inside it.
+        for d in counted_folders + [os.path.join("drafts", d) for d in counted_folders]:
+            for root, dirs, files in os.walk(os.path.join(name, d)):
+                for f in sorted(files):
+                    # Only open files with specific extensions.
+                    ext = os.path.splitext(f)[1]
+                    if ext not in counted_extensions:
+                        continue
+                    # In the HTML directory, skip the XML files.
+                    if os.path.basename(d) == "html" and ext == ".xml":
+                        continue
+                    found.append((course_folder, d, os.path.join(root, f)))
+
+    return found
+
+
+def walkFiles(file_names, processes=None, connection=None):
+    """
+    Counts the words in every file, several files at once.
+    @param file_names: A list of files and directories to walk through.
+    @param processes: How many worker processes to use.
+    @param connection: The cache (see openCache), or None to count everything.
+    @return: A list of dictionaries containing the course, folder,
+        filename, and word count.
+    """
+
+    found = findFiles(file_names)
+
+    # Look up what we've counted before here, and only send the rest out.
+    counts = dict()
+    digests = dict()
+    if connection is not None:
+        for c, d, f in found:
+            digests[f] = hashFile(f)
+            row = connection.execute(
+                "SELECT words FROM counts WHERE hash = ?", (digests[f],)
+            ).fetchone()
+            if row is not None:
+                counts[f] = row[0]
+    to_count = [f for c, d, f in found if f not in counts]
+
+    new_counts = []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for f, count in zip(to_count, pool.map(countFile, to_count, chunksize=32)):
+            counts[f] = count
+            if count is not None and f in digests:
+                new_counts.append((digests[f], count))
+
+    results = []
+    for c, d, f in found:
+        results.append(
+            {
+                "course": c,
+                "folder": d,
+                "path": f,
+                "name": os.path.basename(f),
+                "word_count": counts[f] or 0,
+            }
+        )
+
+    if connection is not None:
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO counts VALUES (?, ?)", new_counts
+            )
+    return results
+
+
+def writeResults(results, filename):
+    """
+    Writes the counts to a CSV file, grouped by folder.
+    @param results: The list from walkFiles.
+    @param filename: Where to write it.
+    """
+    with open(filename, "w") as new_file:
+        new_file.write("filename,words\n")
+        folder = None
+        for r in results:
+            # Add the directory name when we get to a new one.
+            if r["folder"] != folder:
+                folder = r["folder"]
+                new_file.write("\n" + folder + "\n")
+            new_file.write(r["name"] + "," + str(r["word_count"]) + "\n")
+
+
+def makeNode(tag, url_name, display_name):
+    return {
+        "tag": tag,
+        "url_name": url_name,
+        "display_name": display_name,
+        "children": [],
+        "words": 0,
+        "draft_words": 0,
+    }
+
+
+def getNodeKey(parentage):
+    return tuple(parentage.get(level) for level in outline_levels)
+
+
+def buildOutlineTree(course_folder):
+    """
+    Builds the course outline as a tree of nodes (course, sections,
+    subsections, units), and works out which node each file belongs to.
+    Draft units hang off their subsection, or share a node with the
+    published version of the same unit.
+    @param course_folder: The course folder, with course.xml in it.
+    @return: The course node, and a dict of {absolute file path: node}.
+    """
+
+    course = makeNode("course", "", "")
+    nodes = {getNodeKey({}): course}
+    file_nodes = dict()
+
+    for item in walkOutline(course_folder):
+        element = item["element"]
+        parentage = item["parentage"]
+        if element.tag == "course":
+            course["url_name"] = element.get("url_name", "")
+            course["display_name"] = element.get("display_name", "course")
+        elif element.tag in outline_levels:
+            node = makeNode(
+                element.tag, element.get("url_name", ""), parentage[element.tag][1]
+            )
+            above = {k: v for k, v in parentage.items() if k != element.tag}
+            nodes.get(getNodeKey(above), course)["children"].append(node)
+            nodes[getNodeKey(parentage)] = node
+        owner = nodes.get(getNodeKey(parentage), course)
+        for filepath in getElementFiles(course_folder, element, item["filepath"]):
+            file_nodes[os.path.abspath(filepath)] = owner
+
+    # Draft units say which subsection they go in.
+    by_url = {(n["tag"], n["url_name"]): n for n in nodes.values()}
+    drafts_folder = os.path.join(course_folder, "drafts")
+    for root, dirs, files in os.walk(os.path.join(drafts_folder, "vertical")):
+        for f in sorted(files):
+            if not f.endswith(".xml"):
+                continue
+            filepath = os.path.join(root, f)
+            try:
+                vertical = ET.parse(filepath).getroot()
+            except ET.ParseError:
+                continue
+            vertical.set("url_name", f[:-4])
+            # Either a block ID (...+type@sequential+block@abc) or an
+            # old-style i4x://org/course/sequential/abc URL.
+            parent_url = vertical.get(
+                "parent_url", vertical.get("parent_sequential_url", "")
+            )
+            parent = by_url.get(("sequential", re.split("[@/]", parent_url)[-1]))
+            node = by_url.get(("vertical", f[:-4]))
+            if node is None:
+                node = makeNode(
+                    "vertical",
+                    f[:-4],
+                    vertical.get("display_name", "vertical") + " (draft)",
+                )
+                (parent or course)["children"].append(node)
+            for draft_item in walkElement(drafts_folder, vertical, filepath, {}):
+                for draft_file in getElementFiles(
+                    course_folder, draft_item["element"], draft_item["filepath"]
+                ):
+                    file_nodes.setdefault(os.path.abspath(draft_file), node)
+
+    return course, file_nodes
+
+
+def addTotals(node):
+    """
+    Adds up the words in each node and everything under it, once per node,
+    and stores the totals on the node.
+    @param node: The top of the tree.
+    @return: The (words, draft words) total for this node.
+    """
+    words = node["words"]
+    draft_words = node["draft_words"]
+    for child in node["children"]:
+        child_words, child_draft_words = addTotals(child)
+        words += child_words
+        draft_words += child_draft_words
+    node["total_words"] = words
+    node["total_draft_words"] = draft_words
+    return words, draft_words
+
+
+def rollupCourse(course_folder, results):
+    """
+    Counts words by unit, subsection, section, and course.
+    @param course_folder: The course folder.
+    @param results: The list from walkFiles.
+    @return: The course node, with totals on every node.
+    """
+    course, file_nodes = buildOutlineTree(course_folder)
+    outside = makeNode("", "", "(not in the outline)")
+    for r in results:
+        if r["course"] != course_folder:
+            continue
+        node = file_nodes.get(os.path.abspath(r["path"]), outside)
+        if r["folder"].startswith("drafts"):
+            node["draft_words"] += r["word_count"]
+        else:
+            node["words"] += r["word_count"]
+    if outside["words"] > 0 or outside["draft_words"] > 0:
+        course["children"].append(outside)
+    addTotals(course)
+    return course
+
+
+def writeRollups(courses, filename):
+    """
+    Writes the counts by section to a CSV file, laid out like an outline.
+    @param courses: A list of course nodes from rollupCourse.
+    @param filename: Where to write it.
+    """
+    columns = ["course"] + [outline_levels[level] for level in outline_levels]
+
+    def writeNode(writer, node, depth):
+        row = [""] * len(columns)
+        row[depth] = node["display_name"]
+        writer.writerow(row + [node["total_words"], node["total_draft_words"]])
+        for child in node["children"]:
+            writeNode(writer, child, depth + 1)
+
+    with open(filename, "w", newline="") as new_file:
+        writer = csv.writer(new_file)
+        writer.writerow(columns + ["words", "draft_words"])
+        for course in courses:
+            writeNode(writer, course, 0)
+
+
+def openCache(filename):
+    folder = os.path.dirname(os.path.abspath(filename))
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    connection = sqlite3.connect(filename)
+    connection.executescript(cache_schema)
+    return connection
+
+
+def flattenNode(node, key="", label=""):
+    """
+    Lists the totals for a node and everything under it.
+    @param node: A node from rollupCourse.
+    @return: A list of (key, label, words, draft words), where the key is
+        made of url_names and the label of display names.
+    """
+    key = key + "/" + node["url_name"]
+    label = (label + " > " if label else "") + node["display_name"]
+    rows = [(key, label, node["total_words"], node["total_draft_words"])]
+    for child in node["children"]:
+        rows += flattenNode(child, key, label)
+    return rows
+
+
+def saveRun(connection, results, courses):
+    """
+    Remembers this run's counts so the next run can compare.
+    @param connection: The cache.
+    @param results: The list from walkFiles.
+    @param courses: A dict of {course folder: course node from rollupCourse}.
+    """
+    with connection:
+        for course in set(r["course"] for r in results):
+            connection.execute("DELETE FROM last_files WHERE course = ?", (course,))
+        connection.executemany(
+            "INSERT OR REPLACE INTO last_files VALUES (?, ?, ?)",
+            [
+                (
+                    r["course"],
+                    os.path.relpath(r["path"], r["course"] or "."),
+                    r["word_count"],
+                )
+                for r in results
+            ],
+        )
+        for course_folder in courses:
+            connection.execute(
+                "DELETE FROM last_totals WHERE course = ?", (course_folder,)
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO last_totals VALUES (?, ?, ?, ?, ?)",
+                [(course_folder,) + row for row in flattenNode(courses[course_folder])],
+            )
+
+
+def showDiff(connection, results, courses):
+    """
+    Prints how the counts moved since the last run, before we save this one.
+    @param connection: The cache.
+    @param results: The list from walkFiles.
+    @param courses: A dict of {course folder: course node from rollupCourse}.
+    """
+
+    def change(old, new):
+        difference = new - old
+        return (
+            str(old)
+            + " -> "
+            + str(new)
+            + " ("
+            + ("+" if difference >= 0 else "")
+            + str(difference)
+            + ")"
+        )
+
+    print("\nSince the last run:")
+    for course in sorted(set(r["course"] for r in results)):
+        old_files = dict(
+            connection.execute(
+                "SELECT path, words FROM last_files WHERE course = ?", (course,)
+            )
+        )
+        if len(old_files) == 0:
+            print((course or "Single files") + ": no earlier run to compare with.")
+            continue
+        new_files = {
+            os.path.relpath(r["path"], course or "."): r["word_count"]
+            for r in results
+            if r["course"] == course
+        }
+        print(
+            (course or "Single files")
+            + ": "
+            + change(sum(old_files.values()), sum(new_files.values()))
+        )
+        print(
+            "  "
+            + str(
+                sum(
+                    1
+                    for f in new_files
+                    if f in old_files and new_files[f] != old_files[f]
+                )
+            )
+            + " files changed, "
+            + str(sum(1 for f in new_files if f not in old_files))
+            + " added, "
+            + str(sum(1 for f in old_files if f not in new_files))
+            + " removed."
+        )
+
+        # Which parts of the course moved, in course order.
+        if course not in courses:
+            continue
+        old_totals = {
+            key: (words, draft_words)
+            for key, words, draft_words in connection.execute(
+                "SELECT key, words, draft_words FROM last_totals WHERE course = ?",
+                (course,),
+            )
+        }
+        for key, label, words, draft_words in flattenNode(courses[course])[1:]:
+            old_words, old_draft_words = old_totals.get(key, (0, 0))
+            if (old_words, old_draft_words) == (words, draft_words):
+                continue
+            line = "  " + label + ": " + change(old_words, words)
+            if old_draft_words != draft_words:
+                line += ", drafts " + change(old_draft_words, draft_words)
+            print(line)
 
 
 ##############################################
@@ -162,6 +573,9 @@ def WordCount(argv):
     parser.add_argument("source_files", default=None, nargs="*")
     parser.add_argument("-h", "--help", action="store_true")
     parser.add_argument("-o", default="word_count.csv")
+    parser.add_argument("-r", default="word_count_outline.csv")
+    parser.add_argument("-p", "--processes", type=int, default=None)
+    parser.add_argument("-d", "--diff", action="store_true")
 
     args = parser.parse_args()
     if args.help or args.source_files is None:
@@ -177,20 +591,31 @@ def WordCount(argv):
     if file_names == []:
         sys.exit("No file or directory found by that name.")
 
-    results, results_flat = walkFiles(file_names)
+    connection = openCache(cache_file)
+    results = walkFiles(file_names, args.processes, connection)
 
     # Print the totals to screen.
-    total_count = 0
-    for r in results:
-        total_count += r["word_count"]
-        # print(r["name"] + ": " + str(r["word_count"]))
-    
+    total_count = sum(r["word_count"] for r in results)
     print("Total words:" + str(total_count))
 
     # Put them in a file.
-    new_file = open(args.o, "w")
-    new_file.write(results_flat)
-    new_file.close()
+    writeResults(results, args.o)
+
+    # Add them up by section for each course.
+    courses = {
+        os.path.abspath(name): rollupCourse(os.path.abspath(name), results)
+        for name in file_names
+        if os.path.exists(os.path.join(name, "course.xml"))
+    }
+    if len(courses) > 0:
+        writeRollups(courses.values(), args.r)
+        for course in courses.values():
+            print(course["display_name"] + ": " + str(course["total_words"]))
+
+    if args.diff:
+        showDiff(connection, results, courses)
+    saveRun(connection, results, courses)
+    connection.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import argparse
+import contextlib
+
+instructions = """
+To use:
+python3 WriteJournal.py rollback path/to/course/folder
+python3 WriteJournal.py discard path/to/course/folder
+
+Tools like MakeNewRun.py and SetOraDeadlines.py keep a journal of every file
+they change in an extracted course, in a folder next to it (course_journal/).
+Only the files that actually change are kept, so this is much cheaper than
+backing up the whole tarball.
+
+  rollback  Puts every changed file back the way it was before the tool ran,
+            removes any files the tool created, and deletes the journal.
+  discard   Deletes the journal, keeping the changes.
+
+Options:
+  -h  Print this help message and exit.
+
+Last update: October 19th, 2026
+"""
+
+# The journal that writeFile, moveFile, and removeFile record into.
+# None means nothing is being recorded, and files are just written safely.
+active_journal = None
+
+
+def getJournalFolder(course_folder):
+    course_folder = os.path.abspath(course_folder)
+    return course_folder + "_journal"
+
+
+# Starts a fresh journal for this course folder and makes it the active one.
+def startJournal(course_folder):
+    global active_journal
+    journal_folder = getJournalFolder(course_folder)
+    if os.path.exists(journal_folder):
+        shutil.rmtree(journal_folder)
+    os.makedirs(os.path.join(journal_folder, "originals"))
+
+    active_journal = {
+        "course_folder": os.path.abspath(course_folder),
+        "journal_folder": journal_folder,
+        "log": os.path.join(journal_folder, "journal.jsonl"),
+        "seen": set(),
+    }
+    return active_journal
+
+
+def stopJournal():
+    global active_journal
+    active_journal = None
+
+
+# Keeps a copy of a file from before we touched it, once per file.
+# The copy is a hardlink where possible: since we never write into the
+# original file (we replace it), the old contents stay safe at no cost.
+def recordFile(path):
+    journal = active_journal
+    if journal is None:
+        return
+    path = os.path.abspath(path)
+    if path in journal["seen"]:
+        return
+    journal["seen"].add(path)
+
+    entry = {"path": path}
+    if os.path.isfile(path):
+        backup = os.path.join(
+            journal["journal_folder"], "originals", str(len(journal["seen"]))
+        )
+        try:
+            os.link(path, backup)
+        except OSError:
+            shutil.copy2(path, backup)
+        entry["action"] = "modified"
+        entry["backup"] = backup
+    else:
+        entry["action"] = "created"
+
+    # One line per file, written straight away in case we crash.
+    with open(journal["log"], "a", encoding="utf-8") as log:
+        log.write(json.dumps(entry) + "\n")
+        log.flush()
+        os.fsync(log.fileno())
+
+
+# Hands you a temporary file to write into, a bit at a time, and renames it
+# into place once the with block is done. If anything goes wrong, the old
+# file is left as it was. Either the old file or the new one is there,
+# never a half-written one.
+@contextlib.contextmanager
+def openForWriting(path, encoding="utf-8", binary=False):
+    recordFile(path)
+    folder = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=folder, prefix=".tmp_")
+    try:
+        if binary:
+            with open(handle, "wb") as f:
+                yield f
+        else:
+            # newline="" keeps line endings exactly as we write them.
+            with open(handle, "w", encoding=encoding, newline="") as f:
+                yield f
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# Writes a whole file at once, as above.
+def writeFile(path, data, encoding="utf-8"):
+    with openForWriting(path, encoding, binary=not isinstance(data, str)) as f:
+        f.write(data)
+
+
+# Moves a file or a whole folder, recording both ends.
+def moveFile(src, dst):
+    if os.path.isdir(src):
+        for dirpath, dirnames, filenames in os.walk(src):
+            for f in filenames:
+                rel = os.path.relpath(os.path.join(dirpath, f), src)
+                recordFile(os.path.join(src, rel))
+                recordFile(os.path.join(dst, rel))
+    else:
+        recordFile(src)
+        recordFile(dst)
+    shutil.move(src, dst)
+
+
+# Removes a file or a whole folder.
+def removeFile(path):
+    if os.path.isdir(path):
+        for dirpath, dirnames, filenames in os.walk(path):
+            for f in filenames:
+                recordFile(os.path.join(dirpath, f))
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        recordFile(path)
+        os.remove(path)
+
+
+# Removes folders that are empty now, up to (not including) the course folder.
+def removeEmptyFolders(folder, course_folder):
+    while folder != course_folder and folder.startswith(course_folder):
+        if not os.path.isdir(folder) or os.listdir(folder):
+            return
+        os.rmdir(folder)
+        folder = os.path.dirname(folder)
+
+
+def rollbackJournal(course_folder):
+    course_folder = os.path.abspath(course_folder)
+    journal_folder = getJournalFolder(course_folder)
+    log = os.path.join(journal_folder, "journal.jsonl")
+    if not os.path.exists(log):
+        return 0
+
+    with open(log, "r", encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+
+    # Newest first.
+    for entry in reversed(entries):
+        path = entry["path"]
+        if entry["action"] == "created":
+            if os.path.isfile(path):
+                os.remove(path)
+            removeEmptyFolders(os.path.dirname(path), course_folder)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(entry["backup"], path)
+
+    shutil.rmtree(journal_folder)
+    return len(entries)
+
+
+def discardJournal(course_folder):
+    journal_folder = getJournalFolder(course_folder)
+    if os.path.exists(journal_folder):
+        shutil.rmtree(journal_folder)
+
+
+def WriteJournal(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("command", nargs="?", default=None)
+    parser.add_argument("course_folder", nargs="?", default=None)
+
+    args = parser.parse_args()
+    if args.help or args.command is None or args.course_folder is None:
+        sys.exit(instructions)
+
+    if not os.path.exists(getJournalFolder(args.course_folder)):
+        sys.exit("No journal found for " + args.course_folder)
+
+    if args.command == "rollback":
+        count = rollbackJournal(args.course_folder)
+        print("Rolled back " + str(count) + " files in " + args.course_folder)
+    elif args.command == "discard":
+        discardJournal(args.course_folder)
+        print("Journal discarded. Changes to " + args.course_folder + " are kept.")
+    else:
+        sys.exit(instructions)
+
+
+if __name__ == "__main__":
+    WriteJournal(sys.argv)
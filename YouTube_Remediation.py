@@ -4,6 +4,7 @@ import sys
 import os
 import argparse
 from bs4 import BeautifulSoup
+from VideoInventory import buildInventory
 
 instructions = """
 To use:
@@ -34,6 +35,8 @@ if not os.path.exists(args.directory):
 # Global variables
 num_fixed = 0
 num_unfixable = 0
+num_already_ok = 0
+num_unsourced = 0
 num_iframes = 0
 num_links = 0
 num_youtube_urls = 0
@@ -51,92 +54,68 @@ course_run = coursefile_root.attrib.get("url_name", "unknown")
 summary_file = course_nickname + "__" + course_run + ".txt"
 
 
-def processVideo(folder):
+def processVideo(inventory):
 
     global num_fixed
     global num_unfixable
     global num_youtube_urls
+    global num_already_ok
+    global num_unsourced
 
-    # Walk through the videos folder
-    for dirpath, dirnames, filenames in os.walk(folder):
-        for eachfile in filenames:
+    # Go through the videos we found. Only the ones we fix get parsed again.
+    for i in range(len(inventory["url_name"])):
+        filepath = inventory["filepath"][i]
+
+        # Inline videos live inside their unit's file. Skip those.
+        if filepath is None:
+            continue
+        eachfile = os.path.basename(filepath)
 
-            # Get the XML for each file
-            tree = ET.parse(os.path.join(dirpath, eachfile))
+        # Is there at least one non-YouTube source? Is there a YouTube source?
+        has_alternative_source = inventory["alternative_source"][i] == 1
+        has_youtube_source = inventory["youtube"][i] == 1
+
+        if has_alternative_source and has_youtube_source:
+            # Get the XML for the file
+            tree = ET.parse(filepath)
             root = tree.getroot()
 
-            # If this isn't a video file, skip it.
-            if root.tag != "video":
-                continue
-
-            # Is there at least one non-YouTube source?
-            # These are stored in <source> or <encoded_video> tags.
-            # Some files have both, some have neither.
-            has_alternative_source = False
-            for child in root.findall("source"):
-                src = child.get("src", False)
-                if src != False:
-                    if "youtube.com" not in str(src) and "youtu.be" not in str(src):
-                        has_alternative_source = True
-            for child in root.iter("encoded_video"):
-                url = child.get("url", False)
-                if url != False:
-                    if "youtube.com" not in str(url) and "youtu.be" not in str(url):
-                        has_alternative_source = True
-
-            # Is there a YouTube source?
-            has_youtube_source = False
+            # Empty out the youtube attributes.
             for att in root.attrib:
                 if "youtube" in att:
                     root.set(att, "")
-                    has_youtube_source = True
-
-            if has_alternative_source and has_youtube_source:
-                # Empty out the youtube attributes.
-                for att in root.attrib:
-                    if "youtube" in att:
-                        root.set(att, "")
-                        had_youtube_url = True
-                if has_youtube_source:
-                    num_youtube_urls += 1
-
-                # Remove encoded_video tags with profile="youtube"
-                for child in root:
-                    for tag in child.findall("encoded_video"):
-                        if tag.get("profile", False) == "youtube":
-                            child.remove(tag)
-
-                # Increment file counter
-                num_fixed += 1
-
-                # Save the file
-                tree.write(
-                    os.path.join(dirpath, eachfile),
-                    encoding="UTF-8",
-                    xml_declaration=False,
-                )
-
-            elif has_alternative_source and not has_youtube_source:
-                # It doesn't point to YouTube and it has an alternative source.
-                # No need to fix anything.
-                num_already_ok += 1
-
-            elif has_youtube_source and not has_alternative_source:
-                # If there's a youtube link and no fallback, flag it
-                videos_youtube_only.append(eachfile)
-                num_unfixable += 1
-
-            else:
-                # It doesn't have *any* video source. Should be very rare.
-                videos_unsourced.append(eachfile)
-                num_unsourced += 0
-
-            # Debug code
-            # print("has_alternative_source: " + str(has_alternative_source))
-            # print("had_youtube_url: " + str(had_youtube_url))
-            # print("num_fixed: " + str(num_fixed))
-            # print("num_unfixable: " + str(num_unfixable))
-            # input("Press enter to continue")
+            num_youtube_urls += 1
+
+            # Remove encoded_video tags with profile="youtube"
+            for child in root:
+                for tag in child.findall("encoded_video"):
+                    if tag.get("profile", False) == "youtube":
+                        child.remove(tag)
+
+            # Increment file counter
+            num_fixed += 1
+
+            # Save the file
+            tree.write(
+                filepath,
+                encoding="UTF-8",
+                xml_declaration=False,
+            )
+
+        elif has_alternative_source and not has_youtube_source:
+            # It doesn't point to YouTube and it has an alternative source.
+            # No need to fix anything.
+            num_already_ok += 1
+
+        elif has_youtube_source and not has_alternative_source:
+            # If there's a youtube link and no fallback, flag it
+            videos_youtube_only.append(eachfile)
+            num_unfixable += 1
+
+        else:
+            # It doesn't have *any* video source. Should be very rare.
+            videos_unsourced.append(eachfile)
+            num_unsourced += 1
 
 
 def processHTML(folder):
@@ -186,7 +165,11 @@ def makeReport():
             for x in videos_youtube_only:
                 txt += "  " + x + "\n"
         if len(videos_unsourced) > 0:
-            txt += "No source at all for the following " + num_unsourced + " videos:"
+            txt += (
+                "No source at all for the following "
+                + str(num_unsourced)
+                + " videos:\n"
+            )
             for x in videos_unsourced:
                 txt += "  " + x + "\n"
         if num_links == 0:
@@ -220,9 +203,8 @@ def makeReport():
             summary.write(txt)
 
 
-processVideo(os.path.join(args.directory, "video"))
-if os.path.exists(os.path.exists(os.path.join(args.directory, "drafts", "video"))):
-    processVideo(os.path.join(args.directory, "drafts", "video"))
+# Read every video once, including drafts.
+processVideo(buildInventory(args.directory, include_drafts=True))
 
 processHTML(os.path.join(args.directory, "html"))
 if os.path.exists(os.path.exists(os.path.join(args.directory, "drafts", "html"))):
@@ -2,75 +2,158 @@
 
 import csv
 import os
+import re
 import sys
 import shutil
+import argparse
+import contextlib
+from WriteJournal import openForWriting
 
-# Get the csv file, target language, and input folder from the command line arguments
-if len(sys.argv) != 4:
-    print(
-        "Usage: python get_transcripts_by_lang.py <csv_file> <target_language> <input_folder>"
-    )
-    sys.exit(1)
-
-count = 0
-
-csv_file = sys.argv[1]
-target_language = sys.argv[2]
-input_folder = sys.argv[3]
-
-# Check if the CSV file exists
-if not os.path.isfile(csv_file):
-    print(f"Error: The file {csv_file} does not exist.")
-    sys.exit(1)
-# Check for valid language code
-if not target_language.isalpha() or len(target_language) != 2:
-    print("Error: The target language code must be a 2-letter ISO 639-1 code.")
-    sys.exit(1)
-# Check if the input folder exists
-if not os.path.isdir(input_folder):
-    print(f"Error: The folder {input_folder} does not exist.")
-    sys.exit(1)
-
-# Read the CSV file
-with open(csv_file, "r", encoding="utf-8") as file:
-    reader = csv.DictReader(file)
-
-    # Remove all columns except "sub" "component", and "upload_name"
-    new_rows = []
-    for row in reader:
-        if "sub" not in row or "component" not in row or "upload_name" not in row:
-            print("Error: The CSV file does not contain the required columns.")
-            sys.exit(1)
-        if "-" + target_language + ".srt" not in row["sub"]:
-            continue
-        new_row = {
-            "sub": row["sub"],
-            "component": row["component"],
-            "upload_name": row["upload_name"],
-        }
-        new_rows.append(new_row)
-
-    # Write the revised rows to a new CSV file
-    with open(
-        os.path.join(input_folder, "videos.csv"), "w", encoding="utf-8"
-    ) as output:
-        writer = csv.DictWriter(output, fieldnames=["sub", "component", "upload_name"])
-        writer.writeheader()
-        writer.writerows(new_rows)
-
-    transcripts = []
-    # Copy all matching transcripts to a new folder
-    if not os.path.exists("transcripts"):
-        os.makedirs("transcripts")
-    for row in new_rows:
-        # Get the filename
-        filename = row["sub"]
-        # copy the file to the new folder
-        src = os.path.join(input_folder, filename)
-        dest = os.path.join("transcripts", filename)
-        shutil.copy(src, dest)
-        count += 1
-
-print(
-    f"Copied {count} transcripts to the 'transcripts' folder and created 'videos.csv' in {input_folder}"
-)
\ No newline at end of file
+instructions = """
+To use:
+python3 get_transcripts_by_lang.py <csv_file> <languages> <input_folder> (options)
+
+Gathers the transcripts for one or more languages, like for sending to
+translators. <languages> is a language code like "es", several separated
+by commas like "es,fr,zh_HANS", or "all" for every language in the CSV.
+
+The CSV needs "sub", "component", and "upload_name" columns. A transcript's
+language comes from the end of its name, like the "es" in lecture-es.srt.
+The CSV is only read once, however many languages you ask for.
+
+For each language you get a folder, like transcripts/es/, with its
+transcripts and a videos.csv that lists just those rows. The transcripts
+are hard links to the ones in <input_folder> where possible, so they don't
+take up extra space. They're copied if they're on a different drive.
+Don't edit them in place: with a hard link, that changes the original too.
+
+Options:
+  -o  Where to put the language folders. Defaults to "transcripts".
+  -l  Just list the languages and how many transcripts each one has.
+  -h  Print this message and exit.
+
+Last update: October 19th, 2026
+"""
+
+columns = ["sub", "component", "upload_name"]
+
+# The language at the end of a transcript's name, like lecture-en.srt
+# or lecture-zh_HANS.srt
+language_regex = re.compile(r"-([A-Za-z]{2,3}(?:_[A-Za-z]+)?)\.srt$")
+
+
+def getLanguage(filename):
+    match = language_regex.search(filename.strip())
+    return match.group(1) if match else None
+
+
+# Reads the CSV once, writing each wanted language's rows to its own
+# videos.csv as they go by. Returns {language: [(component, filename)]}.
+# With languages set to None, every language is wanted.
+def indexTranscripts(csv_file, languages, output_folder):
+    index = dict()
+    with contextlib.ExitStack() as stack:
+        writers = dict()
+        with open(csv_file, "r", encoding="utf-8") as file:
+            reader = csv.DictReader(file)
+            if any(c not in (reader.fieldnames or []) for c in columns):
+                sys.exit("Error: The CSV file does not contain the required columns.")
+            for row in reader:
+                language = getLanguage(row["sub"])
+                if language is None:
+                    continue
+                if languages is not None and language not in languages:
+                    continue
+                if output_folder is not None and language not in writers:
+                    language_folder = os.path.join(output_folder, language)
+                    os.makedirs(language_folder, exist_ok=True)
+                    output = stack.enter_context(
+                        openForWriting(os.path.join(language_folder, "videos.csv"))
+                    )
+                    writers[language] = csv.DictWriter(output, fieldnames=columns)
+                    writers[language].writeheader()
+                if output_folder is not None:
+                    writers[language].writerow({c: row[c] for c in columns})
+                index.setdefault(language, []).append(
+                    (row["component"], row["sub"].strip())
+                )
+    return index
+
+
+# Hard links src to dest, or copies it if we can't. Returns True for a link.
+def linkFile(src, dest):
+    if os.path.exists(dest):
+        if os.path.samefile(src, dest):
+            return True
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+        return True
+    except OSError:
+        shutil.copy2(src, dest)
+        return False
+
+
+def get_transcripts_by_lang(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-o", "--output", default="transcripts")
+    parser.add_argument("-l", "--list", action="store_true")
+    parser.add_argument("csv_file", nargs="?", default=None)
+    parser.add_argument("languages", nargs="?", default=None)
+    parser.add_argument("input_folder", nargs="?", default=None)
+
+    args = parser.parse_args(argv)
+    if args.help or args.csv_file is None:
+        sys.exit(instructions)
+
+    # Check if the CSV file exists
+    if not os.path.isfile(args.csv_file):
+        sys.exit(f"Error: The file {args.csv_file} does not exist.")
+
+    if args.list:
+        index = indexTranscripts(args.csv_file, None, None)
+        for language in sorted(index):
+            print(f"{language}\t{len(index[language])}")
+        return
+
+    if args.input_folder is None:
+        sys.exit(instructions)
+    # Check for valid language codes
+    if args.languages == "all":
+        languages = None
+    else:
+        languages = set(args.languages.split(","))
+        for language in languages:
+            if getLanguage("-" + language + ".srt") != language:
+                sys.exit(f"Error: {language} isn't a language code like es or zh_HANS.")
+    # Check if the input folder exists
+    if not os.path.isdir(args.input_folder):
+        sys.exit(f"Error: The folder {args.input_folder} does not exist.")
+
+    index = indexTranscripts(args.csv_file, languages, args.output)
+
+    for language in sorted(index):
+        language_folder = os.path.join(args.output, language)
+        linked = 0
+        copied = 0
+        for component, filename in index[language]:
+            src = os.path.join(args.input_folder, filename)
+            if not os.path.isfile(src):
+                print(f"Missing {filename} (for {component})")
+                continue
+            if linkFile(src, os.path.join(language_folder, filename)):
+                linked += 1
+            else:
+                copied += 1
+        print(
+            f"{language}: linked {linked} and copied {copied} transcripts "
+            + f"to {language_folder}"
+        )
+
+    for language in sorted((languages or set()) - set(index)):
+        print(f"{language}: no transcripts in {args.csv_file}")
+
+
+if __name__ == "__main__":
+    get_transcripts_by_lang(sys.argv[1:])
@@ -3,7 +3,7 @@ import os
 import csv
 import argparse
 from glob import glob
-import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 
 instructions = """
 To use:
@@ -12,146 +12,137 @@ python Outline_to_HTML.py course_outline_file.tsv
 Takes a tab-separated course outline (as produced by Make_Course_Outline.py)
 and creates an HTML snippet that will display a linked outline.
 
+If you point it at a folder, it converts every .tsv file in that folder
+(not in subfolders), several at a time.
+
 Options:
+  -p  How many outlines to convert at once. Defaults to the number of CPUs.
   -h  Show this message and exit.
 
-Last update: Feb 28th, 2019
+Last update: October 19th, 2026
+"""
+
+# Columns that aren't topics.
+outline_columns = ["chapter", "sequential", "vertical", "url"]
+
+# The CSS and JavaScript that make the outline work.
+head_html = (
+    "<html>\n"
+    '  <link rel="stylesheet" type="text/css" href="/static/hx-collapse-nav.css">\n'
+    '  <link rel="stylesheet" type="text/css" href="/static/hx-grade-display.css">\n'
+    '  <div class="checkboxes">\n'
+    "    <h4>Topics</h4>\n"
+    '    <input type="checkbox" class="showall" name="showAll" id="showAll" '
+    'checked="checked">\n'
+    '      <label for="showAll">\n'
+    "        <strong>Show All</strong>\n"
+    "      </label>\n"
+    "    \n"
+    "    <br>\n"
+    "    <br>"
+)
+foot_html = """
+  <script src="/static/hx-collapse-nav.js"></script>
+  <script src="/static/hx-grade-reader.js"></script>
+</html>
 """
 
-# For prettifying XML.
-def indent(elem, level=0):
-    i = "\n" + level * "  "
-    if len(elem):
-        if not elem.text or not elem.text.strip():
-            elem.text = i + "  "
-        if not elem.tail or not elem.tail.strip():
-            elem.tail = i
-        for elem in elem:
-            indent(elem, level + 1)
-        if not elem.tail or not elem.tail.strip():
-            elem.tail = i
-    else:
-        if level and (not elem.tail or not elem.tail.strip()):
-            elem.tail = i
-
-
-def ConvertToHTML(filename, optionList, dirpath):
+
+def escapeText(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def escapeAttribute(text):
+    return text.replace("&", "&amp;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+# Writes the HTML as we read the outline, one row at a time,
+# so big outlines never have to be held in memory.
+def ConvertToHTML(filename):
+
+    # Set the new filename
+    new_filename = filename[:-3] + " HTML.html"
+    temp_filename = new_filename + ".tmp"
 
     # Open the TSV file
     with open(filename, "r") as tsvfile:
-        try:
-            # Read in the spreadsheet as a dictionary.
-            outline_file = csv.DictReader(tsvfile, delimiter="\t")
-        except Exception as e:
+        # Read in the spreadsheet as a dictionary.
+        outline_file = csv.DictReader(tsvfile, delimiter="\t")
+        if outline_file.fieldnames is None or any(
+            k not in outline_file.fieldnames for k in outline_columns
+        ):
             print("Skipping " + filename + ": possible invalid file format")
-            print("Error:", e)
             return False
 
-        # Set up an HTML file for output.
-        root = ET.Element("html")
-
-        # Add tags for the css.
-        nav_css_tag = ET.SubElement(root, "link")
-        nav_css_tag.set("rel", "stylesheet")
-        nav_css_tag.set("type", "text/css")
-        nav_css_tag.set("href", "/static/hx-collapse-nav.css")
-
-        grade_css_tag = ET.SubElement(root, "link")
-        grade_css_tag.set("rel", "stylesheet")
-        grade_css_tag.set("type", "text/css")
-        grade_css_tag.set("href", "/static/hx-grade-display.css")
-
-        # Set up the checkboxes
-        checkboxes_div = ET.SubElement(root, "div")
-        checkboxes_div.set("class", "checkboxes")
-        check_header = ET.SubElement(checkboxes_div, "h4")
-        check_header.text = "Topics"
-
-        show_all = ET.SubElement(checkboxes_div, "input")
-        show_all.set("type", "checkbox")
-        show_all.set("class", "showall")
-        show_all.set("name", "showAll")
-        show_all.set("id", "showAll")
-        show_all.set("checked", "checked")
-        show_all_label = ET.SubElement(show_all, "label")
-        show_all_label.set("for", "showAll")
-        strong = ET.SubElement(show_all_label, "strong")
-        strong.text = "Show All"
-        ET.SubElement(checkboxes_div, "br")
-        ET.SubElement(checkboxes_div, "br")
-
-        for k in outline_file.fieldnames:
-            if k not in ["chapter", "sequential", "vertical", "url"]:
-                input_tag = ET.SubElement(checkboxes_div, "input")
-                input_tag.set("type", "checkbox")
-                input_tag.set("class", "pageselector")
-                input_tag.set(
-                    "name", k.replace(" ", "_")
-                )  # We're matching these with classes.
-                input_tag.set("id", k.replace(" ", "_"))  # Classes can't have spaces.
-                input_label = ET.SubElement(input_tag, "label")
-                input_label.set("for", k.replace(" ", "_"))
-                input_label.text = k
-                ET.SubElement(checkboxes_div, "br")
-
-        # Make a div and a link for each row in the outline.
-        pages_div = ET.SubElement(root, "div")
-        pages_div.set("class", "allPages")
-
-        for row in outline_file:
-            row_tag = ET.SubElement(pages_div, "div")
-
-            # Get all the classes from the TSV.
-            classes = "hiddenpage "
-            if row["chapter"]:
-                classes += "nav-section "
-            if row["sequential"]:
-                classes += "nav-sub "
-            if row["vertical"]:
-                classes += "nav-unit "
-            for key in row:
-                if key not in ["chapter", "sequential", "vertical", "url"]:
-                    if row[key]:
-                        # Spaces not allowed in class names.
-                        classes += key.replace(" ", "_") + " "
-            row_tag.set("class", classes.strip())
-
-            a_tag = ET.SubElement(row_tag, "a")
-            a_tag.set("href", "/jump_to_id/" + row["url"])
-            a_tag.set("target", "_blank")
-            # Only one of these will have a value in it.
-            # This takes the name from that one.
-            a_tag.text = row["chapter"] or row["sequential"] or row["vertical"]
-
-        # Add tags for the javascript that will make this work.
-        # This is intentionally at the bottom of the file.
-        nav_js_tag = ET.SubElement(root, "script")
-        nav_js_tag.set("src", "/static/hx-collapse-nav.js")
-
-        score_js_tag = ET.SubElement(root, "script")
-        score_js_tag.set("src", "/static/hx-grade-reader.js")
-
-        # Set the new filename
-        new_filename = filename[:-3] + " HTML.html"
-
-        # Prettify the XML.
-        indent(root)
-        tree = ET.ElementTree(root)
-
-        # Output the new file
-        tree.write(
-            os.path.join(dirpath, new_filename),
-            encoding="UTF-8",
-            xml_declaration=False,
-            method="html",
-        )
-        return True
+        # Spaces not allowed in class names, so we work these out once.
+        topics = [
+            (k, escapeAttribute(k.replace(" ", "_")))
+            for k in outline_file.fieldnames
+            if k not in outline_columns
+        ]
+
+        with open(temp_filename, "w", encoding="UTF-8") as outfile:
+            outfile.write(head_html)
+
+            # Set up the checkboxes
+            for k, topic_class in topics:
+                outfile.write(
+                    '\n    <input type="checkbox" class="pageselector" name="'
+                    + topic_class
+                    + '" id="'
+                    + topic_class
+                    + '">\n      <label for="'
+                    + topic_class
+                    + '">'
+                    + escapeText(k)
+                    + "</label>\n    \n    <br>"
+                )
+            outfile.write('\n  </div>\n  <div class="allPages">')
+
+            # Make a div and a link for each row in the outline.
+            num_rows = 0
+            for row in outline_file:
+                classes = "hiddenpage"
+                if row["chapter"]:
+                    classes += " nav-section"
+                if row["sequential"]:
+                    classes += " nav-sub"
+                if row["vertical"]:
+                    classes += " nav-unit"
+                for k, topic_class in topics:
+                    if row[k]:
+                        classes += " " + topic_class
+
+                # Only one of these will have a value in it.
+                # This takes the name from that one.
+                name = row["chapter"] or row["sequential"] or row["vertical"] or ""
+                outfile.write(
+                    '\n    <div class="'
+                    + classes
+                    + '">\n      <a href="/jump_to_id/'
+                    + escapeAttribute(row["url"] or "")
+                    + '" target="_blank">'
+                    + escapeText(name)
+                    + "</a>\n    </div>"
+                )
+                num_rows += 1
+            if num_rows > 0:
+                outfile.write("\n  ")
+            outfile.write("</div>")
+
+            # The javascript is intentionally at the bottom of the file.
+            outfile.write(foot_html)
+
+    # Only replace the old HTML once the new one is complete.
+    os.replace(temp_filename, new_filename)
+    return True
 
 
 def Outline_to_HTML(args):
     # Handle arguments and flags
     parser = argparse.ArgumentParser(usage=instructions, add_help=False)
     parser.add_argument("--help", "-h", action="store_true")
+    parser.add_argument("-p", "--processes", type=int, default=None)
     parser.add_argument("file_names", nargs="*")
 
     args = parser.parse_args()
@@ -169,34 +160,26 @@ def Outline_to_HTML(args):
     if file_names == []:
         sys.exit("No file or directory found by that name.")
 
-    optionlist = []
-    filecount = 0
-
+    # Make sure single files exist.
     for name in file_names:
-        # Make sure single files exist.
         assert os.path.exists(name), "File or directory not found."
 
-        # If it's just a file, convert it.
-        if os.path.isfile(name):
-            # Make sure this is a TSV file (just check extension)
-            if name.lower().endswith(".tsv") or name.lower().endswith(".txt"):
-                # Convert it to an HTML snippet
-                rawfile = ConvertToHTML(name, optionlist, "")
-
-                filecount += 1
-
-        # If it's a directory, we aren't going recursive.
-        if os.path.isdir(name) and len(file_names) == 1:
-            topfiles = []
-            for (dirpath, dirnames, files) in os.walk(name):
-                topfiles.extend(files)
-                break
-            for eachfile in topfiles:
-                if eachfile.lower().endswith(".tsv") or eachfile.lower().endswith(
-                    ".txt"
-                ):
-                    ConvertToHTML(eachfile, optionlist, dirpath)
-                    filecount += 1
+    def isOutline(name):
+        return name.lower().endswith(".tsv") or name.lower().endswith(".txt")
+
+    outlines = [name for name in file_names if os.path.isfile(name) and isOutline(name)]
+
+    # If it's a directory, we aren't going recursive.
+    if len(file_names) == 1 and os.path.isdir(file_names[0]):
+        for dirpath, dirnames, files in os.walk(file_names[0]):
+            outlines += [os.path.join(dirpath, f) for f in files if isOutline(f)]
+            break
+
+    # Each outline is separate, so we can do several at once.
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        filecount = sum(
+            1 for converted in pool.map(ConvertToHTML, outlines) if converted
+        )
 
     print("Converted " + str(filecount) + " outline to HTML.")
 
@@ -91,6 +91,56 @@ extensions = [
 ]
 
 
+# Files that we always keep, whether the course uses them or not.
+always_keep = [
+    "course_image.jpeg",
+    "hx.js",
+    "hx.css",
+    "backpack.html",
+    "EdX_Logo-1.PNG",
+    "edx-logo-elm.svg",
+    "HXVideoLinks.js",
+    "ajax-loader.gif",
+    "hx_tiny_white.png",
+    "hx-text-slider.css",
+    "hx-text-slider.js",
+    "hx-timeline.css",
+    "hx-timeline.js",
+    "hx-timeline.new.js",
+    "hxat_image_lite_mirador.css",
+    "hxat_image_lite.css",
+    "hxat_image_lite.js",
+    "hxat_mirador_standalone_lite_mirador.css",
+    "hxat_mirador_standalone_lite.css",
+    "hxat_mirador_standalone_lite.js",
+    "HXEditor.js",
+    "hxGlobalOptions.js",
+    "HXPopUpProblems.js",
+    "HXVideoChime.js",
+    "HXVideoLinks.js",
+    "intro_accessible.js",
+    "introjs.css",
+    "prism.css",
+    "prism.js",
+    "quote-left.png",
+    "quote-right.png",
+    "slick-theme.css",
+    "slick.css",
+    "slick.eot",
+    "slick.js",
+    "slick.svg",
+    "slick.ttf",
+    "slick.woff",
+    "summernote-lite.min.css",
+    "summernote-lite.min.js",
+    "summernote.eot",
+    "summernote.ttf",
+    "summernote.woff",
+    "summernote.woff2",
+    "VideoLinks.css",
+]
+
+
 def formatByteSize(size: int):
     """
     Formats a byte size into a human-readable string.
@@ -448,53 +498,6 @@ def main():
         "drafts/video",
     ]
     other_folders = ["static"]
-    always_keep = [
-        "course_image.jpeg",
-        "hx.js",
-        "hx.css",
-        "backpack.html",
-        "EdX_Logo-1.PNG",
-        "edx-logo-elm.svg",
-        "HXVideoLinks.js",
-        "ajax-loader.gif",
-        "hx_tiny_white.png",
-        "hx-text-slider.css",
-        "hx-text-slider.js",
-        "hx-timeline.css",
-        "hx-timeline.js",
-        "hx-timeline.new.js",
-        "hxat_image_lite_mirador.css",
-        "hxat_image_lite.css",
-        "hxat_image_lite.js",
-        "hxat_mirador_standalone_lite_mirador.css",
-        "hxat_mirador_standalone_lite.css",
-        "hxat_mirador_standalone_lite.js",
-        "HXEditor.js",
-        "hxGlobalOptions.js",
-        "HXPopUpProblems.js",
-        "HXVideoChime.js",
-        "HXVideoLinks.js",
-        "intro_accessible.js",
-        "introjs.css",
-        "prism.css",
-        "prism.js",
-        "quote-left.png",
-        "quote-right.png",
-        "slick-theme.css",
-        "slick.css",
-        "slick.eot",
-        "slick.js",
-        "slick.svg",
-        "slick.ttf",
-        "slick.woff",
-        "summernote-lite.min.css",
-        "summernote-lite.min.js",
-        "summernote.eot",
-        "summernote.ttf",
-        "summernote.woff",
-        "summernote.woff2",
-        "VideoLinks.css",
-    ]
 
     # Get the course run number.
     course_root = os.path.join(course_folder, "course.xml")
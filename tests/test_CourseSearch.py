@@ -0,0 +1,33 @@
+import os
+from CourseSearch import openIndex, indexCourse, findPhrase
+
+
+def writeFile(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def writeCourse(folder, unit_name):
+    writeFile(
+        os.path.join(folder, "course.xml"),
+        '<course url_name="run"><chapter display_name="Week 1" url_name="c">'
+        '<sequential display_name="Lesson" url_name="s">'
+        '<vertical display_name="' + unit_name + '" url_name="v">'
+        '<problem url_name="p"/>'
+        "</vertical></sequential></chapter></course>",
+    )
+
+
+def test_moved_file_gets_its_new_location(tmp_path):
+    course = str(tmp_path / "course")
+    writeCourse(course, "Old unit")
+    writeFile(os.path.join(course, "problem", "p.xml"), "<problem>purple cow</problem>")
+    connection = openIndex(str(tmp_path / "search.sqlite"))
+    indexCourse(connection, course)
+    assert findPhrase(connection, "purple cow")[0][2] == "Week 1 > Lesson > Old unit"
+
+    # Only the outline changes. The problem's own file doesn't.
+    writeCourse(course, "New unit")
+    indexCourse(connection, course)
+    assert findPhrase(connection, "purple cow")[0][2] == "Week 1 > Lesson > New unit"
@@ -0,0 +1,17 @@
+import datetime
+from MakeNewRun import shiftDate
+
+week = datetime.timedelta(days=7)
+
+
+def test_shift_keeps_fraction():
+    assert shiftDate("2024-01-01T00:00:00.500Z", week) == "2024-01-08T00:00:00.500Z"
+    assert (
+        shiftDate('"2024-01-01T23:59:59.123456+00:00"', week)
+        == '"2024-01-08T23:59:59.123456+00:00"'
+    )
+
+
+def test_shift_without_seconds_adds_none():
+    assert shiftDate("2024-01-01T10:30Z", week) == "2024-01-08T10:30Z"
+    assert shiftDate("2024-01-01T10:30:15", week) == "2024-01-08T10:30:15"
@@ -0,0 +1,70 @@
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "outline_maker")
+)
+from Make_Course_Outline import outlineRows  # noqa: E402
+
+
+# Tags with nothing inside are pointers, so they get a file of their own.
+def writeFiles(folder, files):
+    for name, text in files.items():
+        path = os.path.join(folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def getRows(xml):
+    return [
+        (row.get("chapter") or row.get("sequential") or row.get("vertical"), row["url"])
+        for row in outlineRows(ET.fromstring(xml))
+    ]
+
+
+def test_empty_first_subsection_leaves_section_waiting(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writeFiles(
+        str(tmp_path),
+        {
+            "sequential/x.xml": '<sequential display_name="X"/>',
+            "vertical/u.xml": '<vertical display_name="U"/>',
+        },
+    )
+    course = """
+    <course>
+      <chapter display_name="A" url_name="a">
+        <sequential url_name="x"/>
+        <sequential display_name="Y" url_name="y">
+          <vertical url_name="u"/>
+        </sequential>
+      </chapter>
+    </course>
+    """
+    assert getRows(course) == [("A", "u"), ("Y", "u"), ("U", "u")]
+
+
+def test_empty_section_is_left_out(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writeFiles(
+        str(tmp_path),
+        {
+            "chapter/a.xml": '<chapter display_name="A"/>',
+            "vertical/u.xml": '<vertical display_name="U"/>',
+            "vertical/v.xml": '<vertical display_name="V"/>',
+        },
+    )
+    course = """
+    <course>
+      <chapter url_name="a"/>
+      <chapter display_name="B" url_name="b">
+        <sequential display_name="Y" url_name="y">
+          <vertical url_name="u"/>
+          <vertical url_name="v"/>
+        </sequential>
+      </chapter>
+    </course>
+    """
+    assert getRows(course) == [("B", "u"), ("Y", "u"), ("U", "u"), ("V", "v")]
@@ -0,0 +1,54 @@
+import os
+from RenameComponents import renameComponents
+
+old_id = "0123456789abcdef0123456789abcdef"
+new_id = "fedcba9876543210fedcba9876543210"
+
+
+def writeFile(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def makeCourse(folder):
+    writeFile(os.path.join(folder, "course.xml"), b'<course url_name="run"/>')
+    writeFile(
+        os.path.join(folder, "vertical", "unit.xml"),
+        b'<vertical><lti url_name="' + old_id.encode() + b'"/></vertical>',
+    )
+    writeFile(os.path.join(folder, "lti", old_id + ".xml"), b"<lti/>")
+
+
+def test_non_utf8_static_file_is_left_alone(tmp_path):
+    course = str(tmp_path)
+    makeCourse(course)
+    # Latin-1, with a reference in it that we shouldn't touch.
+    script = "// caf\xe9 jump_to_id/{}\n".format(old_id).encode("latin-1")
+    writeFile(os.path.join(course, "static", "old.js"), script)
+
+    results = renameComponents(course, {old_id: new_id})
+
+    assert os.path.exists(os.path.join(course, "lti", new_id + ".xml"))
+    with open(os.path.join(course, "vertical", "unit.xml"), "rb") as f:
+        assert new_id.encode() in f.read()
+    with open(os.path.join(course, "static", "old.js"), "rb") as f:
+        assert f.read() == script
+    assert results["files_skipped"] == []
+
+
+def test_non_utf8_component_is_skipped_and_reported(tmp_path, capsys):
+    course = str(tmp_path)
+    makeCourse(course)
+    html_file = os.path.join(course, "html", "page.html")
+    page = "<p>caf\xe9 jump_to_id/{}</p>".format(old_id).encode("latin-1")
+    writeFile(html_file, page)
+
+    results = renameComponents(course, {old_id: new_id})
+
+    assert results["files_skipped"] == [html_file]
+    assert "page.html" in capsys.readouterr().out
+    with open(html_file, "rb") as f:
+        assert f.read() == page
+    # Everything else still went through.
+    assert os.path.exists(os.path.join(course, "lti", new_id + ".xml"))
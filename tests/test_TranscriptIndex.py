@@ -0,0 +1,18 @@
+import io
+import pytest
+from TranscriptIndex import readSJSON
+
+
+def test_read_sjson():
+    transcript = readSJSON(
+        io.StringIO('{"start": [0, 1500], "end": [1000, 2000], "text": ["Hi", "Bye"]}')
+    )
+    assert transcript["starts"].tolist() == [0, 1500]
+    assert transcript["ends"].tolist() == [1000, 2000]
+    assert transcript["texts"] == ["Hi", "Bye"]
+
+
+@pytest.mark.parametrize("text", ["[1, 2, 3]", '"hello"', "null"])
+def test_read_sjson_that_isnt_a_transcript(text):
+    with pytest.raises(ValueError, match="Not an edX transcript"):
+        readSJSON(io.StringIO(text))
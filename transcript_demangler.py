@@ -2,33 +2,163 @@
 
 import os
 import sys
-import glob
-import chardet
-
-# Get a filename or folder from the command line args.
-# If there is no command line argument, use the current working directory.
-path: str = sys.argv[1] if len(sys.argv) > 1 else os.getcwd()
-
-# Open any .srt .vtt or .txt files in the folder
-for dirpath, dirnames, filenames in os.walk(path):
-    if 'venv' in dirpath:
-        continue
-    for filename in filenames:
-        filepath = os.path.join(dirpath, filename)
-        if not filename.endswith(('.srt', '.vtt', '.txt')) or filename.startswith('.'):
+import codecs
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from chardet import UniversalDetector
+from WriteJournal import openForWriting
+
+instructions = """
+To use:
+python3 transcript_demangler.py path/to/folder (options)
+
+Finds .srt, .vtt, and .txt files that aren't UTF-8 and converts them.
+Uses the current folder if you don't give it one.
+
+Files that are already UTF-8 are left alone. For the rest, we guess the
+encoding from the part where it stops being UTF-8, or from the whole file
+if that's not enough. Each file is written in full before
+it replaces the old one, so if the guess turns out wrong partway through,
+the original is untouched.
+
+Options:
+  -p  How many files to work on at once. Defaults to the number of CPUs.
+  -h  Print this message and exit.
+
+Last update: October 19th, 2026
+"""
+
+transcript_extensions = (".srt", ".vtt", ".txt")
+
+# How much we read at a time.
+chunk_size = 64 * 1024
+
+# The most we hand to chardet. It usually makes up its mind well before this.
+sample_size = 256 * 1024
+
+
+# Where the file stops being UTF-8, as a byte offset, or None if it's fine
+# all the way through. Reads it a piece at a time.
+def findNonUTF8(filepath):
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="strict")
+    read = 0
+    with open(filepath, "rb") as f:
+        # A byte order mark isn't wanted in the output, so convert those.
+        if f.read(3) == codecs.BOM_UTF8:
+            return 0
+        f.seek(0)
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            # The decoder holds on to a partial character between chunks.
+            pending = len(decoder.getstate()[0])
+            try:
+                decoder.decode(chunk)
+            except UnicodeDecodeError as e:
+                return read - pending + e.start
+            read += len(chunk)
+        try:
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError as e:
+            return read - len(decoder.getstate()[0]) + e.start
+    return None
+
+
+# Asks chardet about the file from start onward, stopping as soon as it's
+# sure, or after limit bytes. With no limit, it reads the whole file.
+def guessEncoding(filepath, start=0, limit=sample_size):
+    detector = UniversalDetector()
+    fed = 0
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        while (limit is None or fed < limit) and not detector.done:
+            size = chunk_size if limit is None else min(chunk_size, limit - fed)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            detector.feed(chunk)
+            fed += len(chunk)
+    detector.close()
+    return detector.result["encoding"]
+
+
+def convertFile(filepath, encoding):
+    # utf-8-sig drops the byte order mark.
+    if codecs.lookup(encoding).name == "utf-8":
+        encoding = "utf-8-sig"
+    with open(filepath, "r", encoding=encoding) as f_in:
+        with openForWriting(filepath) as f_out:
+            for chunk in iter(lambda: f_in.read(chunk_size), ""):
+                f_out.write(chunk)
+    return encoding
+
+
+# Re-encodes one file as UTF-8 if it needs it. Runs in a worker.
+# Returns (encoding, error), with encoding "utf-8" for files left alone.
+def demangleFile(filepath):
+    try:
+        bad_byte = findNonUTF8(filepath)
+        if bad_byte is None:
+            return "utf-8", None
+        # Start the sample a little before the first byte that isn't UTF-8.
+        # Before that it's all plain text, which tells chardet nothing.
+        encoding = guessEncoding(filepath, max(0, bad_byte - 1024))
+        if encoding is not None and encoding.lower() != "ascii":
+            try:
+                return convertFile(filepath, encoding), None
+            except UnicodeError:
+                pass
+        # The sample wasn't enough. Try the whole file.
+        encoding = guessEncoding(filepath, limit=None)
+        if encoding is None:
+            return None, "Couldn't tell what encoding this is."
+        return convertFile(filepath, encoding), None
+    except (OSError, LookupError, UnicodeError) as e:
+        return None, str(e)
+
+
+def findTranscripts(path):
+    if os.path.isfile(path):
+        return [path]
+    found = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        if "venv" in dirpath:
             continue
-        # Attempt to detect character encoding.
-        with open(filepath, 'rb') as f_in:
-            print()
-            print(filename)
-            detected = chardet.detect(f_in.read())
-            print(detected)
-            # If the encoding is not utf-8, try to convert it.
-            if detected['encoding'] != 'utf-8':
-                with open(filepath, 'r', encoding=detected['encoding']) as f_in:
-                    data = f_in.read()
-                with open(filepath, 'w', encoding='utf-8') as f_out:
-                    f_out.write(data)
-                print(f'Converted {filename} from {detected["encoding"]} to utf-8.')
-            else:
-                print(f'{filename} is already utf-8.')
\ No newline at end of file
+        for filename in sorted(filenames):
+            if filename.endswith(transcript_extensions) and not filename.startswith(
+                "."
+            ):
+                found.append(os.path.join(dirpath, filename))
+    return found
+
+
+def transcript_demangler(argv):
+    parser = argparse.ArgumentParser(usage=instructions, add_help=False)
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.add_argument("-p", "--processes", type=int, default=None)
+    parser.add_argument("path", nargs="?", default=os.getcwd())
+
+    args = parser.parse_args(argv)
+    if args.help:
+        sys.exit(instructions)
+
+    filepaths = findTranscripts(args.path)
+    num_converted = 0
+    num_failed = 0
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        results = pool.map(demangleFile, filepaths, chunksize=16)
+        for filepath, (encoding, error) in zip(filepaths, results):
+            filename = os.path.basename(filepath)
+            if error is not None:
+                print(f"Couldn't convert {filename}: {error}")
+                num_failed += 1
+            elif encoding != "utf-8":
+                print(f"Converted {filename} from {encoding} to utf-8.")
+                num_converted += 1
+
+    print(
+        f"Checked {len(filepaths)} files. Converted {num_converted}"
+        + (f", couldn't convert {num_failed}." if num_failed else ".")
+    )
+
+
+if __name__ == "__main__":
+    transcript_demangler(sys.argv[1:])